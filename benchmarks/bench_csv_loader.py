@@ -0,0 +1,62 @@
+"""Benchmark peak memory and throughput of chunked CSV ingestion against a single read
+
+Usage:
+    python -m benchmarks.bench_csv_loader [n_tickers] [chunksize]
+
+Each mode runs in a fresh interpreter, so its peak RSS is not inflated by the
+previous one.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_stock_data
+
+MODES = ("single-read", "chunked")
+
+
+def peak_rss_mb() -> float:
+    """Return the peak resident set size of this process in MB (Linux)
+
+    VmHWM belongs to the process's own address space, unlike ru_maxrss,
+    which survives exec and would report the parent's peak.
+    """
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def run_mode(mode: str, path: str, chunksize: int):
+    """Load and clean `path` in one mode, printing the wall time and peak RSS"""
+    from src.data.data_loader import CSVDataLoader
+    from src.data.processor import process_data, remove_outliers
+
+    start = time.perf_counter()
+    if mode == "single-read":
+        df = process_data(CSVDataLoader(path).load_data(), group_by="ticker")
+    else:
+        df = remove_outliers(CSVDataLoader(path, chunksize=chunksize, process=True).load_data(), by="ticker")
+    elapsed = time.perf_counter() - start
+    peak = peak_rss_mb()
+    print(f"{mode:12s} {elapsed:8.2f}s {len(df) / elapsed:12,.0f} rows/s  peak RSS {peak:8.1f} MB  "
+          f"frame {df.memory_usage(deep=True).sum() / 2**20:8.1f} MB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in MODES:
+        run_mode(sys.argv[1], sys.argv[2], int(sys.argv[3]))
+        sys.exit()
+
+    n_tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    chunksize = int(sys.argv[2]) if len(sys.argv) > 2 else 250_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "combined_stock.csv")
+        generate_stock_data(n_tickers=n_tickers).to_csv(path, index=False)
+        print(f"{n_tickers} tickers, {os.path.getsize(path) / 2**20:.0f} MB CSV, chunksize {chunksize:,}")
+        for mode in MODES:
+            subprocess.run([sys.executable, "-m", "benchmarks.bench_csv_loader", mode, path, str(chunksize)],
+                           check=True)
@@ -0,0 +1,59 @@
+"""Benchmark training and 30-day forecasting of StockPredictor across all tickers
+
+Usage:
+    python -m benchmarks.bench_predictor [n_tickers]
+"""
+import sys
+import time
+
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from benchmarks.synthetic import generate_stock_data
+from src.data.partition import TickerPartitions
+from src.data.processor import standardise_column_names, convert_types
+from src.models.predictive_model import StockPredictor
+
+HORIZON = 30
+LAG = 7
+
+
+def legacy_train_and_forecast(df: pd.DataFrame, days: int):
+    """The DataFrame-based feature and forecast path before the NumPy rewrite"""
+    model = LinearRegression()
+    df_lags = df.copy()
+    df_lags["date"] = pd.to_datetime(df_lags["date"], utc=True)
+    df_lags = df_lags.sort_values("date")
+    for i in range(1, LAG + 1):
+        df_lags[f"lag_{i}"] = df_lags["close"].shift(i)
+    df_lags = df_lags.dropna()
+    lag_cols = [f"lag_{i}" for i in range(1, LAG + 1)]
+    model.fit(df_lags[lag_cols], df_lags["close"])
+
+    last_lags = df.copy().sort_values("date")["close"].values[-LAG:].tolist()
+    predictions = []
+    for _ in range(days):
+        next_close = int(model.predict(pd.DataFrame([last_lags[-LAG:]], columns=lag_cols))[0])
+        predictions.append(next_close)
+        last_lags.append(next_close)
+    return predictions
+
+
+def train_and_forecast(df: pd.DataFrame, days: int):
+    predictor = StockPredictor(lag=LAG)
+    close = predictor.close_array(df)
+    predictor.train_array(close)
+    return predictor.predict_array(close, days)
+
+
+if __name__ == "__main__":
+    n_tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    df = convert_types(standardise_column_names(generate_stock_data(n_tickers=n_tickers)))
+    partitions = TickerPartitions(df)
+    print(f"{n_tickers} tickers, {len(df) // n_tickers} bars each, {HORIZON}-day horizon")
+    for name, func in [("legacy", legacy_train_and_forecast), ("StockPredictor", train_and_forecast)]:
+        start = time.perf_counter()
+        for ticker in partitions.tickers:
+            func(partitions[ticker], HORIZON)
+        elapsed = time.perf_counter() - start
+        print(f"{name:16s} {elapsed:8.3f}s {elapsed / n_tickers * 1000:8.2f} ms/ticker")
@@ -0,0 +1,80 @@
+"""Fixtures of the pytest-benchmark suite, parametrised over synthetic universe sizes
+
+Sizes are given as TICKERSxYEARS[@INTERVAL] with --sizes or the BENCH_SIZES
+environment variable, e.g. "10x1,100x10,1000x30,10x0.02@1m".
+"""
+import os
+
+import pytest
+
+from benchmarks.synthetic import generate_stock_data, write_ticker_files
+from src.data.intraday import PartitionedStore
+from src.data.partition import TickerPartitions
+from src.data.processor import compact_frame, process_data
+
+DEFAULT_SIZES = "10x1,100x10,10x0.02@1m"
+
+
+def parse_size(spec: str):
+    """Parse "100x10@1d" into (n_tickers, years, interval)"""
+    size, _, interval = spec.partition("@")
+    tickers, years = size.split("x")
+    return int(tickers), float(years), interval or "1d"
+
+
+def pytest_addoption(parser):
+    parser.addoption("--sizes", default=os.environ.get("BENCH_SIZES", DEFAULT_SIZES),
+                     help="comma-separated universe sizes, TICKERSxYEARS[@INTERVAL]")
+
+
+def pytest_generate_tests(metafunc):
+    if "size" in metafunc.fixturenames:
+        specs = [s.strip() for s in metafunc.config.getoption("sizes").split(",") if s.strip()]
+        metafunc.parametrize("size", specs, scope="session")
+
+
+@pytest.fixture(scope="session")
+def raw(size):
+    """The raw combined frame, with date strings as read back from CSV"""
+    n_tickers, years, interval = parse_size(size)
+    return generate_stock_data(n_tickers=n_tickers, years=years, interval=interval)
+
+
+@pytest.fixture(scope="session")
+def csv_path(raw, tmp_path_factory):
+    path = tmp_path_factory.mktemp("csv") / "combined_stock.csv"
+    raw.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def ticker_files(raw, tmp_path_factory):
+    return write_ticker_files(raw, tmp_path_factory.mktemp("tickers"))
+
+
+@pytest.fixture(scope="session")
+def clean(raw):
+    return process_data(raw.copy(), group_by="ticker")
+
+
+@pytest.fixture(scope="session")
+def partitions(clean):
+    return TickerPartitions(compact_frame(clean))
+
+
+@pytest.fixture(scope="session")
+def daily_partitions(size, partitions):
+    """The partitions of daily sizes only"""
+    if parse_size(size)[2] != "1d":
+        pytest.skip("cross-ticker analytics align daily bars on trading dates")
+    return partitions
+
+
+@pytest.fixture(scope="session")
+def intraday_store(size, raw, tmp_path_factory):
+    """The raw frame written to a day-partitioned store, for intraday sizes only"""
+    if parse_size(size)[2] == "1d":
+        pytest.skip("the partitioned store holds intraday bars")
+    store = PartitionedStore(tmp_path_factory.mktemp("intraday"), fmt="parquet")
+    store.write(raw)
+    return store
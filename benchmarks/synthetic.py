@@ -0,0 +1,97 @@
+"""Deterministic synthetic stock data for benchmarks"""
+import os
+
+import numpy as np
+import pandas as pd
+
+# Bars per trading day of each supported interval (minute bars cover a 6.5 hour session)
+BARS_PER_DAY = {"1d": 1, "1m": 390}
+TRADING_DAYS_PER_YEAR = 252
+
+
+def bars_for_years(years: float, interval: str = "1d") -> int:
+    """Return the number of bars per ticker in `years` of trading at `interval`"""
+    return max(1, int(round(years * TRADING_DAYS_PER_YEAR * BARS_PER_DAY[interval])))
+
+
+def bar_dates(n_bars: int, interval: str = "1d") -> pd.DatetimeIndex:
+    """
+    Return `n_bars` consecutive UTC bar timestamps.
+
+    Daily bars fall on consecutive calendar days from 2015-01-01. Minute bars
+    fill the 14:30-21:00 UTC session of consecutive business days.
+    """
+    if interval == "1d":
+        return pd.date_range("2015-01-01", periods=n_bars, freq="D", tz="UTC")
+    per_day = BARS_PER_DAY[interval]
+    days = pd.bdate_range("2015-01-01", periods=-(-n_bars // per_day)) + pd.Timedelta(hours=14, minutes=30)
+    minutes = pd.to_timedelta(np.arange(per_day), unit="min")
+    stamps = (days.to_numpy()[:, None] + minutes.to_numpy()[None, :]).ravel()[:n_bars]
+    return pd.DatetimeIndex(stamps).tz_localize("UTC")
+
+
+def generate_stock_data(n_tickers: int = 100, n_days: int = 2520, seed: int = 0, interval: str = "1d",
+                        years: float = None, typed: bool = False) -> pd.DataFrame:
+    """
+    Generate a raw combined stock frame shaped like `combined_stock.csv`.
+
+    Prices follow a geometric random walk per ticker, and dates are strings
+    with a UTC offset, as read back from the CSV.
+
+    Args:
+        n_tickers (int, optional): The number of tickers. Defaults to 100.
+        n_days (int, optional): The number of bars per ticker, used when `years` is None. Defaults to 2520 (10 years).
+        seed (int, optional): The random seed. Defaults to 0.
+        interval (str, optional): The bar interval, "1d" or "1m". Defaults to "1d".
+        years (float, optional): Generate this many years of bars at `interval` instead of `n_days` bars.
+        typed (bool, optional): Return timezone-aware datetimes instead of date strings. Defaults to False.
+
+    Returns:
+        pd.DataFrame: Columns Date, Open, High, Low, Close, Volume, Dividends, Stock Splits, Ticker.
+    """
+    n_bars = bars_for_years(years, interval) if years is not None else n_days
+    rng = np.random.default_rng(seed)
+    dates = bar_dates(n_bars, interval)
+    if not typed:
+        dates = dates.astype(str)
+    volatility = 0.02 / np.sqrt(BARS_PER_DAY[interval])
+    start = rng.uniform(10, 1000, size=(n_tickers, 1))
+    close = start * np.exp(np.cumsum(rng.normal(0, volatility, size=(n_tickers, n_bars)), axis=1))
+    spread = np.abs(rng.normal(0, volatility / 2, size=close.shape)) * close
+    n = n_tickers * n_bars
+    return pd.DataFrame({
+        "Date": np.tile(dates, n_tickers),
+        "Open": (close + rng.normal(0, volatility / 4, size=close.shape) * close).ravel(),
+        "High": (close + spread).ravel(),
+        "Low": (close - spread).ravel(),
+        "Close": close.ravel(),
+        "Volume": rng.integers(1_000_000, 100_000_000, size=n),
+        "Dividends": np.where(rng.random(n) < 0.01 / BARS_PER_DAY[interval], 0.25, 0.0),
+        "Stock Splits": 0.0,
+        "Ticker": np.repeat([f"T{i:04d}" for i in range(n_tickers)], n_bars),
+    })
+
+
+def write_ticker_files(df: pd.DataFrame, out_dir, fmt: str = "csv") -> list:
+    """
+    Write a generated frame as one `<ticker>_stock.<fmt>` file per ticker, like StockDownloader.
+
+    Args:
+        df (pd.DataFrame): The frame returned by `generate_stock_data`.
+        out_dir (str): The output directory.
+        fmt (str, optional): "csv" or "parquet". Defaults to "csv".
+
+    Returns:
+        list[str]: The written paths.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for ticker, rows in df.groupby("Ticker", sort=False):
+        path = os.path.join(out_dir, f"{ticker}_stock.{fmt}")
+        rows = rows.drop(columns="Ticker")
+        if fmt == "parquet":
+            rows.assign(Date=pd.to_datetime(rows["Date"], utc=True)).to_parquet(path, index=False)
+        else:
+            rows.to_csv(path, index=False)
+        paths.append(path)
+    return paths
@@ -0,0 +1,146 @@
+"""Benchmarks of every pipeline stage and of dashboard callback latency
+
+Usage:
+    python -m pytest benchmarks [--sizes 10x1,100x10] [--benchmark-compare]
+
+See README.md for saving and comparing against the stored baseline.
+"""
+import pandas as pd
+import pytest
+
+from src.data.data_loader import CSVDataLoader
+from src.data.partition import TickerPartitions
+from src.data.processor import compact_frame, process_data, remove_outliers
+from src.data.rollup import aggregate_bars
+from src.data.stock_combiner import StockCombiner
+from src.models.analytics import CrossTickerAnalytics
+from src.models.backtest import backtest
+from src.models.batch import forecast_all
+from src.models.indicators import IndicatorEngine
+from src.models.predictive_model import StockPredictor
+from src.viz.charts import plot_combined_stocks, plot_stock_with_prediction
+from src.viz.downsample import downsample
+
+
+def test_load_csv(benchmark, csv_path):
+    df = benchmark(lambda: CSVDataLoader(csv_path).load_data())
+    benchmark.extra_info["rows"] = len(df)
+
+
+def test_load_csv_chunked(benchmark, csv_path):
+    df = benchmark(lambda: remove_outliers(CSVDataLoader(csv_path, chunksize=250_000, process=True).load_data(),
+                                           by="ticker"))
+    benchmark.extra_info["rows"] = len(df)
+
+
+def test_combine(benchmark, ticker_files, tmp_path):
+    combiner = StockCombiner(ticker_files, out_dir=tmp_path)
+    benchmark(combiner.combine)
+
+
+def test_process_data(benchmark, raw):
+    benchmark.pedantic(process_data, setup=lambda: ((raw.copy(),), {"group_by": "ticker"}), rounds=3)
+
+
+def test_compact_frame(benchmark, clean):
+    benchmark(compact_frame, clean)
+
+
+def test_partitions(benchmark, clean):
+    benchmark(TickerPartitions, clean)
+
+
+def test_rollup_weekly(benchmark, raw):
+    benchmark(aggregate_bars, raw, "W")
+
+
+def test_intraday_window(benchmark, intraday_store):
+    """Load and clean the last 5 days of one ticker, reading only the partitions of the window"""
+    from src.data.cache import dataset_cache
+
+    ticker = intraday_store.tickers()[0]
+    end = intraday_store.last_date(ticker)
+    df = benchmark.pedantic(intraday_store.load, args=(ticker, end - pd.Timedelta(days=5), end),
+                            kwargs={"clean": True}, setup=dataset_cache.invalidate, rounds=5)
+    benchmark.extra_info["rows"] = len(df)
+
+
+def test_train_predictor(benchmark, partitions):
+    close = StockPredictor.close_array(partitions[partitions.tickers[0]])
+    predictor = StockPredictor(lag=7)
+    benchmark(predictor.train_array, close)
+
+
+def test_forecast_all(benchmark, partitions):
+    benchmark.pedantic(forecast_all, args=(partitions,), kwargs={"max_workers": 1}, rounds=3)
+
+
+def test_indicators(benchmark, partitions):
+    benchmark.pedantic(IndicatorEngine().fit, args=(partitions,), rounds=3)
+
+
+def test_backtest(benchmark, partitions):
+    benchmark.pedantic(backtest, args=(partitions,), kwargs={"step": 5, "max_workers": 1}, rounds=3)
+
+
+def test_analytics(benchmark, daily_partitions):
+    """Pivot, full-history correlation, quarterly rolling correlation and drawdowns of every ticker"""
+    def run():
+        analytics = CrossTickerAnalytics(daily_partitions)
+        analytics.correlation()
+        analytics.correlation(window=63, step=21)
+        return analytics.max_drawdowns()
+
+    benchmark.pedantic(run, rounds=3)
+
+
+def test_downsample(benchmark, partitions):
+    benchmark(downsample, partitions[partitions.tickers[0]], 2000)
+
+
+def test_chart_stock(benchmark, partitions):
+    benchmark(plot_stock_with_prediction, partitions, partitions.tickers[0], [100] * 30)
+
+
+def test_chart_combined(benchmark, partitions):
+    benchmark.pedantic(plot_combined_stocks, args=(partitions,), rounds=3)
+
+
+@pytest.fixture(scope="module")
+def dashboard(partitions):
+    """A dashboard serving the synthetic partitions, with nothing persisted to disk"""
+    from src.webapp.app import create_app
+    from src.webapp.state import DashboardState
+
+    state = DashboardState(cache_dir=None)
+    state.registry.persist_dir = None
+    state.swap("bench", partitions)
+    return create_app(state, preload="lazy", refresh_interval=0)
+
+
+def callback_body(ticker, days, changed):
+    return {
+        "output": "stock-chart.figure",
+        "outputs": {"id": "stock-chart", "property": "figure"},
+        "inputs": [
+            {"id": "ticker-dropdown", "property": "value", "value": ticker},
+            {"id": "predict-days-slider", "property": "value", "value": days},
+            {"id": "stock-chart", "property": "relayoutData", "value": None},
+            {"id": "indicator-checklist", "property": "value", "value": []},
+        ],
+        "changedPropIds": [changed],
+    }
+
+
+@pytest.mark.parametrize("changed", ["ticker-dropdown.value", "predict-days-slider.value"])
+def test_callback_stock_chart(benchmark, dashboard, partitions, changed):
+    """End-to-end latency of the stock chart callback: a full render on a figure cache miss, or a Patch"""
+    client = dashboard.server.test_client()
+    body = callback_body(partitions.tickers[0], 10, changed)
+
+    def request():
+        response = client.post("/_dash-update-component", json=body)
+        assert response.status_code == 200
+        return response
+
+    benchmark.pedantic(request, setup=dashboard.figure_cache.clear, rounds=10, warmup_rounds=1)
@@ -5,15 +5,105 @@ import os
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 
+# On-disk format for downloaded and combined datasets ("csv" or "parquet")
+DATA_FORMAT = os.environ.get("DATA_FORMAT", "csv")
+
+# On-disk format of the combined dataset and its rollup tiers: DATA_FORMAT, or "sqlite" for an embedded
+# database indexed by ticker and date, which answers filtered and aggregate queries itself
+COMBINED_FORMAT = os.environ.get("COMBINED_FORMAT", DATA_FORMAT)
+
+# Table holding the stock bars in "sqlite" datasets
+SQL_TABLE = "stocks"
+
 # Stock tickers to track
 TICKERS = ["AAPL", "MSFT", "TSLA", "NVDA", "GOOGL", "BTC-USD"]
 
 # Dataset registry
 DATASETS = {
     "sample": os.path.join(DATA_DIR, "sample_data.csv"),
-    "COMBINED": os.path.join(DATA_DIR, "combined_stock.csv"),
+    "COMBINED": os.path.join(DATA_DIR, f"combined_stock.{COMBINED_FORMAT}"),
 }
 
 # Dynamically add each stock to the dataset registry
 for ticker in TICKERS:
-    DATASETS[ticker] = os.path.join(DATA_DIR, f"{ticker}_stock.csv")
+    DATASETS[ticker] = os.path.join(DATA_DIR, f"{ticker}_stock.{DATA_FORMAT}")
+
+# OHLCV rollup tiers materialised after combining: name -> (pandas period, approximate days per bar)
+ROLLUP_TIERS = {
+    "weekly": ("W", 7),
+    "monthly": ("M", 30.4),
+    "quarterly": ("Q", 91.3),
+}
+for tier in ROLLUP_TIERS:
+    DATASETS[f"COMBINED_{tier.upper()}"] = os.path.join(DATA_DIR, f"combined_stock_{tier}.{COMBINED_FORMAT}")
+
+# Precomputed forecasts written by `python -m src.update_forecasts`
+DATASETS["FORECASTS"] = os.path.join(DATA_DIR, f"forecasts.{DATA_FORMAT}")
+
+# Intraday mode: bars of INTRADAY_INTERVAL stored under INTRADAY_DIR in one file per ticker and UTC day,
+# days of months that ended over INTRADAY_COMPACT_AFTER_DAYS ago compacted into one file per ticker and month,
+# and the days of bars the dashboard's intraday chart shows before zooming
+INTRADAY_INTERVAL = os.environ.get("INTRADAY_INTERVAL", "1m")
+INTRADAY_DIR = os.environ.get("INTRADAY_DIR", os.path.join(DATA_DIR, "intraday"))
+INTRADAY_COMPACT_AFTER_DAYS = int(os.environ.get("INTRADAY_COMPACT_AFTER_DAYS", 7))
+INTRADAY_WINDOW_DAYS = int(os.environ.get("INTRADAY_WINDOW_DAYS", 5))
+
+# Memory budget for the process-wide dataset cache used by get_data
+DATASET_CACHE_MAX_BYTES = int(os.environ.get("DATASET_CACHE_MAX_BYTES", 512 * 1024 ** 2))
+
+# Memory budget for the trailing windows gathered at a time by the rolling correlation and covariance
+ANALYTICS_CHUNK_BYTES = int(os.environ.get("ANALYTICS_CHUNK_BYTES", 256 * 1024 ** 2))
+
+# Chunked CSV ingestion: rows parsed per chunk, and the memory cap of the accumulated typed frame
+CSV_CHUNKSIZE = int(os.environ.get("CSV_CHUNKSIZE", 250_000))
+CSV_MAX_BYTES = int(os.environ.get("CSV_MAX_BYTES", 2 * 1024 ** 3))
+
+# Number of tickers downloaded concurrently by the update job
+DOWNLOAD_WORKERS = int(os.environ.get("DOWNLOAD_WORKERS", 4))
+
+# Directory where trained models are persisted between restarts
+MODEL_DIR = os.environ.get("MODEL_DIR", os.path.join(DATA_DIR, "models"))
+
+# Longest prediction horizon offered by the dashboard
+MAX_PREDICT_DAYS = 30
+
+# Number of lag features used by the dashboard's StockPredictor
+PREDICTOR_LAG = 7
+
+# Worker processes used for batch training and forecasting (None = all cores)
+FORECAST_WORKERS = int(os.environ["FORECAST_WORKERS"]) if "FORECAST_WORKERS" in os.environ else None
+
+# Maximum points sent to the browser per chart line, and the decimation method ("lttb" or "minmax")
+MAX_CHART_POINTS = int(os.environ.get("MAX_CHART_POINTS", 2000))
+DOWNSAMPLE_METHOD = os.environ.get("DOWNSAMPLE_METHOD", "lttb")
+
+# Approximate plot width in pixels, used to pick the rollup tier for a visible range
+CHART_WIDTH_PX = int(os.environ.get("CHART_WIDTH_PX", 1200))
+
+# Number of rendered figures kept by the webapp's figure cache
+FIGURE_CACHE_SIZE = int(os.environ.get("FIGURE_CACHE_SIZE", 128))
+
+# Directory of the cleaned-dataset warm cache used for fast dashboard startup
+CLEAN_CACHE_DIR = os.environ.get("CLEAN_CACHE_DIR", os.path.join(DATA_DIR, "cache"))
+
+# When the dashboard loads its data: "background" (at startup, in a thread), "eager" or "lazy" (first request)
+WEBAPP_PRELOAD = os.environ.get("WEBAPP_PRELOAD", "background")
+
+# Production server: directory of the shared, memory-mapped dataset (RAM-backed /dev/shm when available),
+# number of worker processes and bind address
+SHARED_DATA_DIR = os.environ.get(
+    "SHARED_DATA_DIR",
+    "/dev/shm/analytics-dashboard" if os.path.isdir("/dev/shm") else os.path.join(DATA_DIR, "shared"),
+)
+SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", 4))
+SERVER_BIND = os.environ.get("SERVER_BIND", "0.0.0.0:8050")
+
+# Seconds between background data refreshes (download, combine, process, retrain); 0 disables the scheduler
+REFRESH_INTERVAL_SECONDS = float(os.environ.get("REFRESH_INTERVAL_SECONDS", 0))
+
+# Log level of the package's structured log lines ("DEBUG", "INFO", "WARNING", ...)
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+
+# Opt-in per-request profiling (?profile=1 or an X-Profile: 1 header) and where the reports are written
+PROFILE_REQUESTS = os.environ.get("PROFILE_REQUESTS", "0").lower() in ("1", "true", "yes")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(DATA_DIR, "profiles"))
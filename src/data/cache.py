@@ -0,0 +1,126 @@
+"""Process-wide, thread-safe cache of loaded datasets"""
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from src.config import DATASET_CACHE_MAX_BYTES
+
+
+def _freeze(value):
+    """Turn option values (lists, dicts) into hashable cache key parts"""
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def file_signature(path):
+    """Return the (mtime, size) signature used to detect a changed file"""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class DatasetCache:
+    """LRU cache of DataFrames keyed by dataset name and load options
+
+    Entries are invalidated when the backing file's mtime or size changes,
+    and the least recently used entries are evicted once the total
+    `memory_usage(deep=True)` of the cached frames exceeds `max_bytes`.
+    """
+
+    def __init__(self, max_bytes=DATASET_CACHE_MAX_BYTES):
+        """
+        Initialises a DatasetCache object.
+
+        Args:
+            max_bytes (int, optional): The memory budget for all cached frames. Defaults to DATASET_CACHE_MAX_BYTES.
+
+        Returns:
+            None
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+
+    @staticmethod
+    def make_key(name, **options):
+        """Build the cache key for a dataset name and its load options"""
+        return (name, _freeze(options))
+
+    def get(self, key, path, load):
+        """Return the cached frame for `key`, loading it with `load()` on a miss.
+
+        Args:
+            key (tuple): The cache key, see `make_key`.
+            path (str): The file backing the dataset, used for invalidation.
+            load (callable): Zero-argument function returning the loaded DataFrame.
+
+        Returns:
+            pd.DataFrame: The cached (shared) DataFrame. Callers must not mutate it.
+        """
+        signature = file_signature(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Load outside the lock so a slow read doesn't block other datasets
+        df = load()
+        self.put(key, signature, df)
+        return df
+
+    def put(self, key, signature, df):
+        """Store a frame, evicting least recently used entries to stay within budget"""
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            self._discard(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (signature, df, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def invalidate(self, name=None):
+        """Drop every entry for the dataset `name`, or all entries if `name` is None"""
+        with self._lock:
+            for key in list(self._entries):
+                if name is None or key[0] == name:
+                    self._discard(key)
+
+    def stats(self):
+        """Return the hit/miss/eviction counters and current memory use
+
+        Returns:
+            dict: Cache counters.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Shared by get_data, the Dash callbacks and the update job
+dataset_cache = DatasetCache()
@@ -1,6 +1,33 @@
+import logging
+import os
+
+import numpy as np
 import pandas as pd
 
-from src.config import DATASETS
+from src.config import CSV_CHUNKSIZE, CSV_MAX_BYTES, DATASETS, SQL_TABLE
+from src.data.cache import dataset_cache, file_signature
+from src.data.processor import fill_missing, standardise_column_names
+from src.data.sql_store import DATE_FORMAT, connect, from_sql_dates, table_columns
+from src.instrumentation import timed
+
+logger = logging.getLogger(__name__)
+
+
+# Column types of the stock CSVs written by StockDownloader and StockCombiner, matching
+# what `pd.read_csv` + `process_data` infer. Dates carry per-row UTC offsets, so they are
+# read as strings and parsed per chunk. Volume is read as a nullable integer and stored
+# as int64 once a chunk has no missing values.
+STOCK_CSV_SCHEMA = {
+    "Open": "float64",
+    "High": "float64",
+    "Low": "float64",
+    "Close": "float64",
+    "Volume": "Int64",
+    "Dividends": "float64",
+    "Stock Splits": "float64",
+    "Ticker": "object",
+}
+STOCK_CSV_DATE_COLUMN = "Date"
 
 
 class InterfaceDataLoader:
@@ -11,10 +38,86 @@ class InterfaceDataLoader:
 
 
 class CSVDataLoader(InterfaceDataLoader):
-    """Data loader for CSV files with caching"""
-    def __init__(self, path):
+    """Data loader for CSV files with caching
+
+    By default the whole file is read with a single `pd.read_csv`. With a
+    `chunksize`, the file is streamed in chunks parsed with an explicit
+    schema, so no column is ever held as inferred Python objects, and only
+    the typed chunks are accumulated, up to `max_bytes`.
+
+    CSV has no row groups to skip, so the ticker/date filters are applied
+    after parsing, chunk by chunk when streaming; only the column projection
+    saves parsing work.
+    """
+    def __init__(self, path, chunksize=None, schema=None, date_column=STOCK_CSV_DATE_COLUMN,
+                 process=False, max_bytes=CSV_MAX_BYTES, columns=None, tickers=None, start=None, end=None,
+                 ticker_column="Ticker"):
+        """
+        Initialises a CSVDataLoader object.
+
+        Args:
+            path (str): Path to the CSV file.
+            chunksize (int, optional): Stream the file in chunks of this many rows. Defaults to a single read.
+            schema (dict, optional): Column -> dtype of the chunked reader. Defaults to STOCK_CSV_SCHEMA.
+            date_column (str, optional): The column parsed to UTC datetimes in each chunk, and the
+                column of the date filters. Defaults to "Date".
+            process (bool, optional): Apply the row-local `process_data` steps (column names, missing
+                values) to each chunk, and drop duplicate rows by their hashes across chunks. Outliers
+                need the whole dataset and are left to the caller.
+            max_bytes (int, optional): The memory cap of the accumulated chunks. Defaults to CSV_MAX_BYTES.
+            columns (list[str], optional): Columns to read. Defaults to all columns.
+            tickers (list[str] or str, optional): Only keep rows for these tickers.
+            start (str or pd.Timestamp, optional): Only keep rows on or after this date.
+            end (str or pd.Timestamp, optional): Only keep rows on or before this date.
+            ticker_column (str, optional): Name of the ticker column. Defaults to "Ticker".
+
+        Returns:
+            None
+        """
         self.path = path
+        self.chunksize = chunksize
+        self.schema = schema if schema is not None else STOCK_CSV_SCHEMA
+        self.date_column = date_column
+        self.process = process
+        self.max_bytes = max_bytes
+        self.columns = columns
+        self.tickers = [tickers] if isinstance(tickers, str) else tickers
+        self.start = start
+        self.end = end
+        self.ticker_column = ticker_column
         self._data = None
+
+    def _usecols(self):
+        """Return the columns to parse: the projection plus the columns the filters need"""
+        if self.columns is None:
+            return None
+        needed = list(self.columns)
+        if self.tickers is not None and self.ticker_column not in needed:
+            needed.append(self.ticker_column)
+        if (self.start is not None or self.end is not None) and self.date_column not in needed:
+            needed.append(self.date_column)
+        return needed
+
+    def _select(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Keep the rows matching the ticker/date filters and the projected columns"""
+        keep = np.ones(len(df), dtype=bool)
+        if self.tickers is not None:
+            keep &= df[self.ticker_column].isin(self.tickers).to_numpy()
+        if self.start is not None or self.end is not None:
+            dates = df[self.date_column]
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = pd.to_datetime(dates, errors="coerce", utc=True)
+            if self.start is not None:
+                keep &= (dates >= pd.Timestamp(self.start, tz="UTC")).to_numpy()
+            if self.end is not None:
+                keep &= (dates <= pd.Timestamp(self.end, tz="UTC")).to_numpy()
+        if not keep.all():
+            df = df[keep]
+        if self.columns is not None and len(df.columns) > len(self.columns):
+            df = df[self.columns]
+        return df
+
+    @timed("data.load_csv")
     def load_data(self, refresh: bool = False) -> pd.DataFrame:
         """Load data from a CSV file
 
@@ -25,21 +128,335 @@ class CSVDataLoader(InterfaceDataLoader):
             pd.DataFrame
         """
         if not refresh and self._data is not None:
-            print("Returning cached data...")
+            logger.debug("returning cached data path=%s", self.path)
+            return self._data
+
+        logger.info("loading data path=%s", self.path)
+        if self.chunksize is None:
+            self._data = self._select(pd.read_csv(self.path, usecols=self._usecols()))
+        else:
+            self._data = self._accumulate(self.iter_chunks())
+        logger.info("loaded data path=%s rows=%d", self.path, len(self._data))
+        return self._data
+
+    def iter_chunks(self):
+        """Stream the file as typed chunks of `chunksize` rows
+
+        Yields:
+            pd.DataFrame : the next typed chunk, processed when `process` is set
+        """
+        usecols = self._usecols()
+        columns = usecols if usecols is not None else pd.read_csv(self.path, nrows=0).columns
+        dtypes = {col: dtype for col, dtype in self.schema.items() if col in columns}
+        # Sorted row hashes of the chunks yielded so far, to drop duplicates that span chunks
+        seen = np.empty(0, dtype=np.uint64)
+        reader = pd.read_csv(self.path, chunksize=self.chunksize or CSV_CHUNKSIZE, dtype=dtypes, usecols=usecols)
+        for chunk in reader:
+            if self.date_column in chunk:
+                chunk[self.date_column] = pd.to_datetime(chunk[self.date_column], errors="coerce", utc=True)
+            chunk = self._select(chunk)
+            if self.process:
+                chunk = fill_missing(standardise_column_names(chunk))
+            for col in chunk.columns[(chunk.dtypes == "Int64").to_numpy()]:
+                if not chunk[col].hasnans:
+                    chunk[col] = chunk[col].astype("int64")
+            if self.process:
+                hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+                keep = ~pd.Series(hashes).duplicated().to_numpy() & ~np.isin(hashes, seen)
+                if not keep.all():
+                    chunk = chunk[keep]
+                seen = np.union1d(seen, hashes[keep])
+            yield chunk
+
+    def _accumulate(self, chunks) -> pd.DataFrame:
+        """Concatenate typed chunks, failing once they exceed `max_bytes`"""
+        kept, total = [], 0
+        for chunk in chunks:
+            total += chunk.memory_usage(deep=True).sum()
+            if self.max_bytes is not None and total > self.max_bytes:
+                raise MemoryError(
+                    f"{self.path} exceeds the {self.max_bytes / 2**20:.0f} MB load cap; "
+                    "stream it with iter_chunks() or raise max_bytes"
+                )
+            kept.append(chunk)
+        if not kept:
+            return pd.read_csv(self.path, nrows=0, usecols=self.columns)
+
+        # Chunks only know their own categories; align them so the concatenation stays categorical
+        for col in kept[0].select_dtypes(include=["category"]).columns:
+            categories = pd.api.types.union_categoricals([chunk[col] for chunk in kept]).categories
+            for chunk in kept:
+                chunk[col] = chunk[col].cat.set_categories(categories)
+        return pd.concat(kept, ignore_index=True)
+
+
+class ParquetDataLoader(InterfaceDataLoader):
+    """Data loader for typed, columnar Parquet files with caching
+
+    The file is memory-mapped, and only the requested columns and the row
+    groups matching the ticker/date predicates are decoded.
+    """
+    def __init__(self, path, columns=None, tickers=None, start=None, end=None,
+                 ticker_column="Ticker", date_column="Date"):
+        """
+        Initialises a ParquetDataLoader object.
+
+        Args:
+            path (str): Path to the Parquet file.
+            columns (list[str], optional): Columns to read. Defaults to all columns.
+            tickers (list[str] or str, optional): Only read rows for these tickers.
+            start (str or pd.Timestamp, optional): Only read rows on or after this date.
+            end (str or pd.Timestamp, optional): Only read rows on or before this date.
+            ticker_column (str, optional): Name of the ticker column. Defaults to "Ticker".
+            date_column (str, optional): Name of the date column. Defaults to "Date".
+
+        Returns:
+            None
+        """
+        self.path = path
+        self.columns = columns
+        self.tickers = [tickers] if isinstance(tickers, str) else tickers
+        self.start = start
+        self.end = end
+        self.ticker_column = ticker_column
+        self.date_column = date_column
+        self._data = None
+
+    def _filters(self):
+        """Build the pyarrow predicate list for the configured ticker/date bounds"""
+        filters = []
+        if self.tickers is not None:
+            filters.append((self.ticker_column, "in", list(self.tickers)))
+        if self.start is not None:
+            filters.append((self.date_column, ">=", pd.Timestamp(self.start, tz="UTC")))
+        if self.end is not None:
+            filters.append((self.date_column, "<=", pd.Timestamp(self.end, tz="UTC")))
+        return filters or None
+
+    @timed("data.load_parquet")
+    def load_data(self, refresh: bool = False) -> pd.DataFrame:
+        """Load data from a Parquet file
+
+        Args:
+            refresh: bool = False (if true, forces reload from disk)
+
+        Returns:
+            pd.DataFrame
+        """
+        if not refresh and self._data is not None:
+            logger.debug("returning cached data path=%s", self.path)
+            return self._data
+
+        import pyarrow.parquet as pq
+
+        logger.info("loading data path=%s", self.path)
+        table = pq.read_table(
+            self.path,
+            columns=self.columns,
+            filters=self._filters(),
+            memory_map=True,
+        )
+        self._data = table.to_pandas()
+        logger.info("loaded data path=%s rows=%d", self.path, len(self._data))
+        return self._data
+
+
+# SQL expression of the UTC start date of the period containing a date, per pandas period alias
+SQL_PERIOD_STARTS = {
+    "D": "date({date})",
+    "W": "date({date}, 'weekday 0', '-6 days')", # weeks end on Sunday, like pandas "W"
+    "M": "strftime('%Y-%m-01', {date})",
+    "Q": "printf('%s-%02d-01', strftime('%Y', {date}), (CAST(strftime('%m', {date}) AS INTEGER) - 1) / 3 * 3 + 1)",
+    "Y": "strftime('%Y-01-01', {date})",
+}
+
+
+class _SplitProduct:
+    """SQLite aggregate compounding Yahoo split ratios, where 0 means no split"""
+
+    def __init__(self):
+        self.ratio = 1.0
+
+    def step(self, value):
+        if value:
+            self.ratio *= value
+
+    def finalize(self):
+        return 0.0 if np.isclose(self.ratio, 1.0) else self.ratio
+
+
+class SQLDataLoader(InterfaceDataLoader):
+    """Data loader for an embedded SQLite database with caching
+
+    Ticker, date-range and column selections run inside the engine against
+    the (Ticker, Date) index, so only the matching rows reach Python, and
+    `aggregate` rolls bars up to coarser periods in SQL.
+    """
+    def __init__(self, path, table=SQL_TABLE, columns=None, tickers=None, start=None, end=None,
+                 ticker_column="Ticker", date_column="Date"):
+        """
+        Initialises a SQLDataLoader object.
+
+        Args:
+            path (str): Path to the database file.
+            table (str, optional): The table holding the bars. Defaults to SQL_TABLE.
+            columns (list[str], optional): Columns to read. Defaults to all columns.
+            tickers (list[str] or str, optional): Only read rows for these tickers.
+            start (str or pd.Timestamp, optional): Only read rows on or after this date.
+            end (str or pd.Timestamp, optional): Only read rows on or before this date.
+            ticker_column (str, optional): Name of the ticker column. Defaults to "Ticker".
+            date_column (str, optional): Name of the date column. Defaults to "Date".
+
+        Returns:
+            None
+        """
+        self.path = path
+        self.table = table
+        self.columns = columns
+        self.tickers = [tickers] if isinstance(tickers, str) else tickers
+        self.start = start
+        self.end = end
+        self.ticker_column = ticker_column
+        self.date_column = date_column
+        self._data = None
+
+    def _where(self):
+        """Build the WHERE clause and its parameters for the configured ticker/date bounds"""
+        clauses, params = [], []
+        if self.tickers is not None:
+            clauses.append(f'"{self.ticker_column}" IN ({", ".join("?" * len(self.tickers))})')
+            params.extend(self.tickers)
+        if self.start is not None:
+            clauses.append(f'"{self.date_column}" >= ?')
+            params.append(pd.Timestamp(self.start, tz="UTC").strftime(DATE_FORMAT))
+        if self.end is not None:
+            clauses.append(f'"{self.date_column}" <= ?')
+            params.append(pd.Timestamp(self.end, tz="UTC").strftime(DATE_FORMAT))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def query(self, sql: str, params=()) -> pd.DataFrame:
+        """Run a read-only SQL query against the database
+
+        Args:
+            sql: str (the query, with ? placeholders)
+            params: sequence (the placeholder values)
+
+        Returns:
+            pd.DataFrame : the result, with the date column parsed to UTC datetimes
+        """
+        conn = connect(self.path, readonly=True)
+        conn.create_aggregate("split_product", 1, _SplitProduct)
+        try:
+            df = pd.read_sql_query(sql, conn, params=list(params))
+        finally:
+            conn.close()
+        if self.date_column in df:
+            df[self.date_column] = from_sql_dates(df[self.date_column])
+        return df
+
+    @timed("data.load_sql")
+    def load_data(self, refresh: bool = False) -> pd.DataFrame:
+        """Load the selected rows of the table, in ticker and date order
+
+        Args:
+            refresh: bool = False (if true, forces reload from disk)
+
+        Returns:
+            pd.DataFrame
+        """
+        if not refresh and self._data is not None:
+            logger.debug("returning cached data path=%s", self.path)
             return self._data
 
-        print(f"Loading data from {self.path}...")
-        self._data = pd.read_csv(self.path)
-        print("Data loaded successfully.")
+        logger.info("loading data path=%s", self.path)
+        columns = ", ".join(f'"{c}"' for c in self.columns) if self.columns is not None else "*"
+        where, params = self._where()
+        self._data = self.query(
+            f'SELECT {columns} FROM "{self.table}"{where} ORDER BY "{self.ticker_column}", "{self.date_column}"',
+            params,
+        )
+        logger.info("loaded data path=%s rows=%d", self.path, len(self._data))
         return self._data
 
+    @timed("data.aggregate_sql")
+    def aggregate(self, period: str) -> pd.DataFrame:
+        """Aggregate the selected rows into one OHLCV bar per ticker and period, inside the engine
+
+        Uses the rules of `src.data.rollup.aggregate_bars`: first open, max high,
+        min low, last close, summed volume and dividends, and the compounded
+        stock split.
+
+        Args:
+            period: str (the pandas period alias, one of SQL_PERIOD_STARTS)
+
+        Returns:
+            pd.DataFrame : one row per (Ticker, period), "Date" being the UTC start of the period
+        """
+        if period not in SQL_PERIOD_STARTS:
+            raise ValueError(f"Unsupported period {period}")
+        conn = connect(self.path, readonly=True)
+        try:
+            available = table_columns(conn, self.table)
+        finally:
+            conn.close()
+        date, ticker = f'"{self.date_column}"', f'"{self.ticker_column}"'
+        start = SQL_PERIOD_STARTS[period].format(date=date)
+        # First open and last close of each period are window values, constant within the group
+        window = f"OVER (PARTITION BY {ticker}, {start} ORDER BY {date} ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)"
+        windowed = {"Open": f'FIRST_VALUE("Open") {window}', "Close": f'LAST_VALUE("Close") {window}'}
+        rules = {
+            "Open": 'MIN("first_Open")', "High": 'MAX("High")', "Low": 'MIN("Low")', "Close": 'MIN("last_Close")',
+            "Volume": 'SUM("Volume")', "Dividends": 'SUM("Dividends")', "Stock Splits": 'split_product("Stock Splits")',
+        }
+        inner = [f'{expr} AS "{"first" if col == "Open" else "last"}_{col}"'
+                 for col, expr in windowed.items() if col in available]
+        outer = [f'{rules[col]} AS "{col}"' for col in available if col in rules]
+        where, params = self._where()
+        sql = (
+            f'SELECT {ticker}, period AS {date}, {", ".join(outer)} FROM ('
+            f'SELECT *, {start} AS period{"".join(", " + expr for expr in inner)} FROM "{self.table}"{where}'
+            f') GROUP BY {ticker}, period ORDER BY {ticker}, period'
+        )
+        df = self.query(sql, params)
+        return df[[c for c in available if c in df.columns]]
+
+
+# Loader class for each supported file extension
+LOADERS = {
+    ".csv": CSVDataLoader,
+    ".parquet": ParquetDataLoader,
+    ".sqlite": SQLDataLoader,
+}
+
+
+def get_loader(path, **options) -> InterfaceDataLoader:
+    """Build the data loader matching the file extension of `path`
 
-def get_data(name: str = "sample", refresh: bool = False):
+    Args:
+        path: str (path to the dataset file)
+        **options: loader specific options (e.g. columns, tickers, start, end)
+
+    Returns:
+        InterfaceDataLoader : the loader for the file
+    """
+    ext = os.path.splitext(str(path))[1].lower()
+    if ext not in LOADERS:
+        raise ValueError(f"Unsupported dataset format {ext}")
+    return LOADERS[ext](path, **options)
+
+
+def get_data(name: str = "sample", refresh: bool = False, **options):
     """Loads a dataset by name from the config
+
+    Datasets are served from the process-wide `dataset_cache`, which reloads
+    the file only when its mtime or size changes. Each caller gets its own
+    copy, so in-place cleaning never corrupts the cached frame.
     
     Args: 
         name: str = "sample" (name of the dataset to load)
         refresh: bool = False (if true, forces reload from disk)
+        **options: loader options, e.g. a `columns` projection and `tickers`,
+            `start` and `end` filters, which every format supports
 
     Returns:
         pd.DataFrame : the loaded dataset
@@ -47,6 +464,23 @@ def get_data(name: str = "sample", refresh: bool = False):
     if name not in DATASETS:
         raise ValueError(f"Dataset {name} not found")
     path = DATASETS[name]
-    loader = CSVDataLoader(path)
-    return loader.load_data(refresh=refresh)
+    key = dataset_cache.make_key(name, **options)
+    if refresh:
+        dataset_cache.invalidate(name)
+    df = dataset_cache.get(key, path, lambda: get_loader(path, **options).load_data())
+    return df.copy()
+
 
+def get_data_version(name: str) -> str:
+    """Return a token that changes whenever the dataset's file changes
+
+    Args:
+        name: str (name of the dataset)
+
+    Returns:
+        str : the version token, built from the file's mtime and size
+    """
+    if name not in DATASETS:
+        raise ValueError(f"Dataset {name} not found")
+    mtime, size = file_signature(DATASETS[name])
+    return f"{mtime}-{size}"
@@ -0,0 +1,186 @@
+"""Incremental cleaning of newly appended rows"""
+import numpy as np
+import pandas as pd
+
+from src.data.processor import (
+    standardise_column_names,
+    convert_types,
+    fill_missing,
+    drop_duplicates,
+    outlier_bounds,
+    outlier_mask,
+)
+
+
+class IncrementalProcessor:
+    """Apply the `process_data` pipeline to appended rows only
+
+    The processor keeps the previously cleaned frame together with the
+    pipeline state: the column schema, hashes of every row seen (for
+    deduplication) and the outlier bounds. `update` cleans just the new rows
+    with that state and appends them. The outlier bounds are refitted on the
+    whole history, exactly like a full `process_data` run, once they become
+    stale:
+
+    - more than `drift_threshold` of the rows were appended since the last fit
+    - the share of new rows rejected as outliers exceeds the share rejected at
+      fit time by more than `drift_threshold`
+    - rows arrive for a group that has no bounds yet
+    """
+
+    def __init__(self, group_by=None, drift_threshold: float = 0.1):
+        """
+        Initialises an IncrementalProcessor object.
+
+        Args:
+            group_by (str, optional): Compute outlier bounds per group of this column, e.g. "ticker".
+            drift_threshold (float, optional): The staleness threshold for the outlier bounds. Defaults to 0.1.
+
+        Returns:
+            None
+        """
+        self.group_by = group_by
+        self.drift_threshold = drift_threshold
+        self.schema = None
+        self.raw = None
+        self.cleaned = None
+        self.lower = None
+        self.upper = None
+        self._seen = set()
+        self._fitted_rows = 0
+        self._appended_rows = 0
+        self._fit_rejection_rate = 0.0
+
+    def _prepare(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Run the row-local steps: column names, types, missing values and in-batch duplicates"""
+        df = standardise_column_names(df)
+        df = convert_types(df)
+        if self.schema is not None:
+            df = df.reindex(columns=self.schema.index)
+            for col, dtype in self.schema.items():
+                if df[col].dtype != dtype:
+                    try:
+                        df[col] = df[col].astype(dtype)
+                    except (TypeError, ValueError):
+                        pass
+        df = fill_missing(df)
+        return drop_duplicates(df)
+
+    @staticmethod
+    def _row_hashes(df: pd.DataFrame) -> pd.Series:
+        return pd.util.hash_pandas_object(df, index=False)
+
+    def fit(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Clean a full history and reset the pipeline state.
+
+        Args:
+            df (pd.DataFrame): The full raw history.
+
+        Returns:
+            pd.DataFrame: The cleaned frame, identical to `process_data(df, group_by)`.
+        """
+        self.schema = None
+        raw = self._prepare(df)
+        self.schema = raw.dtypes
+        self._seen = set(self._row_hashes(raw).to_numpy().tolist())
+        self.raw = raw.reset_index(drop=True)
+        self._refit()
+        return self.cleaned
+
+    def rejected(self) -> pd.DataFrame:
+        """
+        Return the raw rows removed as outliers, indexed by their position in the raw history.
+
+        Together with the cleaned frame they hold the whole raw history, see `restore`.
+
+        Returns:
+            pd.DataFrame: The rejected raw rows.
+        """
+        return self.raw.drop(index=self.cleaned.index)
+
+    def restore(self, cleaned: pd.DataFrame, rejected: pd.DataFrame) -> pd.DataFrame:
+        """
+        Rebuild the pipeline state from a cleaned frame and its rejected rows, e.g. read from a cache.
+
+        The raw history is reassembled in its original order without re-running
+        the row-local steps, and the outlier bounds are computed on it, as a
+        refit would. The cleaned frame itself is kept as given.
+
+        Args:
+            cleaned (pd.DataFrame): The cleaned frame, in raw history order.
+            rejected (pd.DataFrame): The rows returned by `rejected`.
+
+        Returns:
+            pd.DataFrame: The cleaned frame, indexed by raw history position.
+        """
+        n = len(cleaned) + len(rejected)
+        cleaned = cleaned.set_axis(np.setdiff1d(np.arange(n), rejected.index.to_numpy()))
+        raw = pd.concat([cleaned, rejected.astype(cleaned.dtypes)]).sort_index()
+        self.schema = raw.dtypes
+        self._seen = set(self._row_hashes(raw).to_numpy().tolist())
+        self.raw = raw
+        self.cleaned = cleaned
+        self.lower, self.upper = outlier_bounds(raw, by=self.group_by)
+        self._fitted_rows = n
+        self._appended_rows = 0
+        self._fit_rejection_rate = len(rejected) / n if n else 0.0
+        return self.cleaned
+
+    def _refit(self):
+        """Recompute the outlier bounds on the whole history and re-filter it"""
+        self.lower, self.upper = outlier_bounds(self.raw, by=self.group_by)
+        mask = outlier_mask(self.raw, self.lower, self.upper, by=self.group_by)
+        self.cleaned = self.raw[mask]
+        self._fitted_rows = len(self.raw)
+        self._appended_rows = 0
+        self._fit_rejection_rate = 1 - mask.mean() if len(mask) else 0.0
+
+    def update(self, delta: pd.DataFrame) -> pd.DataFrame:
+        """
+        Clean newly appended raw rows and merge them into the cleaned frame.
+
+        Args:
+            delta (pd.DataFrame): The new raw rows.
+
+        Returns:
+            pd.DataFrame: The updated cleaned frame.
+        """
+        if self.raw is None:
+            return self.fit(delta)
+
+        delta = self._prepare(delta)
+        hashes = self._row_hashes(delta).to_numpy()
+        new = ~pd.Series(hashes).isin(self._seen).to_numpy()
+        delta = delta[new]
+        if delta.empty:
+            return self.cleaned
+        self._seen.update(hashes[new].tolist())
+
+        delta.index = pd.RangeIndex(len(self.raw), len(self.raw) + len(delta))
+        self.raw = pd.concat([self.raw, delta])
+        self._appended_rows += len(delta)
+
+        new_groups = self.group_by is not None and not delta[self.group_by].isin(self.lower.index).all()
+        mask = outlier_mask(delta, self.lower, self.upper, by=self.group_by)
+        if new_groups or self.is_stale(1 - mask.mean()):
+            self._refit()
+        else:
+            self.cleaned = pd.concat([self.cleaned, delta[mask]])
+        return self.cleaned
+
+    def is_stale(self, rejection_rate: float = 0.0) -> bool:
+        """
+        Return True if the outlier bounds must be refitted on the whole history.
+
+        Args:
+            rejection_rate (float, optional): The share of the latest rows rejected as outliers.
+
+        Returns:
+            bool: Whether the bounds are stale.
+        """
+        if self._fitted_rows == 0:
+            return True
+        appended = self._appended_rows / self._fitted_rows
+        rejection_drift = rejection_rate - self._fit_rejection_rate
+        return appended > self.drift_threshold or rejection_drift > self.drift_threshold
@@ -0,0 +1,314 @@
+"""Intraday bars in time-partitioned storage, one file per ticker and day or month
+
+Usage:
+    python -m src.data.intraday [--compact-only]
+
+Minute bars are about a hundred times the data of daily bars, so they are
+never combined into a single file. Each ticker's bars are written to one
+file per UTC day, and the days of months that ended more than
+INTRADAY_COMPACT_AFTER_DAYS ago are compacted into one file per month.
+Loads read and clean only the files overlapping the requested window, one
+partition at a time, so a query costs the size of its window rather than
+of the whole history. Outliers are judged against each UTC day's own bars,
+so the cleaned bars don't depend on how the days are stored.
+
+Layout:
+    <root>/<ticker>/<YYYY-MM-DD>.<fmt>    one UTC day
+    <root>/<ticker>/<YYYY-MM>.<fmt>       one compacted UTC month
+"""
+import argparse
+import logging
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from src.config import (
+    DATA_FORMAT, DOWNLOAD_WORKERS, INTRADAY_COMPACT_AFTER_DAYS, INTRADAY_DIR, INTRADAY_INTERVAL, TICKERS
+)
+from src.data.cache import dataset_cache, file_signature
+from src.data.processor import process_data
+from src.instrumentation import timed
+
+logger = logging.getLogger(__name__)
+
+DAY_FORMAT = "%Y-%m-%d"
+MONTH_FORMAT = "%Y-%m"
+
+
+def partition_bounds(name: str) -> tuple:
+    """
+    Return the UTC [start, end) covered by a partition.
+
+    Args:
+        name (str): The partition file stem, a day "YYYY-MM-DD" or a month "YYYY-MM".
+
+    Returns:
+        tuple[pd.Timestamp, pd.Timestamp]: The first instant of the partition and of the next one.
+    """
+    start = pd.Timestamp(name, tz="UTC")
+    return start, start + (pd.DateOffset(months=1) if len(name) == len("YYYY-MM") else pd.Timedelta(days=1))
+
+
+def _utc(value):
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")
+
+
+class PartitionedStore:
+    """Stock bars stored per ticker in day partitions, compacted into month partitions as they age"""
+
+    def __init__(self, root=INTRADAY_DIR, fmt=DATA_FORMAT):
+        """
+        Initialises a PartitionedStore object.
+
+        Args:
+            root (str, optional): The store directory. Defaults to INTRADAY_DIR.
+            fmt (str, optional): The partition file format, "csv" or "parquet". Defaults to DATA_FORMAT.
+
+        Returns:
+            None
+        """
+        self.root = Path(root)
+        self.fmt = fmt
+
+    def tickers(self) -> list:
+        """Return the tickers with at least one partition"""
+        if not self.root.is_dir():
+            return []
+        return sorted(d.name for d in self.root.iterdir() if d.is_dir() and any(d.glob(f"*.{self.fmt}")))
+
+    def partitions(self, ticker: str, start=None, end=None) -> list:
+        """
+        Return the partitions of a ticker overlapping a window, without reading them.
+
+        Args:
+            ticker (str): The ticker symbol.
+            start (str or pd.Timestamp, optional): The first instant of the window. Defaults to unbounded.
+            end (str or pd.Timestamp, optional): The last instant of the window. Defaults to unbounded.
+
+        Returns:
+            list[tuple]: (start, end, path) of each overlapping partition, in time order.
+        """
+        folder = self.root / ticker
+        if not folder.is_dir():
+            return []
+        start, end = _utc(start), _utc(end)
+        parts = []
+        for path in folder.glob(f"*.{self.fmt}"):
+            lo, hi = partition_bounds(path.stem)
+            if (end is None or lo <= end) and (start is None or hi > start):
+                parts.append((lo, hi, path))
+        return sorted(parts, key=lambda part: part[0])
+
+    def version(self, ticker: str, start=None, end=None) -> tuple:
+        """Return a token that changes whenever a partition of the window is written or compacted"""
+        return tuple((path.stem, file_signature(path)) for _, _, path in self.partitions(ticker, start, end))
+
+    def _read(self, path) -> pd.DataFrame:
+        if self.fmt == "parquet":
+            df = pd.read_parquet(path)
+        else:
+            df = pd.read_csv(path)
+        df["Date"] = pd.to_datetime(df["Date"], utc=True)
+        return df
+
+    def _write(self, df: pd.DataFrame, path):
+        """Replace a partition file, written aside and renamed so readers never see a partial file"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        if self.fmt == "parquet":
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def _merge(self, path, bars: pd.DataFrame):
+        """Merge bars into a partition, new bars replacing stored bars with the same timestamp"""
+        if path.exists():
+            bars = pd.concat([self._read(path), bars], ignore_index=True)
+        bars = bars.drop_duplicates("Date", keep="last").sort_values("Date", kind="stable")
+        self._write(bars.reset_index(drop=True), path)
+        dataset_cache.invalidate(str(path))
+
+    @timed("data.intraday_write")
+    def write(self, df: pd.DataFrame, ticker: str = None) -> list:
+        """
+        Merge new bars into the partitions they fall in.
+
+        Bars of a day whose month was already compacted go into the month file.
+
+        Args:
+            df (pd.DataFrame): Bars with a "Date" column (any UTC offset) and, unless `ticker`
+                is given, a "Ticker" column.
+            ticker (str, optional): The ticker of every bar in `df`.
+
+        Returns:
+            list[Path]: The partitions written.
+        """
+        if df.empty:
+            return []
+        df = df.assign(Date=pd.to_datetime(df["Date"], utc=True))
+        groups = [(ticker, df)] if ticker is not None else df.groupby("Ticker", sort=False)
+        written = []
+        for name, bars in groups:
+            bars = bars.drop(columns="Ticker", errors="ignore")
+            folder = self.root / str(name)
+            days = bars["Date"].dt.strftime(DAY_FORMAT)
+            months = days.str[:len("YYYY-MM")]
+            compacted = {m for m in months.unique() if (folder / f"{m}.{self.fmt}").exists()}
+            stems = days.where(~months.isin(compacted), months)
+            for stem, rows in bars.groupby(stems.to_numpy(), sort=True):
+                path = folder / f"{stem}.{self.fmt}"
+                self._merge(path, rows)
+                written.append(path)
+        return written
+
+    def last_date(self, ticker: str):
+        """Return the last stored bar time of a ticker as a UTC timestamp, or None if it has no bars"""
+        parts = self.partitions(ticker)
+        if not parts:
+            return None
+        return self._partition(ticker, parts[-1][2], clean=False)["Date"].max()
+
+    def _partition(self, ticker: str, path, clean: bool) -> pd.DataFrame:
+        """
+        Read one partition, cleaned with `process_data` when `clean`, through the dataset cache.
+
+        Outlier bounds are computed per UTC day, whether the partition holds a day or a
+        compacted month, so compaction never changes the cleaned bars.
+        """
+        def load():
+            df = self._read(path)
+            df["Ticker"] = ticker
+            if not clean:
+                return df
+            df["session"] = df["Date"].dt.floor("D")
+            return process_data(df, group_by="session").drop(columns="session")
+
+        return dataset_cache.get((str(path), clean), path, load)
+
+    def iter_partitions(self, tickers=None, start=None, end=None, clean: bool = False):
+        """
+        Read the partitions overlapping a window one at a time.
+
+        Args:
+            tickers (list[str] or str, optional): The tickers to read. Defaults to every ticker.
+            start (str or pd.Timestamp, optional): The first instant of the window. Defaults to unbounded.
+            end (str or pd.Timestamp, optional): The last instant of the window. Defaults to unbounded.
+            clean (bool, optional): Clean each partition with `process_data`. Defaults to False.
+
+        Yields:
+            tuple[str, pd.DataFrame]: The ticker and the bars of one partition inside the window.
+            Cleaned partitions are shared with the cache and must not be mutated.
+        """
+        tickers = [tickers] if isinstance(tickers, str) else (tickers if tickers is not None else self.tickers())
+        start, end = _utc(start), _utc(end)
+        date_col = "date" if clean else "Date"
+        for ticker in tickers:
+            for lo, hi, path in self.partitions(ticker, start, end):
+                df = self._partition(ticker, path, clean)
+                if (start is not None and start > lo) or (end is not None and end < hi):
+                    dates = df[date_col]
+                    df = df[(dates >= start if start is not None else True) & (dates <= end if end is not None else True)]
+                yield ticker, df
+
+    @timed("data.intraday_load")
+    def load(self, tickers=None, start=None, end=None, clean: bool = False) -> pd.DataFrame:
+        """
+        Load the bars of a window, reading only the partitions that overlap it.
+
+        Args:
+            tickers (list[str] or str, optional): The tickers to load. Defaults to every ticker.
+            start (str or pd.Timestamp, optional): The first instant of the window. Defaults to unbounded.
+            end (str or pd.Timestamp, optional): The last instant of the window. Defaults to unbounded.
+            clean (bool, optional): Clean each partition with `process_data`. Defaults to False.
+
+        Returns:
+            pd.DataFrame: The bars in ticker and time order, with a "Ticker" ("ticker" when cleaned) column.
+        """
+        frames = [df for _, df in self.iter_partitions(tickers, start, end, clean)]
+        if not frames:
+            return pd.DataFrame(columns=["date", "ticker"] if clean else ["Date", "Ticker"])
+        return pd.concat(frames, ignore_index=True)
+
+    @timed("data.intraday_compact")
+    def compact(self, older_than_days: int = INTRADAY_COMPACT_AFTER_DAYS, now=None) -> list:
+        """
+        Merge the day partitions of every month that ended more than `older_than_days` ago into one month file.
+
+        Args:
+            older_than_days (int, optional): The age of a month's end before it is compacted.
+                Defaults to INTRADAY_COMPACT_AFTER_DAYS.
+            now (pd.Timestamp, optional): The current time. Defaults to now.
+
+        Returns:
+            list[Path]: The month partitions written.
+        """
+        cutoff = (_utc(now) if now is not None else pd.Timestamp.now(tz="UTC")) - pd.Timedelta(days=older_than_days)
+        written = []
+        for ticker in self.tickers():
+            months = {}
+            for lo, hi, path in self.partitions(ticker):
+                month_end = partition_bounds(lo.strftime(MONTH_FORMAT))[1]
+                if len(path.stem) == len("YYYY-MM-DD") and month_end <= cutoff:
+                    months.setdefault(lo.strftime(MONTH_FORMAT), []).append(path)
+            for month, days in months.items():
+                target = self.root / ticker / f"{month}.{self.fmt}"
+                self._merge(target, pd.concat([self._read(p) for p in days], ignore_index=True))
+                for path in days:
+                    os.remove(path)
+                    dataset_cache.invalidate(str(path))
+                logger.info("compacted partitions ticker=%s month=%s days=%d", ticker, month, len(days))
+                written.append(target)
+        return written
+
+
+@timed("data.intraday_update")
+def update_intraday(store: PartitionedStore = None, downloader=None) -> list:
+    """
+    Download the bars since each ticker's last stored bar into the store, then compact it.
+
+    Args:
+        store (PartitionedStore, optional): The store. Defaults to a store at INTRADAY_DIR.
+        downloader (StockDownloader, optional): Fetches the bars. Defaults to INTRADAY_INTERVAL bars
+            of TICKERS from Yahoo Finance, over the last 7 days for a new ticker.
+
+    Returns:
+        list[Path]: The partitions written, including compacted months.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from src.data.stock_downloader import StockDownloader
+
+    store = store if store is not None else PartitionedStore()
+    if downloader is None:
+        downloader = StockDownloader(TICKERS, period="7d", interval=INTRADAY_INTERVAL, out_dir=store.root,
+                                     fmt=store.fmt, max_workers=DOWNLOAD_WORKERS)
+
+    def update(ticker):
+        last = store.last_date(ticker)
+        bars = downloader.fetch(ticker, start=last).reset_index()
+        if last is not None and not bars.empty:
+            bars = bars[pd.to_datetime(bars["Date"], utc=True) > last]
+        logger.info("downloaded intraday bars ticker=%s rows=%d", ticker, len(bars))
+        return store.write(bars, ticker=ticker)
+
+    with ThreadPoolExecutor(max_workers=downloader.max_workers) as pool:
+        written = [path for paths in pool.map(update, downloader.tickers) for path in paths]
+    return written + store.compact()
+
+
+if __name__ == "__main__":
+    from src.instrumentation import configure_logging
+
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Download intraday bars into the partitioned store")
+    parser.add_argument("--compact-only", action="store_true", help="only compact old day partitions")
+    args = parser.parse_args()
+    if args.compact_only:
+        PartitionedStore().compact()
+    else:
+        update_intraday()
@@ -0,0 +1,91 @@
+"""Ticker-partitioned, date-sorted view of a cleaned stock DataFrame"""
+import numpy as np
+import pandas as pd
+
+
+class TickerPartitions:
+    """Cleaned stock data sorted by (ticker, date) with a precomputed offsets table
+
+    Rows of each ticker are stored contiguously, so looking up a ticker is a
+    dict lookup plus a positional slice instead of a boolean scan over every
+    row, and date-range queries are a binary search within that slice.
+    """
+
+    def __init__(self, df: pd.DataFrame, ticker_col: str = "ticker", date_col: str = "date",
+                 assume_sorted: bool = False, tickers=None):
+        """
+        Initialises a TickerPartitions object.
+
+        Args:
+            df (pd.DataFrame): The cleaned stock DataFrame.
+            ticker_col (str, optional): The ticker column. Defaults to "ticker".
+            date_col (str, optional): The date column. Defaults to "date".
+            assume_sorted (bool, optional): `df` is already sorted by (ticker, date) with a RangeIndex,
+                e.g. the `frame` of another TickerPartitions, and is used as is without copying.
+            tickers (list[str], optional): The display order of the tickers. Defaults to their order of
+                first appearance in `df`.
+
+        Returns:
+            None
+        """
+        self.ticker_col = ticker_col
+        self.date_col = date_col
+        # Tickers in order of first appearance, matching df[ticker_col].unique()
+        self.tickers = list(tickers) if tickers is not None else list(pd.unique(df[ticker_col]))
+
+        if assume_sorted:
+            self.frame = df
+        else:
+            self.frame = df.sort_values([ticker_col, date_col], kind="stable").reset_index(drop=True)
+        column = self.frame[ticker_col]
+        # Compare the integer codes of a categorical ticker column instead of materialising its labels
+        values = column.cat.codes.to_numpy() if isinstance(column.dtype, pd.CategoricalDtype) else column.to_numpy()
+        bounds = np.flatnonzero(values[1:] != values[:-1]) + 1
+        starts = np.concatenate(([0], bounds))
+        stops = np.concatenate((bounds, [len(values)]))
+        labels = column.iloc[starts].tolist() if len(values) else []
+        self.offsets = {label: (int(s), int(e)) for label, s, e in zip(labels, starts, stops) if e > s}
+
+        dates = self.frame[date_col]
+        self.tz = getattr(dates.dt, "tz", None)
+        self._dates = (dates.dt.tz_convert(None) if self.tz is not None else dates).to_numpy()
+
+    def __contains__(self, ticker):
+        return ticker in self.offsets
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __getitem__(self, ticker) -> pd.DataFrame:
+        """Return the date-sorted rows of a single ticker"""
+        start, stop = self.offsets[ticker]
+        return self.frame.iloc[start:stop]
+
+    def get(self, ticker, default=None):
+        """Return the rows of `ticker`, or `default` if it has no rows"""
+        return self[ticker] if ticker in self.offsets else default
+
+    def _to_datetime64(self, value):
+        ts = pd.Timestamp(value)
+        if self.tz is not None:
+            ts = ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")
+            ts = ts.tz_localize(None)
+        return ts.to_datetime64()
+
+    def range(self, ticker, start=None, end=None) -> pd.DataFrame:
+        """
+        Return the rows of a ticker between two dates (inclusive).
+
+        Args:
+            ticker (str): The ticker symbol.
+            start (str or pd.Timestamp, optional): The first date. Defaults to the start of the series.
+            end (str or pd.Timestamp, optional): The last date. Defaults to the end of the series.
+
+        Returns:
+            pd.DataFrame: The matching rows.
+        """
+        lo, hi = self.offsets[ticker]
+        dates = self._dates[lo:hi]
+        first = np.searchsorted(dates, self._to_datetime64(start), "left") if start is not None else 0
+        last = np.searchsorted(dates, self._to_datetime64(end), "right") if end is not None else len(dates)
+        return self.frame.iloc[lo + first:lo + last]
@@ -1,5 +1,12 @@
+import logging
+
+import numpy as np
 import pandas as pd
 
+from src.instrumentation import timed
+
+logger = logging.getLogger(__name__)
+
 
 def standardise_column_names(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -18,24 +25,27 @@ def standardise_column_names(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def drop_duplicates(df: pd.DataFrame) -> pd.DataFrame:
+def drop_duplicates(df: pd.DataFrame, subset=None) -> pd.DataFrame:
     """
     Drop duplicate rows from a DataFrame
 
     Args:
         df (pd.DataFrame): The DataFrame from which to drop duplicates
+        subset (list[str], optional): Only compare these key columns. Defaults to all columns.
 
     Returns:
         pd.DataFrame : the DataFrame with duplicates dropped
     """
-    return df.drop_duplicates()
+    duplicated = df.duplicated(subset=subset)
+    return df[~duplicated] if duplicated.any() else df
 
 
 def fill_missing(df: pd.DataFrame) -> pd.DataFrame:
     """
     Fill missing values in a DataFrame
 
-    Numeric columns are filled with 0, while object columns are filled with "Unknown"
+    Numeric columns are filled with 0, while object columns are filled with "Unknown".
+    Only columns that contain missing values are touched, in a single in-place fill.
 
     Args:
         df (pd.DataFrame) : The DataFrame in which to fill missing values
@@ -43,12 +53,17 @@ def fill_missing(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame : the DataFrame with missing values filled
     """
-    numeric_cols = df.select_dtypes(include=["number"]).columns
-    df[numeric_cols] = df[numeric_cols].fillna(0)
-    
-    cat_cols = df.select_dtypes(include=["object"]).columns
-    df[cat_cols] = df[cat_cols].fillna("Unknown")
-    
+    missing = df.columns[df.isna().any().to_numpy()]
+    if len(missing) == 0:
+        return df
+
+    values = {}
+    for col in missing:
+        if pd.api.types.is_numeric_dtype(df[col]):
+            values[col] = 0
+        elif df[col].dtype == object:
+            values[col] = "Unknown"
+    df.fillna(value=values, inplace=True)
     return df
 
 
@@ -78,30 +93,153 @@ def convert_types(df: pd.DataFrame) -> pd.DataFrame:
             df[col] = pd.to_numeric(df[col], errors="coerce")
 
     return df
-def remove_outliers(df: pd.DataFrame) -> pd.DataFrame:
+
+
+def outlier_bounds(df: pd.DataFrame, by=None) -> tuple:
+    """
+    Compute the 1.5*IQR outlier bounds of every numeric column
+
+    All quantiles are computed in a single `quantile([0.25, 0.75])` pass,
+    per group when `by` is given.
+
+    Args:
+        df (pd.DataFrame) : the DataFrame to compute bounds for
+        by (str, optional) : column to compute separate bounds for each group of, e.g. "ticker"
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame] : the lower and upper bounds, one column per numeric
+        column and one row per group (a single row when `by` is None)
+    """
+    numeric_cols = df.select_dtypes(include=["number"]).columns
+    if by is None:
+        quantiles = df[numeric_cols].quantile([0.25, 0.75])
+        q1 = quantiles.loc[[0.25]].reset_index(drop=True)
+        q3 = quantiles.loc[[0.75]].reset_index(drop=True)
+    else:
+        quantiles = df[numeric_cols].groupby(df[by], sort=False, observed=True).quantile([0.25, 0.75])
+        q1 = quantiles.xs(0.25, level=-1)
+        q3 = quantiles.xs(0.75, level=-1)
+    iqr = q3 - q1
+    return q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+
+def outlier_mask(df: pd.DataFrame, lower: pd.DataFrame, upper: pd.DataFrame, by=None) -> np.ndarray:
+    """
+    Return a boolean mask of the rows whose numeric values all fall within the bounds
+
+    Args:
+        df (pd.DataFrame) : the DataFrame to check
+        lower (pd.DataFrame) : lower bounds, see `outlier_bounds`
+        upper (pd.DataFrame) : upper bounds, see `outlier_bounds`
+        by (str, optional) : the group column the bounds were computed for
+
+    Returns:
+        np.ndarray : True for the rows to keep
+    """
+    cols = lower.columns
+    values = df[cols].to_numpy(dtype="float64")
+    if by is None:
+        lo = lower.to_numpy(dtype="float64")
+        hi = upper.to_numpy(dtype="float64")
+    else:
+        # Rows of groups without bounds get NaN bounds and are dropped
+        lo = lower.reindex(df[by]).to_numpy(dtype="float64")
+        hi = upper.reindex(df[by]).to_numpy(dtype="float64")
+    return ((values >= lo) & (values <= hi)).all(axis=1)
+
+
+@timed("data.remove_outliers")
+def remove_outliers(df: pd.DataFrame, by=None) -> pd.DataFrame:
     """
     Remove outliers from a DataFrame
 
-    For each numeric column, find the interquartile range (IQR) and remove values outside 1.5*IQR from the column
+    For each numeric column, find the interquartile range (IQR) and remove rows with values outside 1.5*IQR.
+    The bounds of every column are computed on the same input rows and combined into a single mask, so the
+    frame is filtered once.
 
     Args:
          df (pd.DataFrame) : the DataFrame from which to remove outliers
+         by (str, optional) : compute separate bounds for each group of this column, e.g. "ticker"
 
     Returns:
         pd.DataFrame : the DataFrame with outliers removed
     """
-    numeric_cols = df.select_dtypes(include=["number"]).columns
-    for col in numeric_cols:
-        Q1 = df[col].quantile(0.25)
-        Q3 = df[col].quantile(0.75)
-        IQR = Q3 - Q1
-        lower = Q1 - 1.5 * IQR
-        upper = Q3 + 1.5 * IQR
-        df = df[(df[col] >= lower) & (df[col] <= upper)]
-    return df
+    lower, upper = outlier_bounds(df, by=by)
+    if lower.shape[1] == 0:
+        return df
+    return df[outlier_mask(df, lower, upper, by=by)]
+
+
+@timed("data.compact")
+def compact_frame(df: pd.DataFrame, categorical=("ticker",), prices=("open", "high", "low", "close"),
+                  integers=("volume",), events=("dividends", "stock_splits"),
+                  price_tolerance=0.005, sparse_density=0.1) -> pd.DataFrame:
+    """
+    Shrink a cleaned stock DataFrame to a compact in-memory representation
 
+    - `categorical` columns become categoricals, storing each label once.
+    - `prices` are downcast to float32 when no value moves by more than `price_tolerance`
+      (half a cent by default), which keeps float64 for prices too large for float32 to hold to the cent.
+    - `integers` holding whole numbers are stored in the smallest integer type that fits.
+    - `events` in which fewer than `sparse_density` of the values are non-zero are stored sparsely.
 
-def process_data(df: pd.DataFrame) -> pd.DataFrame:
+    Columns that are missing or already compact are left alone.
+
+    Args:
+        df (pd.DataFrame) : the cleaned DataFrame, see `process_data`
+        categorical (tuple[str]) : columns to store as categoricals
+        prices (tuple[str]) : price columns to downcast to float32
+        integers (tuple[str]) : columns to store as integers
+        events (tuple[str]) : mostly-zero columns to store sparsely
+        price_tolerance (float) : the largest absolute change allowed by the float32 downcast
+        sparse_density (float) : the largest fraction of non-zero values stored sparsely
+
+    Returns:
+        pd.DataFrame : a compacted copy of the DataFrame
+    """
+    before = df.memory_usage(deep=True).sum()
+    columns = {}
+    for col in categorical:
+        if col in df and df[col].dtype == object:
+            columns[col] = df[col].astype("category")
+    for col in prices:
+        if col in df and df[col].dtype == np.float64:
+            values = df[col].to_numpy()
+            downcast = values.astype(np.float32)
+            if np.nanmax(np.abs(downcast - values), initial=0.0) <= price_tolerance:
+                columns[col] = pd.Series(downcast, index=df.index)
+    for col in integers:
+        if col in df and pd.api.types.is_float_dtype(df[col]):
+            values = df[col].to_numpy()
+            if np.isfinite(values).all() and (values == np.round(values)).all():
+                columns[col] = pd.to_numeric(df[col].astype(np.int64), downcast="integer")
+    for col in events:
+        if col in df and pd.api.types.is_numeric_dtype(df[col]) and not isinstance(df[col].dtype, pd.SparseDtype):
+            if (df[col] != 0).mean() < sparse_density:
+                columns[col] = df[col].astype(pd.SparseDtype(df[col].dtype, 0))
+
+    compact = df.assign(**columns)
+    after = compact.memory_usage(deep=True).sum()
+    logger.info("compacted frame before_mb=%.1f after_mb=%.1f", before / 2**20, after / 2**20)
+    return compact
+
+
+def densify(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert the sparse columns of a DataFrame back to dense ones, for writers that don't support sparse data
+
+    Args:
+        df (pd.DataFrame) : the DataFrame, e.g. compacted by `compact_frame`
+
+    Returns:
+        pd.DataFrame : the DataFrame itself when it has no sparse columns, otherwise a copy
+    """
+    sparse = {col: df[col].sparse.to_dense() for col in df if isinstance(df[col].dtype, pd.SparseDtype)}
+    return df.assign(**sparse) if sparse else df
+
+
+@timed("data.process")
+def process_data(df: pd.DataFrame, group_by=None) -> pd.DataFrame:
     """
     Process a DataFrame with a standard cleaning pipeline.
 
@@ -112,8 +250,11 @@ def process_data(df: pd.DataFrame) -> pd.DataFrame:
         4. Drop duplicates
         5. Remove outliers
 
+    Steps 1-3 modify the frame in place, and steps 4-5 only copy it when they drop rows.
+
     Args:
         df (pd.DataFrame): The DataFrame to process.
+        group_by (str, optional): Compute outlier bounds per group of this column, e.g. "ticker".
 
     Returns:
         pd.DataFrame: The processed DataFrame.
@@ -122,5 +263,5 @@ def process_data(df: pd.DataFrame) -> pd.DataFrame:
     df = convert_types(df)
     df = fill_missing(df)
     df = drop_duplicates(df)
-    df = remove_outliers(df)
+    df = remove_outliers(df, by=group_by)
     return df
@@ -0,0 +1,169 @@
+"""Weekly, monthly and quarterly OHLCV rollups of the combined stock data"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.config import DATASETS, ROLLUP_TIERS, CHART_WIDTH_PX
+from src.data.data_loader import SQLDataLoader
+from src.data.sql_store import write_frame
+
+
+def aggregate_bars(df: pd.DataFrame, period: str) -> pd.DataFrame:
+    """
+    Aggregate OHLCV bars into one bar per ticker and period.
+
+    The rules are first open, max high, min low, last close, summed volume and
+    dividends, and the compounded stock split. Because the rules are
+    associative, `df` may also contain previously aggregated bars, as long as
+    rows are in chronological order within each ticker.
+
+    Args:
+        df (pd.DataFrame): Raw combined stock data with Date, Open, High, Low, Close, Volume and Ticker columns.
+        period (str): The pandas period alias, e.g. "W", "M" or "Q".
+
+    Returns:
+        pd.DataFrame: One row per (Ticker, period) with the same columns as the input,
+        "Date" being the UTC start of the period.
+    """
+    dates = pd.to_datetime(df["Date"], utc=True)
+    keys = [df["Ticker"], dates.dt.tz_convert(None).dt.to_period(period).rename("Period")]
+    rules = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum", "Dividends": "sum"}
+    rules = {col: rule for col, rule in rules.items() if col in df.columns}
+    grouped = df.groupby(keys, sort=True)
+    rolled = grouped.agg(rules)
+    if "Stock Splits" in df.columns:
+        # Compound the split ratios, 0 meaning "no split" as in the Yahoo data
+        log_ratio = np.log(df["Stock Splits"].replace(0, 1).astype("float64"))
+        ratio = np.exp(log_ratio.groupby(keys, sort=True).sum())
+        rolled["Stock Splits"] = ratio.where(~np.isclose(ratio, 1.0), 0.0)
+    rolled = rolled.reset_index()
+    rolled.insert(0, "Date", rolled.pop("Period").dt.start_time.dt.tz_localize("UTC"))
+    return rolled[[c for c in df.columns if c in rolled.columns]]
+
+
+def build_rollups(df: pd.DataFrame) -> dict:
+    """
+    Materialise every rollup tier from the raw combined stock data.
+
+    Args:
+        df (pd.DataFrame): Raw combined stock data.
+
+    Returns:
+        dict: Tier name -> rolled up DataFrame.
+    """
+    df = _sorted(df)
+    return {tier: aggregate_bars(df, period) for tier, (period, _) in ROLLUP_TIERS.items()}
+
+
+def update_rollup(rollup: pd.DataFrame, df: pd.DataFrame, period: str, appended: bool = False) -> pd.DataFrame:
+    """
+    Bring a rollup tier up to date with new bars.
+
+    Only the last (possibly partial) period of each ticker and the periods
+    after it are re-aggregated, from the raw bars since that period started.
+    With `appended`, `df` holds just the bars added since the tier was built,
+    and they are merged into the last period's rolled up bar instead.
+
+    Args:
+        rollup (pd.DataFrame): The existing rollup tier.
+        df (pd.DataFrame): Raw combined stock data containing at least the bars since each ticker's last period,
+            or only the appended bars.
+        period (str): The pandas period alias of the tier.
+        appended (bool, optional): `df` holds only the bars appended since the tier was built. Defaults to False.
+
+    Returns:
+        pd.DataFrame: The updated rollup tier.
+    """
+    rollup = rollup.assign(Date=pd.to_datetime(rollup["Date"], utc=True))
+    last_start = rollup["Date"].groupby(rollup["Ticker"]).max()
+    last_period = rollup["Date"] >= rollup["Ticker"].map(last_start)
+
+    df = df.assign(Date=pd.to_datetime(df["Date"], utc=True))
+    if appended:
+        # The rules are associative, so the last rolled up bar aggregates like the raw bars after it
+        new_bars = pd.concat([rollup[last_period & rollup["Ticker"].isin(df["Ticker"])], df], ignore_index=True)
+    else:
+        since = df["Ticker"].map(last_start)
+        new_bars = df[since.isna() | (df["Date"] >= since)]
+    if new_bars.empty:
+        return rollup
+    kept = rollup[~last_period | ~rollup["Ticker"].isin(new_bars["Ticker"])]
+    updated = pd.concat([kept, aggregate_bars(_sorted(new_bars), period)], ignore_index=True)
+    return updated.sort_values(["Ticker", "Date"], kind="stable").reset_index(drop=True)
+
+
+def _sorted(df: pd.DataFrame) -> pd.DataFrame:
+    """Sort raw bars chronologically within each ticker"""
+    order = np.lexsort((pd.to_datetime(df["Date"], utc=True).to_numpy(), df["Ticker"].to_numpy()))
+    return df.iloc[order]
+
+
+def _read(path) -> pd.DataFrame:
+    if str(path).endswith(".sqlite"):
+        return SQLDataLoader(path).load_data()
+    return pd.read_parquet(path) if str(path).endswith(".parquet") else pd.read_csv(path)
+
+
+def _write(df: pd.DataFrame, path):
+    if str(path).endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    elif str(path).endswith(".sqlite"):
+        write_frame(df, path)
+    else:
+        df.to_csv(path, index=False)
+
+
+def update_rollup_files(combined_path, appended=None) -> dict:
+    """
+    Update the rollup tier files registered in DATASETS from the combined file.
+
+    Tiers that don't exist yet are built from scratch. When the combine only
+    appended rows, existing tiers merge just those rows with `update_rollup`;
+    after a full rebuild they are rebuilt from the whole combined file. A
+    SQLite combined file is aggregated inside the engine instead, so only the
+    rolled up bars are loaded into memory.
+
+    Args:
+        combined_path (str): The path to the combined stock file.
+        appended (pd.DataFrame, optional): The raw rows an incremental combine appended (`StockCombiner.appended`),
+            or None after a full rebuild. Defaults to None.
+
+    Returns:
+        dict: Tier name -> path of the updated file.
+    """
+    df = None
+    paths = {}
+    for tier, (period, _) in ROLLUP_TIERS.items():
+        path = DATASETS[f"COMBINED_{tier.upper()}"]
+        if appended is not None and os.path.exists(path):
+            rollup = update_rollup(_read(path), appended, period, appended=True)
+        elif str(combined_path).endswith(".sqlite"):
+            rollup = SQLDataLoader(combined_path).aggregate(period)
+        else:
+            if df is None:
+                df = _sorted(_read(combined_path))
+            rollup = aggregate_bars(df, period)
+        _write(rollup, path)
+        paths[tier] = path
+    return paths
+
+
+def pick_tier(start, end, pixels: int = CHART_WIDTH_PX) -> str:
+    """
+    Pick the coarsest dataset whose bars still fill `pixels` across a date range.
+
+    Args:
+        start (str or pd.Timestamp): The first visible date.
+        end (str or pd.Timestamp): The last visible date.
+        pixels (int, optional): The plot width in pixels. Defaults to CHART_WIDTH_PX.
+
+    Returns:
+        str: The dataset name, e.g. "COMBINED_MONTHLY", or "COMBINED" for the raw bars.
+    """
+    days = (pd.Timestamp(end) - pd.Timestamp(start)).total_seconds() / 86400
+    for tier, (_, bar_days) in sorted(ROLLUP_TIERS.items(), key=lambda item: -item[1][1]):
+        name = f"COMBINED_{tier.upper()}"
+        if days / bar_days >= pixels and os.path.exists(DATASETS[name]):
+            return name
+    return "COMBINED"
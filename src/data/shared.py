@@ -0,0 +1,139 @@
+"""Read-only dataset shared between processes through a memory-mapped Arrow file"""
+import glob
+import json
+import os
+
+from src.config import SHARED_DATA_DIR
+from src.data.partition import TickerPartitions
+from src.data.processor import densify
+
+
+class SharedDataset:
+    """Publish cleaned, ticker-partitioned data once and attach to it zero-copy from any process
+
+    The partitioned frame is written as an uncompressed Arrow IPC file, which
+    readers memory-map, so every process shares the same physical pages
+    instead of holding its own copy. A small `CURRENT` pointer file names the
+    published version. Publishing writes the new data file first and then
+    swaps the pointer with an atomic rename, so readers see either the old or
+    the new version, never a half-written one.
+    """
+
+    def __init__(self, root=SHARED_DATA_DIR):
+        """
+        Initialises a SharedDataset object.
+
+        Args:
+            root (str, optional): The directory holding the published files. Defaults to SHARED_DATA_DIR.
+
+        Returns:
+            None
+        """
+        self.root = root
+        self.pointer = os.path.join(root, "CURRENT")
+        self._pointer_mtime = None
+        self._current = None
+
+    def publish(self, partitions: TickerPartitions, version: str) -> str:
+        """
+        Publish a new version of the partitioned data.
+
+        Args:
+            partitions (TickerPartitions): The cleaned, partitioned data.
+            version (str): The data version.
+
+        Returns:
+            str: The path of the published data file.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.ipc as ipc
+
+        os.makedirs(self.root, exist_ok=True)
+        # Arrow has no sparse arrays, and mapped dense columns are shared by every reader anyway
+        table = pa.Table.from_pandas(densify(partitions.frame), preserve_index=False)
+        ticker_idx = table.schema.get_field_index(partitions.ticker_col)
+        if not pa.types.is_dictionary(table.schema.field(ticker_idx).type):
+            table = table.set_column(ticker_idx, partitions.ticker_col, pc.dictionary_encode(table[ticker_idx]))
+        table = table.combine_chunks().replace_schema_metadata({
+            "version": version,
+            "tickers": json.dumps(partitions.tickers),
+            "ticker_col": partitions.ticker_col,
+            "date_col": partitions.date_col,
+        })
+
+        path = os.path.join(self.root, f"clean-{version}.arrow")
+        tmp_path = path + ".tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+        tmp_pointer = self.pointer + ".tmp"
+        with open(tmp_pointer, "w") as f:
+            json.dump({"version": version, "file": os.path.basename(path)}, f)
+        os.replace(tmp_pointer, self.pointer)
+
+        # Processes still mapping an old file keep their pages until they re-attach
+        for old in glob.glob(os.path.join(self.root, "clean-*.arrow")):
+            if old != path:
+                os.remove(old)
+        return path
+
+    def published_version(self):
+        """Return the currently published version, or None if nothing is published"""
+        if not os.path.exists(self.pointer):
+            return None
+        with open(self.pointer) as f:
+            return json.load(f)["version"]
+
+    def attach(self):
+        """
+        Memory-map the currently published data.
+
+        Returns:
+            tuple[str, TickerPartitions] or None: The version and read-only partitions, or None if
+            nothing is published.
+        """
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        for attempt in range(3):
+            if not os.path.exists(self.pointer):
+                return None
+            self._pointer_mtime = os.stat(self.pointer).st_mtime_ns
+            with open(self.pointer) as f:
+                path = os.path.join(self.root, json.load(f)["file"])
+            try:
+                source = pa.memory_map(path, "r")
+                break
+            except FileNotFoundError:
+                if attempt == 2:
+                    raise # a concurrent publish replaced the file; read the new pointer
+        table = ipc.open_file(source).read_all()
+        meta = {k.decode(): v.decode() for k, v in table.schema.metadata.items()}
+        # split_blocks keeps each column backed by the mapped buffer instead of consolidating copies
+        frame = table.to_pandas(split_blocks=True)
+        partitions = TickerPartitions(
+            frame, ticker_col=meta["ticker_col"], date_col=meta["date_col"],
+            assume_sorted=True, tickers=json.loads(meta["tickers"]),
+        )
+        self._current = (meta["version"], partitions)
+        return self._current
+
+    def refresh(self):
+        """
+        Re-attach if a new version was published since the last attach.
+
+        The check is a single stat of the pointer file, cheap enough to run on every request.
+
+        Returns:
+            tuple[str, TickerPartitions] or None: The current version and partitions.
+        """
+        try:
+            mtime = os.stat(self.pointer).st_mtime_ns
+        except FileNotFoundError:
+            return self._current
+        if mtime != self._pointer_mtime:
+            return self.attach()
+        return self._current
@@ -0,0 +1,121 @@
+"""Embedded SQLite storage of stock bars, indexed by ticker and date
+
+Dates are stored as naive UTC text (DATE_FORMAT), so their text order is
+their time order and range predicates can use the (Ticker, Date) index.
+"""
+import os
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from src.config import SQL_TABLE
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def connect(path, bulk: bool = False, readonly: bool = False) -> sqlite3.Connection:
+    """
+    Open a SQLite database.
+
+    Args:
+        path (str): The database file.
+        bulk (bool, optional): Disable the journal and fsyncs, for a fresh file that is
+            renamed into place once written. Defaults to False.
+        readonly (bool, optional): Open an existing file read-only. Defaults to False.
+
+    Returns:
+        sqlite3.Connection: The connection.
+    """
+    if readonly:
+        return sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+    conn = sqlite3.connect(str(path))
+    if bulk:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+    return conn
+
+
+def to_sql_dates(values) -> pd.Series:
+    """Format dates (strings with any UTC offset, or datetimes) as naive UTC text"""
+    return pd.to_datetime(values, utc=True).dt.strftime(DATE_FORMAT)
+
+
+def from_sql_dates(values) -> pd.Series:
+    """Parse dates stored by `to_sql_dates` back to UTC datetimes"""
+    return pd.to_datetime(values, utc=True, format="mixed")
+
+
+def _sql_type(dtype) -> str:
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def table_columns(conn: sqlite3.Connection, table: str = SQL_TABLE) -> list:
+    """Return the column names of a table, in order"""
+    return [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+
+
+def create_table(conn: sqlite3.Connection, df: pd.DataFrame, table: str = SQL_TABLE):
+    """Create a table with the columns of `df`, typed from its dtypes, if it doesn't exist"""
+    columns = ", ".join(f'"{col}" {_sql_type(dtype)}' for col, dtype in df.dtypes.items())
+    conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({columns})')
+
+
+def insert_frame(conn: sqlite3.Connection, df: pd.DataFrame, table: str = SQL_TABLE, date_column="Date") -> int:
+    """
+    Bulk insert the rows of a frame with one prepared statement.
+
+    Args:
+        conn (sqlite3.Connection): The database.
+        df (pd.DataFrame): The rows, with the table's columns.
+        table (str, optional): The table. Defaults to SQL_TABLE.
+        date_column (str, optional): The column stored as naive UTC text. Defaults to "Date".
+
+    Returns:
+        int: The number of inserted rows.
+    """
+    # Plain Python lists bind fastest; SQLite stores NaN as NULL
+    columns = [
+        (to_sql_dates(df[col]) if col == date_column else df[col]).tolist() for col in df.columns
+    ]
+    names = ", ".join(f'"{col}"' for col in df.columns)
+    marks = ", ".join("?" * len(df.columns))
+    conn.executemany(f'INSERT INTO "{table}" ({names}) VALUES ({marks})', zip(*columns))
+    return len(df)
+
+
+def create_indexes(conn: sqlite3.Connection, table: str = SQL_TABLE, ticker_column="Ticker", date_column="Date"):
+    """Index a table for ticker + date range lookups and for date range scans across tickers"""
+    conn.execute(f'CREATE INDEX IF NOT EXISTS "{table}_ticker_date" ON "{table}" ("{ticker_column}", "{date_column}")')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS "{table}_date" ON "{table}" ("{date_column}")')
+
+
+def write_frame(df: pd.DataFrame, path, table: str = SQL_TABLE):
+    """
+    Write a frame to a fresh, indexed database file, replacing `path` atomically.
+
+    Args:
+        df (pd.DataFrame): The stock bars.
+        path (str): The database file.
+        table (str, optional): The table. Defaults to SQL_TABLE.
+
+    Returns:
+        str: The path.
+    """
+    tmp_path = str(path) + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = connect(tmp_path, bulk=True)
+    try:
+        create_table(conn, df, table)
+        insert_frame(conn, df, table)
+        create_indexes(conn, table)
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return path
@@ -1,16 +1,29 @@
+import hashlib
+import json
+import logging
+import os
 from pathlib import Path
 import pandas as pd
+
+from src.data import sql_store
+from src.instrumentation import timed
+
+logger = logging.getLogger(__name__)
+
+
 class StockCombiner:
 
     """Combine multiple stock csv files into one dataframe."""
 
-    def __init__(self, files, out_dir="data/"):
+    def __init__(self, files, out_dir="data/", fmt="csv", chunksize=100_000):
         """
         Initialises a StockCombiner object.
 
         Args:
-            files (list[str]): A list of paths to the CSV files to combine.
-            out_dir (str, optional): The directory where the combined CSV file will be saved. Defaults to "data/".
+            files (list[str]): A list of paths to the CSV or Parquet files to combine.
+            out_dir (str, optional): The directory where the combined file will be saved. Defaults to "data/".
+            fmt (str, optional): The output format, "csv", "parquet" or "sqlite". Defaults to "csv".
+            chunksize (int, optional): The number of rows read from a source file at a time. Defaults to 100_000.
 
         Returns:
             None
@@ -18,37 +31,256 @@ class StockCombiner:
         self.files = files
         self.out_dir = Path(out_dir)
         self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.fmt = fmt
+        self.chunksize = chunksize
+        self.combined_path = self.out_dir / f"combined_stock.{fmt}"
+        self.manifest_path = self.out_dir / "combined_manifest.json"
+        self.appended = None
 
-    def combine(self):
+    @timed("data.combine")
+    def combine(self, incremental=False):
         """
-        Combine multiple stock csv files into one dataframe.
+        Combine multiple stock files into one file.
+
+        Each file is streamed in chunks of `chunksize` rows, a "Ticker" column
+        with the ticker symbol from the filename is added, and the chunk is
+        appended to the combined file, so only one chunk is in memory at a time.
+        SQLite output bulk-inserts each chunk, and indexes the table by ticker
+        and date once all rows are in.
+
+        In incremental mode, a manifest of source file hashes and last dates is
+        used to append only the new rows of files that grew since the last run.
+        Files that were rewritten rather than appended to, removed sources and
+        Parquet output fall back to a full streaming rebuild.
 
-        For each CSV file, parse the "Date" column, add a "Ticker" column with the ticker symbol from the filename, and then concatenate all the dataframes together.
+        After an incremental merge, `appended` holds the raw rows that were
+        appended, so consumers can process just those; after a full rebuild it
+        is None.
 
         Args:
-            None
+            incremental (bool, optional): Only merge new rows from changed files. Defaults to False.
+
+        Returns:
+            str: The path to the combined file.
+        """
+        self.appended = None
+        manifest = self.load_manifest()
+        if incremental and self.fmt in ("csv", "sqlite") and manifest and self.combined_path.exists():
+            updated = self._combine_incremental(manifest)
+            if updated is not None:
+                self.save_manifest(updated)
+                return self.combined_path
+        self.save_manifest(self._combine_full())
+        return self.combined_path
+
+    def _combine_full(self):
+        """Stream every source file into a fresh combined file and return the new manifest."""
+        files = {}
+
+        def chunks():
+            for file in self.files:
+                last_date, rows = None, 0
+                for chunk in self._iter_chunks(file):
+                    yield chunk
+                    last_date = self._max_date(chunk, last_date)
+                    rows += len(chunk)
+                files[str(file)] = self._manifest_entry(file, last_date, rows)
+
+        self._write_file(chunks())
+        return files
+
+    def _write_file(self, chunks):
+        """Write frames to a fresh combined file in the output format, replacing it once complete.
+
+        Every frame is aligned on the columns of the first one. Parquet output is
+        written as one row group per frame, and SQLite output is indexed by ticker
+        and date once all rows are in.
+
+        Args:
+            chunks (iterable[pd.DataFrame]): The frames to write, in order.
 
         Returns:
-            str: The path to the combined CSV file.
+            None
         """
-        frames = []
+        tmp_path = self.combined_path.with_name(self.combined_path.name + ".tmp")
+        if tmp_path.exists():
+            tmp_path.unlink() # left over by an interrupted run
+        writer = None
+        conn = sql_store.connect(tmp_path, bulk=True) if self.fmt == "sqlite" else None
+        header = True
+        columns = None
+        try:
+            for chunk in chunks:
+                if columns is None:
+                    columns = list(chunk.columns)
+                    if conn is not None:
+                        sql_store.create_table(conn, chunk)
+                chunk = chunk[columns]
+                if self.fmt == "parquet":
+                    writer = self._write_parquet(chunk, tmp_path, writer)
+                elif conn is not None:
+                    sql_store.insert_frame(conn, chunk)
+                else:
+                    chunk.to_csv(tmp_path, mode="w" if header else "a", header=header, index=False)
+                    header = False
+            if conn is not None:
+                sql_store.create_indexes(conn)
+                conn.commit()
+        finally:
+            if writer is not None:
+                writer.close()
+            if conn is not None:
+                conn.close()
+        os.replace(tmp_path, self.combined_path)
+
+    def _combine_incremental(self, manifest):
+        """Append the new rows of grown source files, or return None if a full rebuild is needed."""
+        if set(manifest) - {str(f) for f in self.files}:
+            return None # a source was removed
+
+        conn = sql_store.connect(self.combined_path) if self.fmt == "sqlite" else None
+        try:
+            updated = self._append_new_rows(manifest, conn)
+            if conn is not None and updated is not None:
+                conn.commit()
+        finally:
+            if conn is not None:
+                conn.close()
+        return updated
+
+    def _append_new_rows(self, manifest, conn=None):
+        """Append the new rows of each source to the CSV file, or into the database through `conn`."""
+        if conn is not None:
+            columns = sql_store.table_columns(conn)
+        else:
+            columns = list(pd.read_csv(self.combined_path, nrows=0).columns)
+        updated = {}
+        appended = []
         for file in self.files:
-            df = pd.read_csv(file, parse_dates=["Date"])
-            ticker = Path(file).stem.replace("_stock", "") # Get the ticker from the filename
-            df["Ticker"] = ticker
-            frames.append(df)
-        combined = pd.concat(frames, ignore_index=True)
-        return self.save(combined)
+            entry = manifest.get(str(file))
+            size = os.path.getsize(file)
+            if entry is not None and size == entry["size"] and self._hash(file) == entry["hash"]:
+                updated[str(file)] = entry
+                continue
+            if entry is not None and (size < entry["size"] or self._hash(file, entry["size"]) != entry["hash"]):
+                return None # the file was rewritten, not appended to
+
+            last_date = pd.Timestamp(entry["last_date"]) if entry is not None else None
+            rows = entry["rows"] if entry is not None else 0
+            new_last = last_date
+            for chunk in self._iter_chunks(file):
+                if last_date is not None:
+                    chunk = chunk[pd.to_datetime(chunk["Date"], utc=True) > last_date]
+                if chunk.empty:
+                    continue
+                chunk = chunk.reindex(columns=columns)
+                if conn is not None:
+                    sql_store.insert_frame(conn, chunk)
+                else:
+                    chunk.to_csv(self.combined_path, mode="a", header=False, index=False)
+                appended.append(chunk)
+                new_last = self._max_date(chunk, new_last)
+                rows += len(chunk)
+            logger.info("merged new rows rows=%d file=%s", rows - (entry['rows'] if entry else 0), file)
+            updated[str(file)] = self._manifest_entry(file, new_last, rows)
+        self.appended = pd.concat(appended, ignore_index=True) if appended else pd.DataFrame(columns=columns)
+        return updated
+
+    def _iter_chunks(self, file):
+        """Yield a source file in chunks of `chunksize` rows with a "Ticker" column added."""
+        ticker = Path(file).stem.replace("_stock", "") # Get the ticker from the filename
+        if Path(file).suffix == ".parquet":
+            import pyarrow.parquet as pq
+
+            batches = (b.to_pandas() for b in pq.ParquetFile(file).iter_batches(batch_size=self.chunksize))
+        else:
+            batches = pd.read_csv(file, chunksize=self.chunksize)
+        for chunk in batches:
+            chunk["Ticker"] = ticker
+            yield chunk
+
+    @staticmethod
+    def _write_parquet(chunk, path, writer):
+        """Write a chunk as a Parquet row group, opening the writer on the first chunk."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        chunk = chunk.copy()
+        chunk["Date"] = pd.to_datetime(chunk["Date"], utc=True)
+        if writer is None:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            writer = pq.ParquetWriter(path, table.schema)
+        else:
+            table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+        writer.write_table(table)
+        return writer
+
+    @staticmethod
+    def _max_date(chunk, current):
+        """Return the later of `current` and the chunk's last "Date" as a UTC timestamp."""
+        if chunk.empty:
+            return current
+        latest = pd.to_datetime(chunk["Date"], utc=True).max()
+        return latest if current is None else max(current, latest)
+
+    @staticmethod
+    def _hash(file, size=None):
+        """Return the sha256 of a file, or of its first `size` bytes."""
+        digest = hashlib.sha256()
+        remaining = size if size is not None else float("inf")
+        with open(file, "rb") as f:
+            while remaining > 0:
+                block = f.read(int(min(1 << 20, remaining)))
+                if not block:
+                    break
+                digest.update(block)
+                remaining -= len(block)
+        return digest.hexdigest()
+
+    def _manifest_entry(self, file, last_date, rows):
+        return {
+            "hash": self._hash(file),
+            "size": os.path.getsize(file),
+            "last_date": last_date.isoformat() if last_date is not None else None,
+            "rows": rows,
+        }
+
+    def load_manifest(self):
+        """Load the manifest of the last combine, if it was written in the current format.
+
+        Returns:
+            dict: Source file path -> {"hash", "size", "last_date", "rows"}.
+        """
+        if not self.manifest_path.exists():
+            return {}
+        with open(self.manifest_path) as f:
+            manifest = json.load(f)
+        return manifest["files"] if manifest.get("format") == self.fmt else {}
+
+    def save_manifest(self, files):
+        """Save the manifest of the combined source files.
+
+        Args:
+            files (dict): Source file path -> manifest entry.
+
+        Returns:
+            None
+        """
+        with open(self.manifest_path, "w") as f:
+            json.dump({"format": self.fmt, "files": files}, f, indent=2)
 
     def save(self, combined):
-        """Save the combined dataframe to a CSV file.
-        
+        """Save the combined dataframe to a CSV, Parquet or SQLite file.
+
+        Written by the same writers as `combine`: Parquet output stores "Date" as a
+        UTC timestamp so readers don't need to re-parse it, and SQLite output is
+        indexed by ticker and date.
+
         Args:
             combined (pd.DataFrame): The combined dataframe to save.
-        
+
         Returns:
-            str: The path to the saved CSV file.
+            str: The path to the saved file.
         """
-        combined_path = self.out_dir / "combined_stock.csv"
-        combined.to_csv(combined_path, index=False)
-        return combined_path
\ No newline at end of file
+        self._write_file([combined])
+        return self.combined_path
@@ -1,11 +1,43 @@
-import yfinance as yf
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 from pathlib import Path
 
+from src.instrumentation import timed
+
+logger = logging.getLogger(__name__)
+
+
+class YahooPriceSource:
+    """Price source backed by the Yahoo Finance API."""
+
+    def history(self, ticker, period=None, start=None, interval="1d"):
+        """
+        Fetch the price history for a ticker.
+
+        Args:
+            ticker (str): The ticker symbol.
+            period (str, optional): The time period to fetch, used when `start` is None.
+            start (pd.Timestamp, optional): Fetch bars from this date onwards.
+            interval (str, optional): The bar interval. Defaults to "1d".
+
+        Returns:
+            pd.DataFrame: OHLCV bars indexed by a timezone-aware DatetimeIndex.
+        """
+        import yfinance as yf # deferred, only needed when downloading
+
+        if start is not None:
+            return yf.Ticker(ticker).history(start=start, interval=interval)
+        return yf.Ticker(ticker).history(period=period, interval=interval)
+
+
 class StockDownloader:
     """Download stock data from Yahoo Finance and save as CSVs."""
 
-    def __init__(self, tickers, period="5y", interval="1mo", out_dir="../data/"):
+    def __init__(self, tickers, period="5y", interval="1mo", out_dir="../data/", fmt="csv",
+                 source=None, max_workers=1, retries=3, backoff=1.0):
         """
         Initialises a StockDownloader object.
 
@@ -13,7 +45,12 @@ class StockDownloader:
             tickers (list[str] or str): A list of ticker symbols or a single ticker symbol.
             period (str, optional): The time period for which to download data. Defaults to "5y".
             interval (str, optional): The time interval for which to download data. Defaults to "1mo".
-            out_dir (str, optional): The directory where the downloaded CSV files will be saved. Defaults to "../data/".
+            out_dir (str, optional): The directory where the downloaded files will be saved. Defaults to "../data/".
+            fmt (str, optional): The output format, "csv" or "parquet". Defaults to "csv".
+            source (object, optional): The price source, any object with a `history(ticker, period, start, interval)` method. Defaults to YahooPriceSource.
+            max_workers (int, optional): The number of tickers to download concurrently. Defaults to 1.
+            retries (int, optional): The number of retries for a failed ticker download. Defaults to 3.
+            backoff (float, optional): The initial retry delay in seconds, doubled after each failure. Defaults to 1.0.
 
         Returns:
             None
@@ -23,21 +60,117 @@ class StockDownloader:
         self.interval = interval
         self.out_dir = Path(out_dir)
         self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.fmt = fmt
+        self.source = source if source is not None else YahooPriceSource()
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+
+    def download(self, incremental=False):
+        """Download data for each ticker and save to CSV or Parquet.
 
-    def download(self):
-        """Download data for each ticker and save to CSV.
+        Tickers are fetched concurrently on a pool of `max_workers` threads.
+        In incremental mode, only the bars after the last stored date of an
+        existing file are fetched and appended to it.
         
         Args:
-            None
+            incremental (bool, optional): Fetch and append only the missing bars. Defaults to False.
         
         Returns:
-            list[str]: A list of paths to the saved CSV files.
+            list[str]: A list of paths to the saved files.
         """
-        saved_files = []
-        for ticker in self.tickers:
-            data = yf.Ticker(ticker).history(period=self.period, interval=self.interval)
-            filepath = self.out_dir / f"{ticker}_stock.csv"
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(lambda t: self.download_ticker(t, incremental), self.tickers))
+
+    @timed("data.download_ticker")
+    def download_ticker(self, ticker, incremental=False):
+        """Download a single ticker and save it to disk.
+
+        Args:
+            ticker (str): The ticker symbol.
+            incremental (bool, optional): Fetch and append only the missing bars. Defaults to False.
+
+        Returns:
+            str: The path to the saved file.
+        """
+        filepath = self.filepath(ticker)
+        last_date = self.last_date(filepath) if incremental else None
+
+        data = self.fetch(ticker, start=last_date)
+        if last_date is None:
+            self._write(data, filepath)
+            logger.info("saved ticker=%s path=%s", ticker, filepath)
+            return filepath
+
+        new = data if data.empty else data[data.index.tz_convert("UTC") > last_date]
+        if new.empty:
+            logger.info("up to date ticker=%s", ticker)
+        else:
+            self._append(new, filepath)
+            logger.info("appended ticker=%s rows=%d path=%s", ticker, len(new), filepath)
+        return filepath
+
+    def filepath(self, ticker):
+        """Return the path a ticker's data is saved to."""
+        return self.out_dir / f"{ticker}_stock.{self.fmt}"
+
+    def last_date(self, filepath):
+        """Return the last stored date of a ticker file as a UTC timestamp, or None if it doesn't exist.
+
+        Args:
+            filepath (str): The path to the ticker file.
+
+        Returns:
+            pd.Timestamp or None: The last stored date.
+        """
+        filepath = Path(filepath)
+        if not filepath.exists():
+            return None
+        if filepath.suffix == ".parquet":
+            dates = pd.read_parquet(filepath, columns=["Date"])["Date"]
+        else:
+            dates = pd.read_csv(filepath, usecols=["Date"])["Date"]
+        if dates.empty:
+            return None
+        return pd.to_datetime(dates, utc=True).max()
+
+    def fetch(self, ticker, start=None):
+        """Fetch a ticker's history without saving it, retrying with exponential backoff.
+
+        Args:
+            ticker (str): The ticker symbol.
+            start (pd.Timestamp, optional): Fetch bars from this date onwards. Defaults to the whole `period`.
+
+        Returns:
+            pd.DataFrame: OHLCV bars indexed by a timezone-aware "Date" index.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                data = self.source.history(ticker, period=self.period, start=start, interval=self.interval)
+                data.index.name = "Date" # intraday intervals name the index "Datetime"
+                return data
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff * 2 ** attempt
+                logger.warning("download failed ticker=%s error=%r retry_in=%.1fs", ticker, e, delay)
+                time.sleep(delay)
+
+    def _write(self, data, filepath):
+        """Write a full history to a new file."""
+        if self.fmt == "parquet":
+            data.index = data.index.tz_convert("UTC")
+            data.reset_index().to_parquet(filepath, index=False)
+        else:
             data.to_csv(filepath)
-            saved_files.append(filepath)
-            print(f"✅ Saved {ticker} data to {filepath}")
-        return saved_files
+
+    def _append(self, data, filepath):
+        """Append new bars to an existing file, keeping its column order."""
+        if self.fmt == "parquet":
+            existing = pd.read_parquet(filepath)
+            data.index = data.index.tz_convert("UTC")
+            new = data.reset_index()[existing.columns]
+            pd.concat([existing, new], ignore_index=True).to_parquet(filepath, index=False)
+        else:
+            columns = pd.read_csv(filepath, nrows=0).columns
+            data.reset_index()[columns].to_csv(filepath, mode="a", header=False, index=False)
@@ -0,0 +1,231 @@
+"""Cross-ticker analytics on an aligned date x ticker price matrix"""
+import numpy as np
+import pandas as pd
+
+from src.config import ANALYTICS_CHUNK_BYTES
+from src.data.partition import TickerPartitions
+from src.instrumentation import timed
+
+
+@timed("analytics.price_matrix")
+def price_matrix(data, column: str = "close"):
+    """
+    Pivot cleaned long-format data into an aligned date x ticker matrix, in one scatter.
+
+    Rows are trading dates, not timestamps: bars are floored to midnight in the data's
+    time zone, so daily bars stamped at different UTC offsets (stocks at 04:00 or 05:00
+    UTC, crypto at 00:00 UTC) share the row of their date.
+
+    Args:
+        data (TickerPartitions or pd.DataFrame): Cleaned stock data.
+        column (str, optional): The value column. Defaults to "close".
+
+    Returns:
+        dates (pd.DatetimeIndex): The sorted union of every ticker's trading dates, at midnight.
+        tickers (list[str]): The tickers, one per matrix column, in display order.
+        matrix (np.ndarray): The (n_dates, n_tickers) float64 values, NaN where a ticker has no bar.
+    """
+    partitions = data if isinstance(data, TickerPartitions) else TickerPartitions(data)
+    frame = partitions.frame
+    tickers = [t for t in partitions.tickers if t in partitions]
+    # Column of each row: the ticker's position, repeated over its contiguous slice
+    slices = [partitions.offsets[t] for t in tickers]
+    rows = np.concatenate([np.arange(start, stop) for start, stop in slices]) if slices else np.empty(0, dtype=int)
+    cols = np.repeat(np.arange(len(tickers)), [stop - start for start, stop in slices])
+
+    dates = frame[partitions.date_col].dt.normalize()
+    if partitions.tz is not None:
+        dates = dates.dt.tz_convert(None) # unique() on datetime64, not on Timestamp objects
+    dates, date_pos = np.unique(dates.to_numpy()[rows], return_inverse=True)
+    matrix = np.full((len(dates), len(tickers)), np.nan)
+    matrix[date_pos, cols] = frame[column].to_numpy(dtype=np.float64)[rows]
+    dates = pd.DatetimeIndex(dates)
+    return (dates.tz_localize("UTC").tz_convert(partitions.tz) if partitions.tz is not None else dates), tickers, matrix
+
+
+def forward_fill(matrix: np.ndarray) -> np.ndarray:
+    """Carry each column's last observed value down over its NaNs, leading NaNs excepted"""
+    index = np.where(~np.isnan(matrix), np.arange(len(matrix))[:, None], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    return matrix[index, np.arange(matrix.shape[1])]
+
+
+def _pairwise_moments(x: np.ndarray, valid: np.ndarray):
+    """
+    Pairwise-complete counts, sums and cross products of the columns of stacked windows.
+
+    Args:
+        x (np.ndarray): (..., n_rows, k) values, 0 where not `valid`.
+        valid (np.ndarray): (..., n_rows, k) observation mask as floats.
+
+    Returns:
+        tuple: (n, sx, sxx, sxy), each (..., k, k). For columns i and j, over the rows where both
+        are observed: n the count, sx/sxx the sum and sum of squares of i, sxy the sum of i * j.
+    """
+    xt = np.swapaxes(x, -1, -2)
+    # Batched matrix products, dispatched to BLAS
+    n = np.swapaxes(valid, -1, -2) @ valid
+    sx = xt @ valid
+    sxx = np.swapaxes(x * x, -1, -2) @ valid
+    sxy = xt @ x
+    return n, sx, sxx, sxy
+
+
+def _covariance(n, sx, sxx, sxy, min_periods: int):
+    """Sample covariance and the pair's variances from pairwise moments, NaN below `min_periods`"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sy = np.swapaxes(sx, -1, -2)
+        syy = np.swapaxes(sxx, -1, -2)
+        cov = (sxy - sx * sy / n) / (n - 1)
+        var_x = (sxx - sx * sx / n) / (n - 1)
+        var_y = (syy - sy * sy / n) / (n - 1)
+    enough = n >= max(min_periods, 2)
+    return np.where(enough, cov, np.nan), np.where(enough, var_x, np.nan), np.where(enough, var_y, np.nan)
+
+
+class CrossTickerAnalytics:
+    """Returns, correlation, covariance and drawdowns of every ticker, as whole-matrix operations
+
+    The cleaned data is pivoted once into an aligned date x ticker close
+    matrix (NaN where a ticker did not trade, e.g. stocks on weekends next to
+    crypto). Every statistic is then computed on the matrix with NumPy,
+    without per-ticker loops, and memoised on the object by its arguments,
+    so one instance per data version caches all results.
+
+    Returns are taken between a ticker's consecutive observations, and
+    correlations and covariances use the pairwise-complete returns of each
+    pair of tickers, like `pd.DataFrame.corr`.
+    """
+
+    def __init__(self, data, column: str = "close"):
+        """
+        Initialises a CrossTickerAnalytics object.
+
+        Args:
+            data (TickerPartitions or pd.DataFrame): Cleaned stock data.
+            column (str, optional): The price column. Defaults to "close".
+
+        Returns:
+            None
+        """
+        self.dates, self.tickers, self.prices = price_matrix(data, column)
+        self._cache = {}
+
+    def _memo(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def returns(self, log: bool = False) -> np.ndarray:
+        """
+        Return the (n_dates, n_tickers) returns since each ticker's previous observation.
+
+        Args:
+            log (bool, optional): Log returns instead of simple returns. Defaults to False.
+
+        Returns:
+            np.ndarray: NaN on a ticker's first observation and where it has no bar.
+        """
+        def compute():
+            previous = np.vstack([np.full((1, self.prices.shape[1]), np.nan), forward_fill(self.prices)[:-1]])
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return np.log(self.prices / previous) if log else self.prices / previous - 1
+        return self._memo(("returns", log), compute)
+
+    def _window_moments(self, window, step: int):
+        """Pairwise moments of the returns over the whole history, or of every `step`-th trailing window"""
+        r = self.returns()
+        valid = ~np.isnan(r)
+        x = np.where(valid, r, 0.0)
+        valid = valid.astype(np.float64)
+        if window is None:
+            return _pairwise_moments(x, valid), self.dates[-1:]
+        window = min(window, len(r)) # a window longer than the history spans all of it
+        ends = np.arange(len(r) - 1, window - 2, -step)[::-1] # always include the last date
+        x_windows = np.lib.stride_tricks.sliding_window_view(x, window, axis=0)
+        v_windows = np.lib.stride_tricks.sliding_window_view(valid, window, axis=0)
+        # Selecting the evaluated windows copies them (x, valid and x * x), so do it a chunk of
+        # windows at a time within ANALYTICS_CHUNK_BYTES; only the (n_windows, k, k) moments are kept
+        k = x.shape[1]
+        chunk = max(1, ANALYTICS_CHUNK_BYTES // (3 * window * k * x.itemsize))
+        moments = tuple(np.empty((len(ends), k, k)) for _ in range(4))
+        for first in range(0, len(ends), chunk):
+            starts = ends[first:first + chunk] - window + 1
+            part = _pairwise_moments(np.swapaxes(x_windows[starts], -1, -2), np.swapaxes(v_windows[starts], -1, -2))
+            for out, values in zip(moments, part):
+                out[first:first + chunk] = values
+        return moments, self.dates[ends]
+
+    @timed("analytics.covariance")
+    def covariance(self, window=None, step: int = 1, min_periods: int = 20):
+        """
+        Return pairwise covariance matrices of the returns.
+
+        Args:
+            window (int, optional): Rolling window in rows; None for the whole history. Defaults to None.
+            step (int, optional): Evaluate every `step`-th window, ending on the last date. Defaults to 1.
+            min_periods (int, optional): The fewest common observations of a pair. Defaults to 20.
+
+        Returns:
+            dates (pd.DatetimeIndex): The end date of each window.
+            matrices (np.ndarray): The (n_windows, n_tickers, n_tickers) covariances.
+        """
+        def compute():
+            moments, ends = self._window_moments(window, step)
+            cov = _covariance(*moments, min_periods)[0]
+            return ends, cov.reshape(-1, len(self.tickers), len(self.tickers))
+        return self._memo(("covariance", window, step, min_periods), compute)
+
+    @timed("analytics.correlation")
+    def correlation(self, window=None, step: int = 1, min_periods: int = 20):
+        """
+        Return pairwise correlation matrices of the returns.
+
+        Args:
+            window (int, optional): Rolling window in rows; None for the whole history. Defaults to None.
+            step (int, optional): Evaluate every `step`-th window, ending on the last date. Defaults to 1.
+            min_periods (int, optional): The fewest common observations of a pair. Defaults to 20.
+
+        Returns:
+            dates (pd.DatetimeIndex): The end date of each window.
+            matrices (np.ndarray): The (n_windows, n_tickers, n_tickers) correlations.
+        """
+        def compute():
+            moments, ends = self._window_moments(window, step)
+            cov, var_x, var_y = _covariance(*moments, min_periods)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                corr = np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0)
+            return ends, corr.reshape(-1, len(self.tickers), len(self.tickers))
+        return self._memo(("correlation", window, step, min_periods), compute)
+
+    def drawdown_matrix(self) -> np.ndarray:
+        """Return the (n_dates, n_tickers) drawdown from each ticker's running peak, carried over gaps"""
+        def compute():
+            prices = forward_fill(self.prices)
+            peak = np.fmax.accumulate(prices, axis=0)
+            with np.errstate(invalid="ignore"):
+                return prices / peak - 1
+        return self._memo(("drawdown_matrix",), compute)
+
+    @timed("analytics.drawdowns")
+    def max_drawdowns(self) -> pd.DataFrame:
+        """
+        Return the maximum drawdown of every ticker with its peak and trough dates.
+
+        Returns:
+            pd.DataFrame: Indexed by ticker, with columns max_drawdown (a fraction <= 0), peak and trough.
+        """
+        def compute():
+            drawdown = self.drawdown_matrix()
+            observed = ~np.all(np.isnan(drawdown), axis=0)
+            trough = np.argmin(np.where(np.isnan(drawdown), np.inf, drawdown), axis=0)
+            # The peak is the last date before the trough on which the ticker traded at its running high
+            at_peak = np.where((drawdown == 0) & ~np.isnan(self.prices), np.arange(len(drawdown))[:, None], 0)
+            peak = np.maximum.accumulate(at_peak, axis=0)[trough, np.arange(len(self.tickers))]
+            columns = np.arange(len(self.tickers))
+            return pd.DataFrame({
+                "max_drawdown": np.where(observed, drawdown[trough, columns], np.nan),
+                "peak": self.dates[peak].where(observed),
+                "trough": self.dates[trough].where(observed),
+            }, index=pd.Index(self.tickers, name="ticker"))
+        return self._memo(("max_drawdowns",), compute)
@@ -0,0 +1,166 @@
+"""Walk-forward backtesting of the StockPredictor lag model
+
+Usage:
+    python -m src.models.backtest [--window N] [--step N] [--days N]
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from src.config import FORECAST_WORKERS, MAX_PREDICT_DAYS, PREDICTOR_LAG
+from src.data.partition import TickerPartitions
+from src.instrumentation import timed
+from src.models.batch import map_tickers
+from src.models.predictive_model import lag_matrix
+
+
+def walk_forward(close: np.ndarray, lag: int = PREDICTOR_LAG, days: int = MAX_PREDICT_DAYS,
+                 min_train: int = 252, window=None, step: int = 1, integer: bool = True):
+    """
+    Walk-forward evaluation of the lag model over one ticker's history.
+
+    At every forecast origin `o`, the model is fitted on the lag rows whose
+    targets precede `o` (all of them, or the last `window`) and forecasts
+    `days` closes recursively from `close[:o]`, exactly like
+    `StockPredictor.train_array` followed by `predict_array`.
+
+    Instead of refitting at each origin, the normal equations are updated
+    incrementally: prefix sums of the per-row outer products `x xᵀ` and `x y`
+    give `XᵀX` and `Xᵀy` of every expanding window in one pass, and a rolling
+    window is the difference of two prefix sums. All origins are then solved
+    in one batched call, and their recursive forecasts advance together, one
+    vectorised step per horizon.
+
+    Args:
+        close (np.ndarray): The date-sorted closing prices, without NaNs.
+        lag (int, optional): The number of lag features. Defaults to PREDICTOR_LAG.
+        days (int, optional): The forecast horizon. Defaults to MAX_PREDICT_DAYS.
+        min_train (int, optional): The fewest training rows of the first origin. Defaults to 252.
+        window (int, optional): Train on the last `window` rows only (rolling). Defaults to expanding.
+        step (int, optional): Evaluate every `step`-th origin. Defaults to 1.
+        integer (bool, optional): Truncate each prediction before feeding it back, like
+            `StockPredictor.predict_array`. Defaults to True.
+
+    Returns:
+        origins (np.ndarray): The index in `close` of the first forecast day of each origin.
+        predicted (np.ndarray): The (n_origins, days) forecasts.
+        actual (np.ndarray): The (n_origins, days) realised closes, NaN past the end of the history.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    if np.isnan(close).any():
+        raise ValueError("close must not contain NaNs")
+    min_train = max(min_train, lag + 1)
+    origins = np.arange(lag + min_train, len(close), step)
+    if window is not None:
+        window = max(window, lag + 1)
+    if len(origins) == 0:
+        return origins, np.empty((0, days)), np.empty((0, days))
+
+    X, y = lag_matrix(close, lag)
+    features = np.hstack([np.ones((len(X), 1)), X])
+    # prefix[i] = sums over the first i lag rows; row r targets close[r + lag]
+    xx = np.zeros((len(X) + 1, lag + 1, lag + 1))
+    np.cumsum(features[:, :, None] * features[:, None, :], axis=0, out=xx[1:])
+    xy = np.zeros((len(X) + 1, lag + 1))
+    np.cumsum(features * y[:, None], axis=0, out=xy[1:])
+
+    stop = origins - lag
+    start = np.zeros_like(stop) if window is None else np.maximum(stop - window, 0)
+    gram = xx[stop] - xx[start]
+    moment = xy[stop] - xy[start]
+    try:
+        beta = np.linalg.solve(gram, moment[:, :, None])[:, :, 0]
+    except np.linalg.LinAlgError:
+        beta = np.stack([np.linalg.lstsq(g, m, rcond=None)[0] for g, m in zip(gram, moment)])
+    intercept, coef = beta[:, 0], beta[:, 1:]
+
+    # buffer[:, j] holds close[o - lag + j]; forecasts are appended after the observed lags
+    buffer = np.empty((len(origins), lag + days))
+    buffer[:, :lag] = close[origins[:, None] + np.arange(-lag, 0)]
+    weights = coef[:, ::-1] # oldest value first, like the buffer
+    for i in range(days):
+        value = np.einsum("ij,ij->i", buffer[:, i:i + lag], weights) + intercept
+        buffer[:, lag + i] = np.trunc(value) if integer else value
+    predicted = buffer[:, lag:]
+
+    target = origins[:, None] + np.arange(days)
+    actual = np.full(target.shape, np.nan)
+    inside = target < len(close)
+    actual[inside] = close[target[inside]]
+    return origins, predicted, actual
+
+
+def _backtest_ticker(close: np.ndarray, lag: int, days: int, min_train: int, window, step: int) -> dict:
+    """Walk forward over one ticker and reduce the errors to per-horizon sums"""
+    _, predicted, actual = walk_forward(close, lag, days, min_train, window, step)
+    error = predicted - actual
+    valid = ~np.isnan(error)
+    error = np.where(valid, error, 0.0)
+    pct = np.where(valid, np.abs(error) / np.where(valid, np.abs(actual), 1.0), 0.0)
+    return {
+        "n": valid.sum(axis=0),
+        "abs": np.abs(error).sum(axis=0),
+        "sq": (error ** 2).sum(axis=0),
+        "pct": pct.sum(axis=0),
+    }
+
+
+@timed("model.backtest")
+def backtest(data, tickers=None, lag: int = PREDICTOR_LAG, days: int = MAX_PREDICT_DAYS,
+             min_train: int = 252, window=None, step: int = 1, max_workers=FORECAST_WORKERS) -> pd.DataFrame:
+    """
+    Walk-forward backtest of every ticker, in parallel, with error metrics per ticker and horizon.
+
+    Args:
+        data (TickerPartitions or pd.DataFrame): Cleaned stock data.
+        tickers (list[str], optional): The tickers to backtest. Defaults to every ticker in `data`.
+        lag (int, optional): The number of lag features. Defaults to PREDICTOR_LAG.
+        days (int, optional): The forecast horizon. Defaults to MAX_PREDICT_DAYS.
+        min_train (int, optional): The fewest training rows of the first origin. Defaults to 252.
+        window (int, optional): Train on a rolling window of this many rows. Defaults to expanding.
+        step (int, optional): Evaluate every `step`-th origin. Defaults to 1.
+        max_workers (int, optional): The number of worker processes, 1 runs inline. Defaults to FORECAST_WORKERS.
+
+    Returns:
+        pd.DataFrame: One row per ticker and horizon with columns ticker, horizon, n (forecasts
+        evaluated), mae, rmse and mape (in percent).
+    """
+    partitions = data if isinstance(data, TickerPartitions) else TickerPartitions(data)
+    tickers = [t for t in (tickers if tickers is not None else partitions.tickers) if t in partitions]
+    results = map_tickers(partitions, tickers, _backtest_ticker, (lag, days, min_train, window, step),
+                          max_workers=max_workers)
+
+    rows = []
+    horizons = np.arange(1, days + 1)
+    for ticker, sums in results:
+        n = np.maximum(sums["n"], 1)
+        rows.append(pd.DataFrame({
+            "ticker": ticker,
+            "horizon": horizons,
+            "n": sums["n"],
+            "mae": np.where(sums["n"] > 0, sums["abs"] / n, np.nan),
+            "rmse": np.where(sums["n"] > 0, np.sqrt(sums["sq"] / n), np.nan),
+            "mape": np.where(sums["n"] > 0, 100 * sums["pct"] / n, np.nan),
+        }))
+    columns = ["ticker", "horizon", "n", "mae", "rmse", "mape"]
+    return pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(columns=columns)
+
+
+if __name__ == "__main__":
+    from src.data.data_loader import get_data
+    from src.data.processor import process_data
+    from src.instrumentation import configure_logging
+
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the forecasting model")
+    parser.add_argument("--window", type=int, default=None, help="rolling training window (default: expanding)")
+    parser.add_argument("--step", type=int, default=1, help="evaluate every N-th day")
+    parser.add_argument("--days", type=int, default=MAX_PREDICT_DAYS)
+    args = parser.parse_args()
+
+    partitions = TickerPartitions(process_data(get_data("COMBINED"), group_by="ticker"))
+    metrics = backtest(partitions, days=args.days, window=args.window, step=args.step)
+    summary = metrics[metrics["horizon"].isin([1, 5, args.days])]
+    print(summary.pivot(index="ticker", columns="horizon", values="mape").round(2)
+          .rename(columns=lambda h: f"MAPE {h}d %").to_string())
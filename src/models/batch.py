@@ -0,0 +1,132 @@
+"""Batch training and forecasting of StockPredictor models across many tickers"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from src.config import MAX_PREDICT_DAYS, PREDICTOR_LAG, FORECAST_WORKERS
+from src.data.partition import TickerPartitions
+from src.instrumentation import timed
+from src.models.predictive_model import StockPredictor
+
+
+def _forecast_ticker(close: np.ndarray, lag: int, days: int):
+    """Train a predictor on one ticker's closes and forecast `days` ahead"""
+    predictor = StockPredictor(lag=lag)
+    predictor.train_array(close)
+    return predictor.predict_array(close, days)
+
+
+def _run_shared(task):
+    """Process pool worker: apply a function to one ticker's slice of the shared close array"""
+    shm_name, length, ticker, start, stop, func, args = task
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        closes = np.ndarray((length,), dtype=np.float64, buffer=shm.buf)
+        result = func(closes[start:stop], *args)
+        del closes # release the buffer export before closing the block
+        return ticker, result
+    finally:
+        shm.close()
+
+
+def map_tickers(partitions: TickerPartitions, tickers, func, args=(), max_workers=FORECAST_WORKERS) -> list:
+    """
+    Apply `func(close, *args)` to the date-sorted closes of each ticker, in parallel.
+
+    The date-sorted closes of all tickers are placed once in a shared memory
+    block that worker processes attach to, so only ticker offsets are sent to
+    each worker instead of pickled frames.
+
+    Workers are spawned rather than forked: this runs inside the multithreaded
+    dashboard server, where a forked child could inherit locks held by other
+    threads (logging, the dataset cache, BLAS) and deadlock on them.
+
+    Args:
+        partitions (TickerPartitions): Cleaned stock data.
+        tickers (list[str]): The tickers to process.
+        func (callable): A module-level function of a ticker's closes and `args`.
+        args (tuple, optional): Extra arguments of `func`.
+        max_workers (int, optional): The number of worker processes, 1 runs inline. Defaults to FORECAST_WORKERS.
+
+    Returns:
+        list[tuple]: (ticker, result) pairs in the order of `tickers`.
+    """
+    closes = partitions.frame["close"].to_numpy(dtype=np.float64)
+    if max_workers == 1:
+        return [(t, func(closes[slice(*partitions.offsets[t])], *args)) for t in tickers]
+
+    shm = shared_memory.SharedMemory(create=True, size=max(closes.nbytes, 1))
+    try:
+        np.ndarray(closes.shape, dtype=np.float64, buffer=shm.buf)[:] = closes
+        tasks = [(shm.name, len(closes), t, *partitions.offsets[t], func, args) for t in tickers]
+        workers = max_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            chunksize = max(1, len(tasks) // (4 * workers))
+            return list(pool.map(_run_shared, tasks, chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+@timed("model.forecast_all")
+def forecast_all(data, tickers=None, lag: int = PREDICTOR_LAG, days: int = MAX_PREDICT_DAYS,
+                 max_workers=FORECAST_WORKERS, version=None) -> pd.DataFrame:
+    """
+    Train a StockPredictor and forecast `days` ahead for every ticker in parallel.
+
+    Tickers are spread over worker processes with `map_tickers`.
+
+    Args:
+        data (TickerPartitions or pd.DataFrame): Cleaned stock data.
+        tickers (list[str], optional): The tickers to forecast. Defaults to every ticker in `data`.
+        lag (int, optional): The number of lag features. Defaults to PREDICTOR_LAG.
+        days (int, optional): The forecast horizon. Defaults to MAX_PREDICT_DAYS.
+        max_workers (int, optional): The number of worker processes, 1 runs inline. Defaults to FORECAST_WORKERS.
+        version (str, optional): The data version, stored with the forecasts.
+
+    Returns:
+        pd.DataFrame: One row per ticker and horizon with columns ticker, horizon, date,
+        predicted_close, lag and data_version.
+    """
+    partitions = data if isinstance(data, TickerPartitions) else TickerPartitions(data)
+    tickers = [t for t in (tickers if tickers is not None else partitions.tickers)
+               if t in partitions and partitions.offsets[t][1] - partitions.offsets[t][0] > lag]
+    results = map_tickers(partitions, tickers, _forecast_ticker, (lag, days), max_workers=max_workers)
+
+    rows = []
+    horizons = np.arange(1, days + 1)
+    for ticker, predictions in results:
+        last_date = partitions[ticker][partitions.date_col].iloc[-1]
+        rows.append(pd.DataFrame({
+            "ticker": ticker,
+            "horizon": horizons,
+            "date": last_date + pd.to_timedelta(horizons, unit="D"),
+            "predicted_close": predictions,
+        }))
+    columns = ["ticker", "horizon", "date", "predicted_close"]
+    forecasts = pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(columns=columns)
+    forecasts["lag"] = lag
+    forecasts["data_version"] = version
+    return forecasts
+
+
+def save_forecasts(forecasts: pd.DataFrame, path) -> str:
+    """
+    Save a forecasts table to CSV or Parquet, depending on the file extension.
+
+    Args:
+        forecasts (pd.DataFrame): The table returned by `forecast_all`.
+        path (str): The output path.
+
+    Returns:
+        str: The path to the saved file.
+    """
+    if str(path).endswith(".parquet"):
+        forecasts.to_parquet(path, index=False)
+    else:
+        forecasts.to_csv(path, index=False)
+    return path
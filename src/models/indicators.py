@@ -0,0 +1,209 @@
+"""Rolling technical indicators for every ticker, with O(1) per-bar updates"""
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from src.data.partition import TickerPartitions
+from src.instrumentation import timed
+
+# Trading days per year, used to annualise the volatility
+TRADING_DAYS = 252
+
+
+class IndicatorEngine:
+    """Compute SMA, EMA, RSI, Bollinger bands and volatility for all tickers at once
+
+    `fit` computes the indicators over the whole history with grouped,
+    vectorised pandas operations and keeps the running state of each ticker:
+    the closes and returns of the longest window with their sums, the EMA
+    values and RSI's smoothed gains and losses. `update` then folds one new
+    bar into that state in constant time, without revisiting the history.
+
+    Indicator columns are named sma_<window>, ema_<span>, rsi_<period>,
+    bb_upper/bb_lower (around sma_<bollinger_window>) and
+    volatility_<window> (annualised standard deviation of log returns).
+    """
+
+    def __init__(self, sma_windows=(20, 50), ema_spans=(12, 26), rsi_period: int = 14,
+                 bollinger_window: int = 20, bollinger_k: float = 2.0, volatility_window: int = 20):
+        """
+        Initialises an IndicatorEngine object.
+
+        Args:
+            sma_windows (tuple[int], optional): Simple moving average windows. Defaults to (20, 50).
+            ema_spans (tuple[int], optional): Exponential moving average spans. Defaults to (12, 26).
+            rsi_period (int, optional): The RSI period, smoothed with Wilder's method. Defaults to 14.
+            bollinger_window (int, optional): The Bollinger band window. Defaults to 20.
+            bollinger_k (float, optional): The band width in standard deviations. Defaults to 2.0.
+            volatility_window (int, optional): The window of daily log returns. Defaults to 20.
+
+        Returns:
+            None
+        """
+        self.sma_windows = tuple(sorted(set(sma_windows) | {bollinger_window}))
+        self.ema_spans = tuple(ema_spans)
+        self.rsi_period = rsi_period
+        self.bollinger_window = bollinger_window
+        self.bollinger_k = bollinger_k
+        self.volatility_window = volatility_window
+        self.state = {}
+
+    @property
+    def columns(self) -> list:
+        """The indicator columns, in output order"""
+        return ([f"sma_{w}" for w in self.sma_windows] + [f"ema_{s}" for s in self.ema_spans]
+                + [f"rsi_{self.rsi_period}", "bb_upper", "bb_lower", f"volatility_{self.volatility_window}"])
+
+    @timed("model.indicators")
+    def fit(self, data) -> pd.DataFrame:
+        """
+        Compute the indicators of every ticker and initialise the incremental state.
+
+        Args:
+            data (TickerPartitions or pd.DataFrame): Cleaned stock data.
+
+        Returns:
+            pd.DataFrame: One row per row of the partitioned frame (same index), one column per indicator.
+        """
+        partitions = data if isinstance(data, TickerPartitions) else TickerPartitions(data)
+        frame = partitions.frame
+        keys = frame[partitions.ticker_col]
+        close = frame["close"].astype(np.float64)
+        position = close.groupby(keys, sort=False, observed=True).cumcount().to_numpy()
+
+        def grouped(series):
+            return series.groupby(keys, sort=False, observed=True)
+
+        def aligned(result):
+            # Grouped rolling/ewm results are indexed by (ticker, row); bring them back to row order
+            return result.droplevel(0).reindex(frame.index)
+
+        out = {}
+        for w in self.sma_windows:
+            out[f"sma_{w}"] = aligned(grouped(close).rolling(w).mean())
+        for s in self.ema_spans:
+            out[f"ema_{s}"] = aligned(grouped(close).ewm(span=s, adjust=False).mean())
+
+        delta = grouped(close).diff()
+        alpha = 1 / self.rsi_period
+        avg_gain = aligned(grouped(delta.clip(lower=0)).ewm(alpha=alpha, adjust=False).mean())
+        avg_loss = aligned(grouped(-delta.clip(upper=0)).ewm(alpha=alpha, adjust=False).mean())
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+        rsi = rsi.where(avg_loss != 0, 100.0).where(position >= self.rsi_period)
+        out[f"rsi_{self.rsi_period}"] = rsi
+
+        std = aligned(grouped(close).rolling(self.bollinger_window).std(ddof=0))
+        mid = out[f"sma_{self.bollinger_window}"]
+        out["bb_upper"] = mid + self.bollinger_k * std
+        out["bb_lower"] = mid - self.bollinger_k * std
+
+        returns = grouped(np.log(close)).diff()
+        out[f"volatility_{self.volatility_window}"] = (
+            aligned(grouped(returns).rolling(self.volatility_window).std()) * np.sqrt(TRADING_DAYS)
+        )
+
+        indicators = pd.DataFrame(out, index=frame.index)[self.columns]
+        self._init_state(partitions, close, returns, avg_gain, avg_loss, indicators)
+        return indicators
+
+    def _init_state(self, partitions, close, returns, avg_gain, avg_loss, indicators):
+        """Capture the running state of every ticker from the end of its history"""
+        depth = max(self.sma_windows)
+        self.state = {}
+        for ticker, (start, stop) in partitions.offsets.items():
+            closes = deque(close.iloc[max(start, stop - depth):stop].tolist(), maxlen=depth)
+            rets = deque(returns.iloc[max(start + 1, stop - self.volatility_window):stop].tolist(),
+                         maxlen=self.volatility_window)
+            last = stop - 1
+            self.state[ticker] = {
+                "count": stop - start,
+                "closes": closes,
+                "sums": {w: sum(list(closes)[-w:]) for w in self.sma_windows},
+                "sumsq": sum(c * c for c in list(closes)[-self.bollinger_window:]),
+                "ema": {s: indicators[f"ema_{s}"].iat[last] for s in self.ema_spans},
+                "avg_gain": avg_gain.iat[last],
+                "avg_loss": avg_loss.iat[last],
+                "returns": rets,
+                "ret_sum": sum(rets),
+                "ret_sumsq": sum(r * r for r in rets),
+            }
+
+    def update(self, ticker: str, close: float) -> dict:
+        """
+        Fold one new bar of a ticker into the running state, in constant time.
+
+        Args:
+            ticker (str): The ticker symbol; a ticker not seen by `fit` starts a new history.
+            close (float): The closing price of the new bar.
+
+        Returns:
+            dict: The indicator values of the new bar, keyed like the `fit` columns (NaN while a
+            window is not yet full).
+        """
+        st = self.state.get(ticker)
+        if st is None:
+            st = self.state[ticker] = {
+                "count": 0, "closes": deque(maxlen=max(self.sma_windows)),
+                "sums": {w: 0.0 for w in self.sma_windows}, "sumsq": 0.0,
+                "ema": {s: np.nan for s in self.ema_spans}, "avg_gain": np.nan, "avg_loss": np.nan,
+                "returns": deque(maxlen=self.volatility_window), "ret_sum": 0.0, "ret_sumsq": 0.0,
+            }
+        closes = st["closes"]
+        previous = closes[-1] if closes else None
+        close = float(close)
+
+        # Windowed sums: add the new close, subtract the one leaving each window
+        for w in self.sma_windows:
+            st["sums"][w] += close - (closes[-w] if len(closes) >= w else 0.0)
+        leaving = closes[-self.bollinger_window] if len(closes) >= self.bollinger_window else 0.0
+        st["sumsq"] += close * close - leaving * leaving
+        closes.append(close)
+        st["count"] += 1
+        n = len(closes)
+
+        result = {}
+        for w in self.sma_windows:
+            result[f"sma_{w}"] = st["sums"][w] / w if n >= w else np.nan
+        for s in self.ema_spans:
+            a = 2 / (s + 1)
+            st["ema"][s] = close if np.isnan(st["ema"][s]) else (1 - a) * st["ema"][s] + a * close
+            result[f"ema_{s}"] = st["ema"][s]
+
+        if previous is not None:
+            change = close - previous
+            gain, loss = max(change, 0.0), max(-change, 0.0)
+            a = 1 / self.rsi_period
+            st["avg_gain"] = gain if np.isnan(st["avg_gain"]) else (1 - a) * st["avg_gain"] + a * gain
+            st["avg_loss"] = loss if np.isnan(st["avg_loss"]) else (1 - a) * st["avg_loss"] + a * loss
+
+            rets = st["returns"]
+            ret = np.log(close / previous)
+            old = rets[0] if len(rets) == rets.maxlen else 0.0
+            st["ret_sum"] += ret - old
+            st["ret_sumsq"] += ret * ret - old * old
+            rets.append(ret)
+
+        if st["count"] > self.rsi_period:
+            rs_loss = st["avg_loss"]
+            result[f"rsi_{self.rsi_period}"] = 100.0 if rs_loss == 0 else 100 - 100 / (1 + st["avg_gain"] / rs_loss)
+        else:
+            result[f"rsi_{self.rsi_period}"] = np.nan
+
+        w = self.bollinger_window
+        if n >= w:
+            mean = st["sums"][w] / w
+            std = np.sqrt(max(st["sumsq"] / w - mean * mean, 0.0))
+            result["bb_upper"] = mean + self.bollinger_k * std
+            result["bb_lower"] = mean - self.bollinger_k * std
+        else:
+            result["bb_upper"] = result["bb_lower"] = np.nan
+
+        rets = st["returns"]
+        v = self.volatility_window
+        if len(rets) == v and v > 1:
+            var = (st["ret_sumsq"] - st["ret_sum"] ** 2 / v) / (v - 1)
+            result[f"volatility_{v}"] = np.sqrt(max(var, 0.0) * TRADING_DAYS)
+        else:
+            result[f"volatility_{v}"] = np.nan
+        return result
@@ -1,5 +1,64 @@
+import numpy as np
 import pandas as pd
-from sklearn.linear_model import LinearRegression
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.instrumentation import timed
+
+
+def lag_matrix(close: np.ndarray, lag: int):
+    """
+    Build the lag feature matrix of a closing price series.
+
+    The features are zero-copy sliding-window views over `close`: row `t` holds
+    `close[t-1], ..., close[t-lag]` as `lag_1, ..., lag_lag`, and the target is `close[t]`.
+
+    Args:
+        close (np.ndarray): The date-sorted closing prices.
+        lag (int): The number of lag features.
+
+    Returns:
+        X (np.ndarray): The (n - lag, lag) feature matrix.
+        y (np.ndarray): The (n - lag,) target vector.
+    """
+    if len(close) <= lag:
+        return np.empty((0, lag)), np.empty(0)
+    windows = sliding_window_view(close, lag + 1)
+    X = windows[:, -2::-1]
+    y = windows[:, -1]
+    valid = ~np.isnan(windows).any(axis=1)
+    if not valid.all():
+        X, y = X[valid], y[valid]
+    return X, y
+
+
+def recursive_forecast(history: np.ndarray, coef: np.ndarray, intercept: float, days: int,
+                       integer: bool = True) -> np.ndarray:
+    """
+    Recursively forecast `days` values of a linear lag model.
+
+    Each prediction is written into a buffer after the last `lag` observed
+    values and becomes an input of the next step, so the loop does one small
+    dot product per day and allocates nothing.
+
+    Args:
+        history (np.ndarray): The date-sorted closing prices, at least `len(coef)` of them.
+        coef (np.ndarray): The fitted coefficients of `lag_1, ..., lag_k`.
+        intercept (float): The fitted intercept.
+        days (int): The number of days to forecast.
+        integer (bool, optional): Truncate each prediction to an integer before feeding it back. Defaults to True.
+
+    Returns:
+        np.ndarray: The forecast values.
+    """
+    lag = len(coef)
+    buffer = np.empty(lag + days)
+    buffer[:lag] = history[-lag:]
+    weights = np.ascontiguousarray(coef[::-1])  # oldest value first, like the buffer
+    for i in range(days):
+        value = buffer[i:i + lag] @ weights + intercept
+        buffer[lag + i] = np.trunc(value) if integer else value
+    return buffer[lag:]
+
 
 class StockPredictor:
     def __init__(self, lag=5):
@@ -12,9 +71,30 @@ class StockPredictor:
         Returns:
             None
         """
+        from sklearn.linear_model import LinearRegression # deferred, sklearn is slow to import
+
         self.lag = lag
         self.model = LinearRegression()
 
+    @staticmethod
+    def close_array(df: pd.DataFrame) -> np.ndarray:
+        """
+        Return the date-sorted "close" column as a contiguous float array.
+
+        Args:
+            df (pd.DataFrame): A single ticker's data with "date" and "close" columns.
+
+        Returns:
+            np.ndarray: The closing prices.
+        """
+        dates = df["date"]
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates, utc=True)
+        close = df["close"].to_numpy(dtype=np.float64)
+        if not dates.is_monotonic_increasing:
+            close = close[np.argsort(dates.to_numpy(), kind="stable")]
+        return np.ascontiguousarray(close)
+
     def prepare_data(self, df: pd.DataFrame):
         """
         Prepare a DataFrame for training a linear regression model.
@@ -27,22 +107,13 @@ class StockPredictor:
             y (pd.Series): The target vector.
 
         Notes:
-            The DataFrame is sorted by date, and lag features are created from the "Close" column.
-            The lag features are created by shifting the "Close" column by 1 to `self.lag` positions.
-            The resulting DataFrame is dropped of NaN values, and the feature matrix X and target vector y are returned.
+            The "Close" column is sorted by date, and lag features are created from it.
+            The lag feature `lag_i` is the closing price `i` positions before the target.
+            Rows without a full set of lags are dropped.
         """
-        df = df.copy()
-        df["date"] = pd.to_datetime(df["date"], utc=True)
-        df = df.sort_values("date")
-
-        # Create lag features for "Close"
-        for i in range(1, self.lag + 1):
-            df[f"lag_{i}"] = df["close"].shift(i)
-
-        df = df.dropna()
-        X = df[[f"lag_{i}" for i in range(1, self.lag + 1)]]
-        y = df["close"]
-        return X, y
+        X, y = lag_matrix(self.close_array(df), self.lag)
+        X = pd.DataFrame(X, columns=[f"lag_{i}" for i in range(1, self.lag + 1)])
+        return X, pd.Series(y, name="close")
 
     def train(self, df: pd.DataFrame):
         """
@@ -54,8 +125,20 @@ class StockPredictor:
         Returns:
             None
         """
-        
-        X, y = self.prepare_data(df)
+        self.train_array(self.close_array(df))
+
+    @timed("model.train")
+    def train_array(self, close: np.ndarray):
+        """
+        Train a linear regression model on a date-sorted array of closing prices.
+
+        Args:
+            close (np.ndarray): The closing prices.
+
+        Returns:
+            None
+        """
+        X, y = lag_matrix(close, self.lag)
         self.model.fit(X, y)
 
     def predict_next(self, df: pd.DataFrame):
@@ -69,11 +152,10 @@ class StockPredictor:
             float: The predicted next closing price
 
         Notes:
-            The prediction is based on the lag features created from the "Close" column of the given DataFrame.
+            The prediction is based on the last `lag` values of the "Close" column of the given DataFrame.
         """
-        X, _ = self.prepare_data(df)
-        return self.model.predict([X.iloc[-1]])[0]
-    
+        close = self.close_array(df)
+        return float(recursive_forecast(close, self.model.coef_, self.model.intercept_, 1, integer=False)[0])
 
     def predict_next_days(self, df: pd.DataFrame, days: int):
         """
@@ -87,18 +169,21 @@ class StockPredictor:
             list[int]: A list of the predicted next closing prices for the given number of days.
 
         Notes:
-            The prediction is based on the lag features created from the "Close" column of the given DataFrame.
+            The prediction is based on the last `lag` values of the "Close" column of the given DataFrame.
         """
-        df_temp = df.copy().sort_values("date")
-        predictions = []
+        return self.predict_array(self.close_array(df), days)
 
-        last_lags = df_temp["close"].values[-self.lag:].tolist()
-        lag_cols = [f"lag_{i}" for i in range(1, self.lag + 1)]
+    @timed("model.predict")
+    def predict_array(self, close: np.ndarray, days: int):
+        """
+        Predict the next `days` closing prices from a date-sorted array of closing prices.
 
-        for _ in range(days):
-            X_input_df = pd.DataFrame([last_lags[-self.lag:]], columns=lag_cols)
-            next_close = int(self.model.predict(X_input_df)[0])
-            predictions.append(next_close)
-            last_lags.append(next_close)
+        Args:
+            close (np.ndarray): The closing prices.
+            days (int): The number of days to predict the closing prices for.
 
-        return predictions
+        Returns:
+            list[int]: A list of the predicted next closing prices for the given number of days.
+        """
+        forecast = recursive_forecast(close, self.model.coef_, self.model.intercept_, days)
+        return forecast.astype(np.int64).tolist()
@@ -0,0 +1,139 @@
+"""Registry of trained StockPredictor models and their forecasts"""
+import os
+import pickle
+import threading
+from pathlib import Path
+
+from src.config import MAX_PREDICT_DAYS
+from src.models.predictive_model import StockPredictor
+
+
+class ModelRegistry:
+    """Cache of trained models and forecasts keyed by (ticker, lag, data version)
+
+    Forecasts are computed once for the longest horizon and smaller horizons
+    are served as prefixes, since the recursive forecast of the first `n`
+    days doesn't depend on the horizon. Models can optionally be persisted
+    to disk so a restart doesn't retrain them.
+    """
+
+    def __init__(self, persist_dir=None, max_horizon: int = MAX_PREDICT_DAYS):
+        """
+        Initialises a ModelRegistry object.
+
+        Args:
+            persist_dir (str, optional): Directory to persist trained models to. Defaults to no persistence.
+            max_horizon (int, optional): The horizon forecasts are computed for. Defaults to MAX_PREDICT_DAYS.
+
+        Returns:
+            None
+        """
+        self.persist_dir = Path(persist_dir) if persist_dir is not None else None
+        if self.persist_dir is not None:
+            self.persist_dir.mkdir(parents=True, exist_ok=True)
+        self.max_horizon = max_horizon
+        self._models = {}
+        self._forecasts = {}
+        self._lock = threading.RLock()
+
+    def _path(self, key):
+        ticker, lag, version = key
+        return self.persist_dir / f"{ticker}_lag{lag}_{version}.pkl"
+
+    def get_model(self, ticker: str, df, lag: int, version: str) -> StockPredictor:
+        """
+        Return the trained model for a ticker, training it on `df` if needed.
+
+        Args:
+            ticker (str): The ticker symbol.
+            df (pd.DataFrame): The ticker's cleaned history.
+            lag (int): The number of lag features.
+            version (str): The data version `df` belongs to.
+
+        Returns:
+            StockPredictor: The trained model.
+        """
+        key = (ticker, lag, version)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                return model
+            if self.persist_dir is not None and self._path(key).exists():
+                with open(self._path(key), "rb") as f:
+                    model = pickle.load(f)
+            else:
+                model = StockPredictor(lag=lag)
+                model.train(df)
+                if self.persist_dir is not None:
+                    # Write then rename, so concurrent workers never read a partial file
+                    tmp_path = self._path(key).with_suffix(f".{os.getpid()}.tmp")
+                    with open(tmp_path, "wb") as f:
+                        pickle.dump(model, f)
+                    os.replace(tmp_path, self._path(key))
+            self._models[key] = model
+            return model
+
+    def forecast(self, ticker: str, df, days: int, lag: int, version: str) -> list:
+        """
+        Return the next `days` predicted closing prices for a ticker.
+
+        Args:
+            ticker (str): The ticker symbol.
+            df (pd.DataFrame): The ticker's cleaned history.
+            days (int): The number of days to predict.
+            lag (int): The number of lag features.
+            version (str): The data version `df` belongs to.
+
+        Returns:
+            list[int]: The predicted closing prices.
+        """
+        if days <= 0:
+            return []
+        key = (ticker, lag, version)
+        with self._lock:
+            predictions = self._forecasts.get(key)
+            if predictions is None or len(predictions) < days:
+                model = self.get_model(ticker, df, lag, version)
+                predictions = model.predict_next_days(df, max(days, self.max_horizon))
+                self._forecasts[key] = predictions
+            return predictions[:days]
+
+    def load_forecasts(self, forecasts, version: str):
+        """
+        Seed the forecast cache from a table precomputed by `src.models.batch.forecast_all`.
+
+        Rows computed for another data version are ignored.
+
+        Args:
+            forecasts (pd.DataFrame): The precomputed forecasts table.
+            version (str): The current data version.
+
+        Returns:
+            int: The number of tickers seeded.
+        """
+        current = forecasts[forecasts["data_version"].astype(str) == str(version)]
+        with self._lock:
+            for (ticker, lag), rows in current.sort_values("horizon").groupby(["ticker", "lag"]):
+                self._forecasts[(ticker, int(lag), version)] = rows["predicted_close"].astype(int).tolist()
+        return current["ticker"].nunique()
+
+    def invalidate(self, version=None):
+        """
+        Evict every model and forecast not trained on `version`, or all of them if `version` is None.
+
+        Persisted models of other versions are deleted as well.
+
+        Args:
+            version (str, optional): The current data version.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            for cache in (self._models, self._forecasts):
+                for key in [k for k in cache if k[2] != version]:
+                    del cache[key]
+            if self.persist_dir is not None:
+                for path in self.persist_dir.glob("*.pkl"):
+                    if version is None or not path.stem.endswith(f"_{version}"):
+                        os.remove(path)
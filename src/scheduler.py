@@ -0,0 +1,219 @@
+"""Background refresh of the data and models behind the dashboard
+
+Usage:
+    python -m src.scheduler [--once] [--interval SECONDS] [--shared]
+
+Each run goes through download -> combine -> process -> retrain -> swap.
+A stage is skipped when its inputs did not change since the previous run,
+and the new data is swapped into the running dashboard (or published to the
+shared dataset of a multi-worker server) only once it is fully prepared, so
+requests keep being served from the old version in the meantime. The
+process stage cleans only the rows the combine stage appended, falling back
+to cleaning the whole dataset when the combined file was rebuilt.
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+
+from src.config import DATA_FORMAT, DATASETS, DOWNLOAD_WORKERS, FORECAST_WORKERS, REFRESH_INTERVAL_SECONDS, TICKERS
+from src.data.cache import file_signature
+from src.data.data_loader import get_data, get_data_version
+from src.data.rollup import update_rollup_files
+from src.data.stock_combiner import StockCombiner
+from src.data.stock_downloader import StockDownloader
+from src.instrumentation import configure_logging, metrics
+from src.models.batch import forecast_all, save_forecasts
+
+logger = logging.getLogger(__name__)
+
+
+def _signatures(files):
+    """Return the change signatures of the files that exist"""
+    return {str(f): file_signature(f) for f in files if os.path.exists(f)}
+
+
+class RefreshScheduler:
+    """Periodically refresh the dataset and forecasts and hot-swap them into a DashboardState"""
+
+    def __init__(self, state=None, shared=None, interval=REFRESH_INTERVAL_SECONDS, downloader=None,
+                 tickers=TICKERS, forecast_workers=FORECAST_WORKERS):
+        """
+        Initialises a RefreshScheduler object.
+
+        Args:
+            state (DashboardState, optional): The state to swap new data into, created with `incremental=True`
+                for appended rows to be cleaned on their own. Defaults to a new incremental DashboardState.
+            shared (SharedDataset, optional): Also publish new data here for the workers of a multi-worker server.
+            interval (float, optional): Seconds between runs. Defaults to REFRESH_INTERVAL_SECONDS.
+            downloader (StockDownloader, optional): The downloader used by the download stage. Defaults to an
+                incremental Yahoo Finance downloader into the directory of the combined dataset.
+            tickers (list[str], optional): The tickers to forecast. Defaults to TICKERS.
+            forecast_workers (int, optional): Worker processes used by the retrain stage. Defaults to FORECAST_WORKERS.
+
+        Returns:
+            None
+        """
+        if state is None:
+            from src.webapp.state import DashboardState
+            state = DashboardState(incremental=True)
+        self.state = state
+        self.shared = shared
+        self.interval = interval
+        self.out_dir = os.path.dirname(DATASETS["COMBINED"])
+        self.downloader = downloader if downloader is not None else StockDownloader(
+            tickers=TICKERS, period="10y", interval="1d", out_dir=self.out_dir,
+            fmt=DATA_FORMAT, max_workers=DOWNLOAD_WORKERS,
+        )
+        self.tickers = tickers
+        self.forecast_workers = forecast_workers
+        self.last_run = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self) -> dict:
+        """
+        Run every stage once, skipping the stages whose inputs did not change.
+
+        Returns:
+            dict: Stage name -> {"status": "ran" or "skipped", "seconds": float}.
+        """
+        report = {}
+
+        def stage(name, run):
+            start = time.perf_counter()
+            ran = run()
+            elapsed = time.perf_counter() - start
+            report[name] = {"status": "ran" if ran else "skipped", "seconds": elapsed}
+            metrics.observe(f"refresh.{name}", elapsed)
+            return ran
+
+        files = []
+        # The dataset version the combine stage appends to, and the raw rows it appended
+        since = get_data_version(self.state.dataset) if os.path.exists(DATASETS[self.state.dataset]) else None
+        appended = {}
+
+        def download():
+            before = _signatures([self.downloader.filepath(t) for t in self.downloader.tickers])
+            files.extend(self.downloader.download(incremental=True))
+            return _signatures(files) != before
+
+        def combine():
+            if report["download"]["status"] == "skipped" and os.path.exists(DATASETS["COMBINED"]):
+                return False
+            fmt = os.path.splitext(DATASETS["COMBINED"])[1].lstrip(".")
+            combiner = StockCombiner(files, out_dir=self.out_dir, fmt=fmt)
+            combined_path = combiner.combine(incremental=True)
+            if self.state.dataset == "COMBINED":
+                appended["rows"] = combiner.appended
+            update_rollup_files(combined_path, appended=combiner.appended)
+            return True
+
+        stage("download", download)
+        stage("combine", combine)
+
+        current = {}
+
+        def process():
+            # A first run loads and cleans the whole dataset here
+            loaded = not self.state.ready
+            self.state.ensure_loaded()
+            current["version"] = get_data_version(self.state.dataset)
+            if current["version"] == self.state.version:
+                current["partitions"] = self.state.partitions
+                return loaded
+            current["partitions"] = self.state.prepare(current["version"], delta=appended.get("rows"), since=since)
+            return True
+
+        def retrain():
+            if self.forecast_version() == current["version"]:
+                return False
+            forecasts = forecast_all(current["partitions"], tickers=self.tickers,
+                                     max_workers=self.forecast_workers, version=current["version"])
+            save_forecasts(forecasts, DATASETS["FORECASTS"])
+            return True
+
+        def swap():
+            swapped = False
+            if report["process"]["status"] == "ran" or report["retrain"]["status"] == "ran":
+                # Re-seeds the registry with the new forecasts even when only they changed
+                self.state.swap(current["version"], current["partitions"])
+                swapped = True
+            if self.shared is not None and self.shared.published_version() != current["version"]:
+                self.shared.publish(current["partitions"], current["version"])
+                swapped = True
+            return swapped
+
+        stage("process", process)
+        stage("retrain", retrain)
+        stage("swap", swap)
+
+        self.last_run = report
+        summary = " ".join(f"{name}={r['status']}:{r['seconds']:.2f}s" for name, r in report.items())
+        logger.info("refreshed dataset=%s version=%s %s", self.state.dataset, current["version"], summary)
+        return report
+
+    @staticmethod
+    def forecast_version():
+        """Return the data version of the saved forecasts, or None if there are none"""
+        if not os.path.exists(DATASETS["FORECASTS"]):
+            return None
+        versions = get_data("FORECASTS")["data_version"]
+        return str(versions.iloc[0]) if len(versions) else None
+
+    def run_forever(self):
+        """Run every `interval` seconds until `stop` is called, logging and surviving failed runs"""
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("data refresh failed, keeping the current data")
+
+    def start(self):
+        """
+        Start refreshing in a daemon thread.
+
+        Returns:
+            threading.Thread: The refresh thread.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="dashboard-refresh", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout=None):
+        """Stop the refresh thread after the current run"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def main(once=False, interval=REFRESH_INTERVAL_SECONDS, shared=False):
+    """
+    Refresh once, or keep refreshing in the foreground.
+
+    Args:
+        once (bool, optional): Run a single refresh and return. Defaults to False.
+        interval (float, optional): Seconds between runs. Defaults to REFRESH_INTERVAL_SECONDS.
+        shared (bool, optional): Publish each new version to the shared dataset. Defaults to False.
+
+    Returns:
+        None
+    """
+    from src.data.shared import SharedDataset
+
+    configure_logging()
+    scheduler = RefreshScheduler(shared=SharedDataset() if shared else None, interval=interval)
+    scheduler.run_once()
+    if not once:
+        scheduler.run_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the dashboard data and forecasts")
+    parser.add_argument("--once", action="store_true", help="run a single refresh and exit")
+    parser.add_argument("--interval", type=float, default=REFRESH_INTERVAL_SECONDS or 3600)
+    parser.add_argument("--shared", action="store_true", help="publish to the shared dataset of src.webapp.serve")
+    args = parser.parse_args()
+    main(once=args.once, interval=args.interval, shared=args.shared)
@@ -1,14 +1,7 @@
-from src.data.stock_downloader import StockDownloader
-from src.data.stock_combiner import StockCombiner
-from src.config import TICKERS
+from src.instrumentation import configure_logging
+from src.scheduler import RefreshScheduler
 
 if __name__ == "__main__":
-    downloader = StockDownloader(
-        tickers=TICKERS,
-        period="10y",
-        interval="1d",
-        out_dir="data/"
-    )
-    files = downloader.download()
-    combined_csv = StockCombiner(files, out_dir="data/").combine()
-    print(f"Combined CSV saved to: {combined_csv}")
+    configure_logging()
+    # One refresh: download, combine and roll up the new bars, then clean the data and retrain the forecasts
+    RefreshScheduler().run_once()
@@ -0,0 +1,18 @@
+import logging
+
+from src.config import DATASETS, TICKERS
+from src.data.data_loader import get_data, get_data_version
+from src.data.partition import TickerPartitions
+from src.data.processor import process_data
+from src.instrumentation import configure_logging
+from src.models.batch import forecast_all, save_forecasts
+
+logger = logging.getLogger(__name__)
+
+if __name__ == "__main__":
+    configure_logging()
+    version = get_data_version("COMBINED")
+    df_clean = process_data(get_data("COMBINED"), group_by="ticker")
+    forecasts = forecast_all(TickerPartitions(df_clean), tickers=TICKERS, version=version)
+    path = save_forecasts(forecasts, DATASETS["FORECASTS"])
+    logger.info("saved forecasts tickers=%d path=%s", forecasts["ticker"].nunique(), path)
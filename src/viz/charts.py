@@ -1,12 +1,66 @@
+import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 
-def plot_stock_line(df: pd.DataFrame, ticker: str) -> go.Figure:
+from src.config import MAX_CHART_POINTS, DOWNSAMPLE_METHOD
+from src.data.partition import TickerPartitions
+from src.instrumentation import timed
+from src.viz.downsample import downsample
+
+
+def _ticker_frame(data, ticker: str) -> pd.DataFrame:
+    """Return the date-sorted rows of one ticker from a TickerPartitions index or a plain DataFrame"""
+    if isinstance(data, TickerPartitions):
+        return data[ticker]
+    df_ticker = data[data["ticker"] == ticker]
+    if not df_ticker["date"].is_monotonic_increasing:
+        df_ticker = df_ticker.sort_values("date")
+    return df_ticker
+
+
+def _to_date(value, dates: pd.Series):
+    """Convert a relayout axis bound to a timestamp comparable with `dates`"""
+    ts = pd.Timestamp(value)
+    tz = getattr(dates.dt, "tz", None)
+    if tz is not None and ts.tz is None:
+        ts = ts.tz_localize(tz)
+    return ts
+
+
+def _visible(data, ticker: str, x_range=None, max_points=MAX_CHART_POINTS) -> pd.DataFrame:
+    """
+    Return the rows of one ticker inside the visible x range, decimated to the point budget.
+
+    The budget applies to the visible range only, so zooming in returns more
+    detail for the smaller window.
+    """
+    if isinstance(data, TickerPartitions) and x_range is not None:
+        df_ticker = data.range(ticker, *x_range)
+    else:
+        df_ticker = _ticker_frame(data, ticker)
+        if x_range is not None:
+            dates = df_ticker["date"]
+            start, end = (_to_date(v, dates) if v is not None else None for v in x_range)
+            df_ticker = df_ticker[
+                (dates >= start if start is not None else True) & (dates <= end if end is not None else True)
+            ]
+    return downsample(df_ticker, max_points, method=DOWNSAMPLE_METHOD)
+
+
+@timed("chart.stock_line")
+def plot_stock_line(df, ticker: str, x_range=None, max_points: int = MAX_CHART_POINTS) -> go.Figure:
     """
     Plot historical closing prices for a single stock.
+
+    Args:
+        df (TickerPartitions or pd.DataFrame): Cleaned stock data.
+        ticker (str): Stock ticker symbol.
+        x_range (tuple, optional): The visible (start, end) dates. Defaults to the full history.
+        max_points (int, optional): The point budget for the visible range. Defaults to MAX_CHART_POINTS.
     """
-    df_ticker = df[df["ticker"] == ticker]
+    import plotly.express as px # deferred, plotly.express is slow to import
+
+    df_ticker = _visible(df, ticker, x_range, max_points)
     fig = px.line(
         df_ticker,
         x="date",
@@ -21,23 +75,99 @@ def plot_stock_line(df: pd.DataFrame, ticker: str) -> go.Figure:
     return fig
 
 
-def plot_stock_with_prediction(df: pd.DataFrame, ticker: str, predicted: list) -> go.Figure:
+@timed("chart.intraday")
+def plot_intraday(df, ticker: str, max_points: int = MAX_CHART_POINTS) -> go.Figure:
     """
-    Plot historical closing prices and overlay predicted future prices.
-    
+    Plot the intraday closing prices of a single stock.
+
     Args:
-        df (pd.DataFrame): Cleaned stock DataFrame.
+        df (pd.DataFrame): The cleaned bars of the window, see `PartitionedStore.load`.
         ticker (str): Stock ticker symbol.
-        predicted (list[float]): Predicted closing prices for future days.
+        max_points (int, optional): The point budget for the window. Defaults to MAX_CHART_POINTS.
     """
-    df_ticker = df[df["ticker"] == ticker].copy()
-    last_date = df_ticker["date"].max()
-    future_dates = pd.date_range(
+    if df.empty:
+        fig = go.Figure()
+        fig.update_layout(title=f"No intraday data for {ticker}", template="plotly_white")
+        return fig
+    fig = plot_stock_line(df, ticker, max_points=max_points)
+    fig.update_layout(title=f"{ticker} Intraday Close Prices", xaxis_title="Time (UTC)")
+    return fig
+
+
+# Indicator overlays drawn on the price axis: key -> (legend label, indicator columns)
+OVERLAYS = {
+    "sma_20": ("SMA 20", ["sma_20"]),
+    "sma_50": ("SMA 50", ["sma_50"]),
+    "ema_12": ("EMA 12", ["ema_12"]),
+    "ema_26": ("EMA 26", ["ema_26"]),
+    "bollinger": ("Bollinger bands", ["bb_upper", "bb_lower"]),
+}
+
+
+def add_indicator_overlays(fig: go.Figure, df_ticker: pd.DataFrame, indicators: pd.DataFrame, overlays) -> go.Figure:
+    """
+    Add indicator lines for the plotted rows of a ticker to a figure.
+
+    Args:
+        fig (go.Figure): The figure to add the traces to.
+        df_ticker (pd.DataFrame): The plotted (visible, downsampled) rows of the ticker.
+        indicators (pd.DataFrame): Indicators indexed like the rows of the data, see `IndicatorEngine.fit`.
+        overlays (list[str]): Keys of `OVERLAYS` to draw.
+    """
+    values = indicators.reindex(df_ticker.index)
+    for key in overlays:
+        label, columns = OVERLAYS[key]
+        for i, col in enumerate(columns):
+            fig.add_trace(go.Scatter(
+                x=df_ticker["date"],
+                y=values[col],
+                mode="lines",
+                name=label,
+                legendgroup=key,
+                showlegend=i == 0,
+                line=dict(width=1, dash="dot" if key == "bollinger" else "solid")
+            ))
+    return fig
+
+
+def prediction_dates(last_date, days: int) -> pd.DatetimeIndex:
+    """
+    Return the daily dates of a forecast starting the day after `last_date`.
+
+    Args:
+        last_date (pd.Timestamp): The last historical date.
+        days (int): The number of forecast days.
+    """
+    return pd.date_range(
         start=last_date + pd.Timedelta(days=1),
-        periods=len(predicted),
+        periods=days,
         freq='D'
     )
-    df_pred = pd.DataFrame({"date": future_dates, "close": predicted})
+
+
+@timed("chart.stock_with_prediction")
+def plot_stock_with_prediction(df, ticker: str, predicted: list, x_range=None,
+                               max_points: int = MAX_CHART_POINTS, indicators=None, overlays=()) -> go.Figure:
+    """
+    Plot historical closing prices and overlay predicted future prices.
+
+    The figure always holds the historical trace at index 0 and the predicted
+    trace at index 1 (empty when `predicted` is empty), so callers can update
+    the prediction alone with a partial update. Indicator overlays follow.
+    
+    Args:
+        df (TickerPartitions or pd.DataFrame): Cleaned stock data.
+        ticker (str): Stock ticker symbol.
+        predicted (list[float]): Predicted closing prices for future days.
+        x_range (tuple, optional): The visible (start, end) dates. Defaults to the full history.
+        max_points (int, optional): The point budget for the visible range. Defaults to MAX_CHART_POINTS.
+        indicators (pd.DataFrame, optional): Indicators indexed like the rows of `df`, e.g.
+            `IndicatorEngine().fit(partitions)` for a TickerPartitions.
+        overlays (list[str], optional): Keys of `OVERLAYS` to draw from `indicators`.
+    """
+    last_date = _ticker_frame(df, ticker)["date"].iloc[-1]
+    df_ticker = _visible(df, ticker, x_range, max_points)
+    df_pred = pd.DataFrame({"date": prediction_dates(last_date, len(predicted)), "close": predicted})
 
     fig = go.Figure()
     # Historical prices
@@ -53,11 +183,14 @@ def plot_stock_with_prediction(df: pd.DataFrame, ticker: str, predicted: list) -
         y=df_pred["close"],
         mode="lines+markers",
         name="Predicted",
-        line=dict(dash="dash", color="red")
+        line=dict(dash="dash", color="red"),
+        showlegend=len(predicted) > 0
     ))
+    if indicators is not None and overlays:
+        add_indicator_overlays(fig, df_ticker, indicators, overlays)
 
     fig.update_layout(
-        title=f"{ticker} Close Prices & Predictions",
+        title=prediction_title(ticker, predicted),
         xaxis_title="Date",
         yaxis_title="Close Price",
         template="plotly_white"
@@ -65,18 +198,32 @@ def plot_stock_with_prediction(df: pd.DataFrame, ticker: str, predicted: list) -
     return fig
 
 
-def plot_combined_stocks(df: pd.DataFrame) -> go.Figure:
+def prediction_title(ticker: str, predicted: list) -> str:
+    """Return the title of a stock chart with or without predictions"""
+    return f"{ticker} Close Prices & Predictions" if len(predicted) else f"{ticker} Close Prices"
+
+
+@timed("chart.combined_stocks")
+def plot_combined_stocks(df, x_range=None, max_points: int = MAX_CHART_POINTS) -> go.Figure:
     """
     Plot closing prices for multiple stocks in a single chart.
     
     Args:
-        df (pd.DataFrame): Cleaned combined stock DataFrame.
+        df (TickerPartitions or pd.DataFrame): Cleaned combined stock data.
+        x_range (tuple, optional): The visible (start, end) dates. Defaults to the full history.
+        max_points (int, optional): The point budget per ticker for the visible range. Defaults to MAX_CHART_POINTS.
     """
+    import plotly.express as px # deferred, plotly.express is slow to import
+
+    tickers = df.tickers if isinstance(df, TickerPartitions) else list(df["ticker"].unique())
+    df = pd.concat([_visible(df, t, x_range, max_points) for t in tickers], ignore_index=True)
+    category_orders = {"ticker": tickers}
     fig = px.line(
         df,
         x="date",
         y="close",
         color="ticker",
+        category_orders=category_orders,
         title="Combined Stock Close Prices"
     )
     fig.update_layout(
@@ -85,3 +232,77 @@ def plot_combined_stocks(df: pd.DataFrame) -> go.Figure:
         template="plotly_white"
     )
     return fig
+
+
+@timed("chart.correlation_heatmap")
+def plot_correlation_heatmap(analytics, window=None) -> go.Figure:
+    """
+    Plot the correlation matrix of the tickers' returns as a heatmap.
+
+    Args:
+        analytics (CrossTickerAnalytics): The analytics of the served data, which caches the matrices.
+        window (int, optional): Correlate the returns of the last `window` dates only. Defaults to the whole history.
+    """
+    ends, corr = analytics.correlation(window=window, step=window or 1)
+    tickers = analytics.tickers
+    fig = go.Figure(go.Heatmap(
+        z=corr[-1],
+        x=tickers,
+        y=tickers,
+        zmin=-1,
+        zmax=1,
+        colorscale="RdBu",
+        text=np.round(corr[-1], 2),
+        texttemplate="%{text}",
+        hovertemplate="%{y} / %{x}: %{z:.2f}<extra></extra>"
+    ))
+    period = f"last {window} dates to {ends[-1]:%Y-%m-%d}" if window else "full history"
+    fig.update_layout(
+        title=f"Return Correlation ({period})",
+        yaxis_autorange="reversed",
+        template="plotly_white"
+    )
+    return fig
+
+
+def _block_min(dates: pd.DatetimeIndex, matrix: np.ndarray, max_points: int):
+    """Decimate rows to at most `max_points` blocks, keeping each block's first date and column minima"""
+    factor = -(-len(matrix) // max_points) if max_points else 1
+    if factor <= 1:
+        return dates, matrix
+    padded = np.full((-(-len(matrix) // factor) * factor, matrix.shape[1]), np.nan)
+    padded[:len(matrix)] = matrix
+    with np.errstate(invalid="ignore"):
+        blocks = np.fmin.reduce(padded.reshape(-1, factor, matrix.shape[1]), axis=1)
+    return dates[::factor], blocks
+
+
+@timed("chart.drawdowns")
+def plot_drawdowns(analytics, max_points: int = MAX_CHART_POINTS) -> go.Figure:
+    """
+    Plot every ticker's drawdown from its running peak, labelled with its maximum drawdown.
+
+    Args:
+        analytics (CrossTickerAnalytics): The analytics of the served data, which caches the drawdowns.
+        max_points (int, optional): The point budget per ticker; each point keeps the deepest
+            drawdown of the dates it covers. Defaults to MAX_CHART_POINTS.
+    """
+    dates, drawdown = _block_min(analytics.dates, analytics.drawdown_matrix(), max_points)
+    worst = analytics.max_drawdowns()["max_drawdown"]
+    fig = go.Figure()
+    for i, ticker in enumerate(analytics.tickers):
+        fig.add_trace(go.Scatter(
+            x=dates,
+            y=drawdown[:, i],
+            mode="lines",
+            name=f"{ticker} (max {worst[ticker]:.0%})",
+            connectgaps=True
+        ))
+    fig.update_layout(
+        title="Drawdown from Peak",
+        xaxis_title="Date",
+        yaxis_title="Drawdown",
+        yaxis_tickformat=".0%",
+        template="plotly_white"
+    )
+    return fig
@@ -0,0 +1,96 @@
+"""Server-side decimation of chart series to a point budget"""
+import numpy as np
+import pandas as pd
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Select `n_out` points with the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last points are always kept. Every bucket in between keeps
+    the point forming the largest triangle with the previously kept point and
+    the average of the next bucket, which preserves the visual shape of the line.
+
+    Args:
+        x (np.ndarray): The x values, ascending.
+        y (np.ndarray): The y values.
+        n_out (int): The number of points to keep.
+
+    Returns:
+        np.ndarray: The indices of the kept points, ascending.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            avg_x = x[hi:edges[i + 2]].mean()
+            avg_y = y[hi:edges[i + 2]].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def minmax(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Select up to `n_out` points by keeping the minimum and maximum of each bucket.
+
+    Args:
+        y (np.ndarray): The y values.
+        n_out (int): The number of points to keep.
+
+    Returns:
+        np.ndarray: The indices of the kept points, ascending.
+    """
+    n = len(y)
+    n_buckets = n_out // 2
+    if n <= n_out or n_buckets < 1:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, size)
+    valid = ~np.isnan(buckets).all(axis=1)
+    offsets = np.arange(n_buckets)[valid] * size
+    lows = offsets + np.nanargmin(buckets[valid], axis=1)
+    highs = offsets + np.nanargmax(buckets[valid], axis=1)
+    return np.unique(np.concatenate([lows, highs]))
+
+
+def downsample(df: pd.DataFrame, max_points: int, x: str = "date", y: str = "close",
+               method: str = "lttb") -> pd.DataFrame:
+    """
+    Reduce a date-sorted series to at most `max_points` rows.
+
+    Args:
+        df (pd.DataFrame): The series to reduce, sorted by `x`.
+        max_points (int): The point budget.
+        x (str, optional): The x column. Defaults to "date".
+        y (str, optional): The y column. Defaults to "close".
+        method (str, optional): "lttb" or "minmax". Defaults to "lttb".
+
+    Returns:
+        pd.DataFrame: The selected rows.
+    """
+    if max_points is None or len(df) <= max_points:
+        return df
+    values = df[y].to_numpy(dtype=np.float64)
+    if method == "minmax":
+        idx = minmax(values, max_points)
+    else:
+        xs = df[x]
+        if pd.api.types.is_datetime64_any_dtype(xs):
+            xs = xs.astype("int64") # nanoseconds since epoch, UTC
+        idx = lttb(xs.to_numpy(dtype=np.float64), values, max_points)
+    return df.iloc[idx]
@@ -1,71 +1,313 @@
+import importlib.util
+import logging
+import time
+
 import dash
-from dash import html, dcc
+import pandas as pd
+from dash import html, dcc, Patch
 from dash.dependencies import Input, Output
-from src.data.data_loader import get_data
-from src.data.processor import process_data
-from src.models.predictive_model import StockPredictor
-from src.viz.charts import plot_stock_line, plot_stock_with_prediction, plot_combined_stocks
-
-# Load and process the combined CSV
-df_combined = get_data("COMBINED", refresh=True)
-df_clean = process_data(df_combined)
-tickers = df_clean["ticker"].unique()
-
-# Initialize Dash
-app = dash.Dash(__name__)
-app.title = "Stock Analytics Dashboard"
-
-# Layout
-app.layout = html.Div([
-    html.H1("Stock Analytics Dashboard", style={"textAlign": "center"}),
-
-    html.Div([
-        html.Label("Select Stock:"),
-        dcc.Dropdown(
-            id="ticker-dropdown",
-            options=[{"label": t, "value": t} for t in tickers],
-            value=tickers[0]
-        ),
-    ], style={"width": "250px", "margin": "20px"}),
-
-    html.Div([
-        html.Label("Predict Next Days:"),
-        dcc.Slider(
-            id="predict-days-slider",
-            min=0,
-            max=30,
-            step=1,
-            value=0,
-            marks={i: str(i) for i in range(0, 31, 5)}
-        ),
-    ], style={"width": "500px", "margin": "20px"}),
-
-    dcc.Graph(id="stock-chart"),
-
-    html.H2("Combined Stock Comparison"),
-    dcc.Graph(
-        figure=plot_combined_stocks(df_clean)
-    )
-])
+from dash.exceptions import PreventUpdate
 
-# Callback to update chart based on selected stock and prediction horizon
-@app.callback(
-    Output("stock-chart", "figure"),
-    Input("ticker-dropdown", "value"),
-    Input("predict-days-slider", "value")
+from src.config import MAX_PREDICT_DAYS, REFRESH_INTERVAL_SECONDS, WEBAPP_PRELOAD
+from src.instrumentation import configure_logging, process_uptime, register_endpoints, timed
+from src.viz.charts import (
+    OVERLAYS, plot_correlation_heatmap, plot_drawdowns, plot_intraday, plot_stock_with_prediction,
+    plot_combined_stocks, prediction_dates, prediction_title
 )
-def update_stock_chart(ticker, predict_days):
-    df_ticker = df_clean[df_clean["ticker"] == ticker]
+from src.webapp.figure_cache import FigureCache, add_etag_support
+from src.webapp.state import DashboardState
+
+logger = logging.getLogger(__name__)
+
+# Correlation heatmap windows offered by the dashboard: label -> number of trailing dates, 0 for all
+CORRELATION_WINDOWS = {"Full history": 0, "1 year": 252, "3 months": 63}
+
+
+def serve_layout():
+    """Build the page layout; ticker options are filled in once the data is loaded"""
+    return html.Div([
+        dcc.Location(id="url"),
+        html.H1("Stock Analytics Dashboard", style={"textAlign": "center"}),
+
+        html.Div([
+            html.Label("Select Stock:"),
+            dcc.Dropdown(id="ticker-dropdown"),
+        ], style={"width": "250px", "margin": "20px"}),
+
+        html.Div([
+            html.Label("Predict Next Days:"),
+            dcc.Slider(
+                id="predict-days-slider",
+                min=0,
+                max=MAX_PREDICT_DAYS,
+                step=1,
+                value=0,
+                marks={i: str(i) for i in range(0, MAX_PREDICT_DAYS + 1, 5)}
+            ),
+        ], style={"width": "500px", "margin": "20px"}),
+
+        html.Div([
+            html.Label("Indicators:"),
+            dcc.Checklist(
+                id="indicator-checklist",
+                options=[{"label": label, "value": key} for key, (label, _) in OVERLAYS.items()],
+                value=[],
+                inline=True
+            ),
+        ], style={"margin": "20px"}),
+
+        dcc.Graph(id="stock-chart"),
+
+        html.H2("Intraday"),
+        dcc.Graph(id="intraday-chart"),
+
+        html.H2("Combined Stock Comparison"),
+        dcc.Graph(id="combined-chart"),
+
+        html.H2("Cross-Ticker Analytics"),
+        html.Div([
+            html.Label("Correlation Window:"),
+            dcc.RadioItems(
+                id="correlation-window",
+                options=[{"label": label, "value": value} for label, value in CORRELATION_WINDOWS.items()],
+                value=0,
+                inline=True
+            ),
+        ], style={"width": "50%", "margin": "auto"}),
+        dcc.Graph(id="correlation-heatmap"),
+        dcc.Graph(id="drawdown-chart")
+    ])
+
+
+def x_range_from_relayout(relayout_data):
+    """
+    Extract the visible x-axis range from a Graph's relayoutData.
+
+    Args:
+        relayout_data (dict): The relayoutData of a zoom, pan or reset event.
+
+    Returns:
+        tuple or None: The visible (start, end) dates, or None for the full range.
+    """
+    if not relayout_data or relayout_data.get("xaxis.autorange"):
+        return None
+    if "xaxis.range[0]" in relayout_data:
+        return relayout_data["xaxis.range[0]"], relayout_data["xaxis.range[1]"]
+    if "xaxis.range" in relayout_data:
+        return tuple(relayout_data["xaxis.range"])
+    return None
+
+
+def prediction_patch(ticker, last_date, predicted) -> Patch:
+    """
+    Build the partial update of a stock chart for a new prediction horizon.
+
+    Relies on `plot_stock_with_prediction` drawing the predicted trace at index 1.
+
+    Args:
+        ticker (str): Stock ticker symbol.
+        last_date (pd.Timestamp): The last historical date.
+        predicted (list[float]): Predicted closing prices for future days.
+
+    Returns:
+        Patch: The new predicted trace and title.
+    """
+    patched = Patch()
+    patched["data"][1]["x"] = prediction_dates(last_date, len(predicted))
+    patched["data"][1]["y"] = predicted
+    patched["data"][1]["showlegend"] = len(predicted) > 0
+    patched["layout"]["title"]["text"] = prediction_title(ticker, predicted)
+    return patched
+
+
+def create_app(state=None, preload=WEBAPP_PRELOAD, refresh_interval=REFRESH_INTERVAL_SECONDS) -> dash.Dash:
+    """
+    Build the Dash app without loading any data.
+
+    Args:
+        state (DashboardState, optional): The data and models to serve. Defaults to a new DashboardState.
+        preload (str, optional): "background" to load the data in a thread now, "eager" to load it
+            before returning, or "lazy" to load it on the first request. Defaults to WEBAPP_PRELOAD.
+        refresh_interval (float, optional): Seconds between background data refreshes, 0 disables them.
+            Ignored for a state attached to a shared dataset, which is refreshed by its publisher.
+            Defaults to REFRESH_INTERVAL_SECONDS.
+
+    Returns:
+        dash.Dash: The app, with the state available as `app.state`, its rendered figures as
+        `app.figure_cache` and the refresh scheduler, if any, as `app.scheduler`.
+    """
+    # Wall-clock time since the process started: interpreter start-up and imports
+    imports = process_uptime()
+    start = time.perf_counter()
+    state = state if state is not None else DashboardState(incremental=bool(refresh_interval))
+    # Rendered figures, keyed by everything they depend on including the data version
+    figure_cache = FigureCache()
+    state.add_swap_listener(figure_cache.clear)
+
+    # Initialize Dash, gzip-compressing responses when flask-compress is installed
+    app = dash.Dash(__name__, compress=importlib.util.find_spec("flask_compress") is not None)
+    app.title = "Stock Analytics Dashboard"
+    app.layout = serve_layout
+    app.state = state
+    app.figure_cache = figure_cache
+    app.scheduler = None
+    add_etag_support(app.server)
+    register_endpoints(app.server)
+
+    @app.server.route("/health")
+    def health():
+        refresh = app.scheduler.last_run if app.scheduler is not None else None
+        return {"status": "ok", "data_ready": state.ready, "timings": state.timings, "refresh": refresh}
+
+    # Callback to fill the ticker dropdown once the data is loaded
+    @app.callback(
+        Output("ticker-dropdown", "options"),
+        Output("ticker-dropdown", "value"),
+        Input("url", "pathname")
+    )
+    @timed("callback.load_tickers", expected=(PreventUpdate,))
+    def load_tickers(_pathname):
+        tickers = state.snapshot()[1].tickers
+        return [{"label": t, "value": t} for t in tickers], tickers[0]
+
+    # Callback to update chart based on selected stock, prediction horizon and zoom
+    @app.callback(
+        Output("stock-chart", "figure"),
+        Input("ticker-dropdown", "value"),
+        Input("predict-days-slider", "value"),
+        Input("stock-chart", "relayoutData"),
+        Input("indicator-checklist", "value")
+    )
+    @timed("callback.update_stock_chart", expected=(PreventUpdate,))
+    def update_stock_chart(ticker, predict_days, relayout_data=None, overlays=()):
+        if ticker is None:
+            raise PreventUpdate
+        snapshot = state.snapshot()
+        version, partitions = snapshot
+        triggered = dash.ctx.triggered_id
+        if triggered == "predict-days-slider":
+            # Only the horizon changed: send just the prediction trace and title
+            predicted = state.forecast(snapshot, ticker, predict_days)
+            return prediction_patch(ticker, partitions[ticker]["date"].iloc[-1], predicted)
+
+        # A new ticker starts fully zoomed out; zooming re-fetches the visible range at full budget
+        x_range = None if triggered == "ticker-dropdown" else x_range_from_relayout(relayout_data)
+
+        overlays = tuple(overlays or ())
+
+        def build():
+            predicted = state.forecast(snapshot, ticker, predict_days)
+            indicators = state.indicators(snapshot) if overlays else None
+            fig = plot_stock_with_prediction(partitions, ticker, predicted, x_range=x_range,
+                                             indicators=indicators, overlays=overlays)
+            fig.update_layout(uirevision=ticker)
+            return fig
+
+        return figure_cache.get_or_build(("stock", ticker, predict_days, x_range, overlays, version), build)
+
+    # Callback to read the intraday partitions of the visible window
+    @app.callback(
+        Output("intraday-chart", "figure"),
+        Input("ticker-dropdown", "value"),
+        Input("intraday-chart", "relayoutData")
+    )
+    @timed("callback.update_intraday_chart", expected=(PreventUpdate,))
+    def update_intraday_chart(ticker, relayout_data):
+        if ticker is None:
+            raise PreventUpdate
+        x_range = None if dash.ctx.triggered_id == "ticker-dropdown" else x_range_from_relayout(relayout_data)
+        window = state.intraday_window(ticker, x_range)
+        store = state.intraday_store
+        version = store.version(ticker, *window) if window is not None else ()
+
+        def build():
+            bars = store.load(ticker, *window, clean=True) if window is not None else pd.DataFrame()
+            fig = plot_intraday(bars, ticker)
+            fig.update_layout(uirevision=ticker)
+            return fig
+
+        return figure_cache.get_or_build(("intraday", ticker, window, version), build)
+
+    # Callback to re-fetch the combined chart at the resolution of the visible range
+    @app.callback(
+        Output("combined-chart", "figure"),
+        Input("combined-chart", "relayoutData")
+    )
+    @timed("callback.update_combined_chart", expected=(PreventUpdate,))
+    def update_combined_chart(relayout_data):
+        snapshot = state.snapshot()
+        x_range = x_range_from_relayout(relayout_data)
+
+        def build():
+            fig = plot_combined_stocks(state.partitions_for_range(snapshot, x_range), x_range=x_range)
+            fig.update_layout(uirevision="combined")
+            return fig
+
+        return figure_cache.get_or_build(("combined", x_range, snapshot[0]), build)
+
+    # Callbacks to draw the cross-ticker analytics, computed once per data version
+    @app.callback(
+        Output("correlation-heatmap", "figure"),
+        Input("correlation-window", "value")
+    )
+    @timed("callback.update_correlation_heatmap", expected=(PreventUpdate,))
+    def update_correlation_heatmap(window):
+        snapshot = state.snapshot()
+        window = int(window) or None
+
+        def build():
+            return plot_correlation_heatmap(state.analytics(snapshot), window=window)
+
+        return figure_cache.get_or_build(("correlation", window, snapshot[0]), build)
+
+    @app.callback(
+        Output("drawdown-chart", "figure"),
+        Input("url", "pathname")
+    )
+    @timed("callback.update_drawdown_chart", expected=(PreventUpdate,))
+    def update_drawdown_chart(_pathname):
+        snapshot = state.snapshot()
+
+        def build():
+            fig = plot_drawdowns(state.analytics(snapshot))
+            fig.update_layout(uirevision="drawdowns")
+            return fig
+
+        return figure_cache.get_or_build(("drawdowns", snapshot[0]), build)
+
+    if preload == "eager":
+        state.ensure_loaded()
+    elif preload == "background":
+        state.load_in_background()
+
+    if refresh_interval and state.shared is None:
+        from src.scheduler import RefreshScheduler
+
+        app.scheduler = RefreshScheduler(state, interval=refresh_interval)
+        app.scheduler.start()
+
+    state.timings["create_app"] = time.perf_counter() - start
+    if imports is not None:
+        state.timings["imports"] = imports
+        state.timings["startup"] = imports + state.timings["create_app"]
+    logger.info("app ready imports_seconds=%s create_app_seconds=%.2f preload=%s",
+                f"{imports:.2f}" if imports is not None else "unknown", state.timings["create_app"], preload)
+    return app
+
+
+_default_app = None
+
 
-    if predict_days > 0:
-        predictor = StockPredictor(lag=7)
-        predictor.train(df_ticker)
-        predicted_prices = predictor.predict_next_days(df_ticker, predict_days)
-        fig = plot_stock_with_prediction(df_clean, ticker, predicted_prices)
-    else:
-        fig = plot_stock_line(df_clean, ticker)
+def __getattr__(name):
+    """Build the default `app` (and its WSGI `server`) on first access, not at import"""
+    global _default_app
+    if name in ("app", "server"):
+        if _default_app is None:
+            _default_app = create_app()
+        return _default_app if name == "app" else _default_app.server
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    return fig
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    configure_logging()
+    create_app().run(debug=True)
@@ -0,0 +1,88 @@
+"""Memoization of rendered figures and HTTP caching for Dash responses"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+from src.config import FIGURE_CACHE_SIZE
+
+
+class FigureCache:
+    """Bounded LRU cache of rendered figures
+
+    Keys should include everything the figure depends on, e.g.
+    (ticker, horizon, visible range, data version).
+    """
+
+    def __init__(self, max_entries: int = FIGURE_CACHE_SIZE):
+        """
+        Initialises a FigureCache object.
+
+        Args:
+            max_entries (int, optional): The maximum number of cached figures. Defaults to FIGURE_CACHE_SIZE.
+
+        Returns:
+            None
+        """
+        self.max_entries = max_entries
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key, build):
+        """
+        Return the cached figure for `key`, building it with `build()` on a miss.
+
+        Args:
+            key (tuple): The cache key.
+            build (callable): Zero-argument function returning the figure.
+
+        Returns:
+            go.Figure: The figure. Callers must not mutate it.
+        """
+        with self._lock:
+            if key in self._figures:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return self._figures[key]
+            self.misses += 1
+        fig = build()
+        with self._lock:
+            self._figures[key] = fig
+            while len(self._figures) > self.max_entries:
+                self._figures.popitem(last=False)
+        return fig
+
+    def clear(self):
+        """Drop every cached figure, e.g. after the dataset was refreshed"""
+        with self._lock:
+            self._figures.clear()
+
+
+def add_etag_support(server):
+    """
+    Add ETags to JSON responses and answer matching If-None-Match requests with 304.
+
+    Applies to the layout/dependency GETs and to callback POSTs, so clients that
+    revalidate (browsers for GETs, any client sending If-None-Match for POSTs)
+    don't download an unchanged response again. Registered after compression,
+    so it runs first and hashes the uncompressed body.
+
+    Args:
+        server (flask.Flask): The Dash app's Flask server.
+
+    Returns:
+        None
+    """
+    @server.after_request
+    def etag(response):
+        if response.status_code != 200 or response.direct_passthrough or response.mimetype != "application/json":
+            return response
+        tag = hashlib.sha1(response.get_data()).hexdigest()
+        response.set_etag(tag)
+        if tag in request.if_none_match:
+            response.status_code = 304
+            response.set_data(b"")
+        return response
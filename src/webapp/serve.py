@@ -0,0 +1,112 @@
+"""Production server: several gunicorn workers sharing one memory-mapped dataset
+
+Usage:
+    python -m src.webapp.serve [--workers N] [--bind HOST:PORT]
+
+The master process loads and cleans the dataset once and publishes it as a
+memory-mapped Arrow file. Each worker builds its own app, which attaches to
+the published file instead of loading the dataset again, so all workers
+share the same pages. Publishing a new version (see
+`SharedDataset.publish`) swaps the data atomically; workers pick it up on
+their next request. With a refresh interval, a separate scheduler process
+downloads, cleans and publishes new data in the background.
+"""
+import argparse
+import logging
+import multiprocessing
+
+from src.config import REFRESH_INTERVAL_SECONDS, SERVER_BIND, SERVER_WORKERS
+from src.data.shared import SharedDataset
+from src.instrumentation import configure_logging
+from src.webapp.state import DashboardState
+
+logger = logging.getLogger(__name__)
+
+
+def publish_current(shared: SharedDataset):
+    """
+    Load, clean and publish the current dataset if it isn't published yet.
+
+    Args:
+        shared (SharedDataset): The shared dataset to publish to.
+
+    Returns:
+        str: The published data version.
+    """
+    state = DashboardState()
+    version = state.ensure_loaded().version
+    if shared.published_version() != version:
+        path = shared.publish(state.partitions, version)
+        logger.info("published dataset version=%s path=%s", version, path)
+    return version
+
+
+def create_worker_app():
+    """Build a worker's WSGI app attached to the shared dataset"""
+    from src.webapp.app import create_app
+
+    configure_logging()
+    return create_app(DashboardState(shared=SharedDataset()), preload="eager").server
+
+
+def start_refresher(interval: float):
+    """
+    Start a scheduler process that refreshes and publishes the shared dataset.
+
+    The process is spawned rather than forked so it shares no threads or
+    locks with the gunicorn master.
+
+    Args:
+        interval (float): Seconds between refreshes.
+
+    Returns:
+        multiprocessing.Process: The scheduler process.
+    """
+    from src.scheduler import main
+
+    process = multiprocessing.get_context("spawn").Process(
+        target=main, kwargs={"interval": interval, "shared": True}, name="dashboard-refresh", daemon=True
+    )
+    process.start()
+    return process
+
+
+def run(workers: int = SERVER_WORKERS, bind: str = SERVER_BIND, refresh_interval: float = REFRESH_INTERVAL_SECONDS):
+    """
+    Publish the dataset and serve the dashboard with gunicorn.
+
+    Args:
+        workers (int, optional): The number of worker processes. Defaults to SERVER_WORKERS.
+        bind (str, optional): The address to listen on. Defaults to SERVER_BIND.
+        refresh_interval (float, optional): Seconds between background data refreshes, 0 disables them.
+            Defaults to REFRESH_INTERVAL_SECONDS.
+
+    Returns:
+        None
+    """
+    from gunicorn.app.base import BaseApplication
+
+    class DashboardServer(BaseApplication):
+        def load_config(self):
+            self.cfg.set("workers", workers)
+            self.cfg.set("bind", bind)
+            # Workers import the app after forking, so no threads or mappings are inherited
+            self.cfg.set("preload_app", False)
+
+        def load(self):
+            return create_worker_app()
+
+    publish_current(SharedDataset())
+    if refresh_interval:
+        start_refresher(refresh_interval)
+    DashboardServer().run()
+
+
+if __name__ == "__main__":
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Serve the dashboard with multiple workers")
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    parser.add_argument("--bind", default=SERVER_BIND)
+    parser.add_argument("--refresh-interval", type=float, default=REFRESH_INTERVAL_SECONDS)
+    args = parser.parse_args()
+    run(workers=args.workers, bind=args.bind, refresh_interval=args.refresh_interval)
@@ -0,0 +1,357 @@
+"""Data and models served by the dashboard, loaded lazily"""
+import contextlib
+import glob
+import importlib.util
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+from src.config import CLEAN_CACHE_DIR, CSV_CHUNKSIZE, DATASETS, INTRADAY_WINDOW_DAYS, MODEL_DIR, PREDICTOR_LAG
+from src.data.data_loader import CSVDataLoader, get_data, get_data_version, get_loader
+from src.data.incremental import IncrementalProcessor
+from src.data.intraday import PartitionedStore
+from src.data.partition import TickerPartitions
+from src.data.processor import compact_frame, process_data, remove_outliers
+from src.data.rollup import pick_tier
+from src.models.analytics import CrossTickerAnalytics
+from src.models.indicators import IndicatorEngine
+from src.models.registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+# Column of the cached rejected rows holding their position in the raw history
+REJECTED_ROW_COLUMN = "raw_row"
+
+
+class DashboardState:
+    """The cleaned, ticker-partitioned dataset and model registry behind the dashboard
+
+    Nothing is loaded at construction. `ensure_loaded` loads the data on first
+    use, or `load_in_background` warms it up while the server starts. The
+    cleaned frame of each data version is kept in a Parquet warm cache (when
+    pyarrow is installed), so restarts skip parsing and cleaning the CSV.
+
+    The version and partitions are held as one immutable snapshot, so a
+    request that reads `snapshot()` once never mixes two data versions, even
+    while a refresh swaps in new data. With a `SharedDataset`, the snapshot is
+    attached zero-copy from the published file, and a newly published version
+    is picked up on the next request.
+
+    The snapshot is the whole cleaned dataset for every storage format,
+    SQLite included: the cross-ticker views and forecasts read every ticker's
+    history, and outliers are removed with bounds over a ticker's full
+    history, so rows filtered in the engine per request would not match the
+    served data. SQL filters and aggregates serve `get_data` and the rollups.
+
+    With `incremental`, an `IncrementalProcessor` is fitted whenever the
+    dataset is cleaned, from its file or from the warm cache (which then also
+    keeps the rejected outlier rows), so a refresh that appended rows only
+    cleans those rows instead of the whole history again.
+    """
+
+    def __init__(self, dataset: str = "COMBINED", cache_dir=CLEAN_CACHE_DIR, shared=None, intraday_store=None,
+                 incremental: bool = False):
+        """
+        Initialises a DashboardState object.
+
+        Args:
+            dataset (str, optional): The dataset to serve. Defaults to "COMBINED".
+            cache_dir (str, optional): The warm cache directory, None disables it. Defaults to CLEAN_CACHE_DIR.
+            shared (SharedDataset, optional): Attach to this published dataset instead of loading the file.
+            intraday_store (PartitionedStore, optional): The intraday bars. Defaults to a store at INTRADAY_DIR.
+            incremental (bool, optional): Keep the raw history in an IncrementalProcessor so appended
+                rows can be cleaned on their own, at the cost of holding it in memory. Defaults to False.
+
+        Returns:
+            None
+        """
+        self.dataset = dataset
+        self.cache_dir = cache_dir if importlib.util.find_spec("pyarrow") else None
+        self.shared = shared
+        self.processor = IncrementalProcessor(group_by="ticker") if incremental else None
+        self._processor_version = None
+        self.intraday_store = intraday_store if intraday_store is not None else PartitionedStore()
+        self._snapshot = None
+        self.registry = ModelRegistry(persist_dir=MODEL_DIR)
+        self.indicator_engine = IndicatorEngine()
+        self._indicators = None
+        self._analytics = None
+        self.tier_partitions = {}
+        self.timings = {}
+        self._swap_listeners = []
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    @property
+    def version(self):
+        return self._snapshot[0] if self._snapshot else None
+
+    @property
+    def partitions(self):
+        return self._snapshot[1] if self._snapshot else None
+
+    def snapshot(self):
+        """
+        Return the current (version, partitions), loading or re-attaching as needed.
+
+        Returns:
+            tuple[str, TickerPartitions]: The data version and its partitions.
+        """
+        self.ensure_loaded()
+        if self.shared is not None:
+            current = self.shared.refresh()
+            if current is not None and current[0] != self._snapshot[0]:
+                self.swap(*current)
+        return self._snapshot
+
+    def add_swap_listener(self, callback):
+        """Call `callback()` after every swap, e.g. to drop figures rendered from the old data"""
+        self._swap_listeners.append(callback)
+
+    def swap(self, version: str, partitions: TickerPartitions):
+        """
+        Atomically replace the served data and evict models of older versions.
+
+        A state that was never loaded is ready to serve once data is swapped in.
+
+        Args:
+            version (str): The new data version.
+            partitions (TickerPartitions): The new partitions.
+
+        Returns:
+            None
+        """
+        self._snapshot = (version, partitions)
+        self.tier_partitions = {}
+        self.registry.invalidate(version)
+        if os.path.exists(DATASETS["FORECASTS"]):
+            # Serve forecasts precomputed by `python -m src.update_forecasts`
+            self.registry.load_forecasts(get_data("FORECASTS"), version)
+        for callback in self._swap_listeners:
+            callback()
+        self._ready.set()
+
+    def ensure_loaded(self):
+        """Load the data if it isn't loaded yet, blocking until it is
+
+        Returns:
+            DashboardState: self
+        """
+        if not self._ready.is_set():
+            self.load()
+        return self
+
+    def load_in_background(self):
+        """Start loading the data in a daemon thread
+
+        Returns:
+            threading.Thread: The loading thread.
+        """
+        thread = threading.Thread(target=self.ensure_loaded, name="dashboard-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def load(self):
+        """Load, clean and partition the dataset, and prepare the model registry
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if self._ready.is_set():
+                return
+            start = time.perf_counter()
+            current = self.shared.attach() if self.shared is not None else None
+            if current is None:
+                version = get_data_version(self.dataset)
+                current = (version, self.prepare(version))
+            self.swap(*current)
+            self.timings["load"] = time.perf_counter() - start
+            logger.info("dataset ready dataset=%s version=%s seconds=%.2f", self.dataset, self.version, self.timings["load"])
+
+    def prepare(self, version, delta=None, since=None) -> TickerPartitions:
+        """
+        Clean, compact and partition a version of the dataset without serving it.
+
+        When `delta` holds the raw rows appended to version `since`, and the
+        incremental processor was fitted on that version, only the new rows are
+        cleaned; the processor refits the outlier bounds on the whole history
+        when they went stale. Otherwise the whole dataset is loaded and cleaned.
+
+        Args:
+            version (str): The data version, as returned by `get_data_version`.
+            delta (pd.DataFrame, optional): The raw rows appended since version `since`.
+            since (str, optional): The data version `delta` was appended to.
+
+        Returns:
+            TickerPartitions: The cleaned partitions, ready to `swap` in.
+        """
+        if delta is not None and self.processor is not None and since is not None and since == self._processor_version:
+            df_clean = self.processor.update(delta)
+            self._processor_version = version
+            logger.info("cleaned appended rows dataset=%s version=%s rows=%d", self.dataset, version, len(delta))
+            self._write_clean_cache(df_clean, version)
+        else:
+            df_clean = self._load_clean(version)
+        return TickerPartitions(compact_frame(df_clean))
+
+    def _cache_path(self, version, kind="clean"):
+        return os.path.join(self.cache_dir, f"{self.dataset.lower()}_{kind}_{version}.parquet")
+
+    def _write_cache(self, df: pd.DataFrame, version, kind="clean"):
+        """Replace the warm cache file of `kind` with this version's frame"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(version, kind)
+        for stale in glob.glob(os.path.join(self.cache_dir, f"{self.dataset.lower()}_{kind}_*.parquet")):
+            if stale != path:
+                # Another worker may have removed it already
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(stale)
+        # Written aside under a per-process name and renamed, so workers writing the same
+        # version never share a temporary file and readers never see a partial one
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def _write_clean_cache(self, df_clean: pd.DataFrame, version):
+        """Cache the cleaned frame and, with an incremental processor, the raw rows it rejected"""
+        if self.cache_dir is None:
+            return
+        self._write_cache(df_clean, version)
+        if self.processor is not None:
+            rejected = self.processor.rejected()
+            self._write_cache(rejected.reset_index(names=REJECTED_ROW_COLUMN), version, "rejected")
+
+    def _load_clean(self, version) -> pd.DataFrame:
+        """Return the cleaned dataset, from the warm cache when it holds this version"""
+        if self.cache_dir is not None and os.path.exists(self._cache_path(version)):
+            logger.info("loading cleaned data from warm cache dataset=%s version=%s", self.dataset, version)
+            df_clean = pd.read_parquet(self._cache_path(version))
+            if self.processor is not None and os.path.exists(self._cache_path(version, "rejected")):
+                # Refit the processor from the cache, so the next refresh stays incremental
+                rejected = pd.read_parquet(self._cache_path(version, "rejected")).set_index(REJECTED_ROW_COLUMN)
+                df_clean = self.processor.restore(df_clean, rejected)
+                self._processor_version = version
+            return df_clean
+
+        path = DATASETS[self.dataset]
+        if str(path).endswith(".csv"):
+            # Stream the CSV as typed chunks instead of parsing it into object columns first
+            df = CSVDataLoader(path, chunksize=CSV_CHUNKSIZE, process=True).load_data()
+        else:
+            # Read directly rather than through get_data, so the raw frame isn't also kept in the dataset cache
+            df = get_loader(path).load_data()
+        if self.processor is not None:
+            # Cleans like process_data, keeping the state needed to clean appended rows later
+            df_clean = self.processor.fit(df)
+            self._processor_version = version
+        elif str(path).endswith(".csv"):
+            df_clean = remove_outliers(df, by="ticker")
+        else:
+            df_clean = process_data(df, group_by="ticker")
+        self._write_clean_cache(df_clean, version)
+        return df_clean
+
+    def indicators(self, snapshot) -> pd.DataFrame:
+        """
+        Return the technical indicators of a snapshot, computed once per data version.
+
+        The indicators are kept in the warm cache next to the cleaned data.
+
+        Args:
+            snapshot (tuple): The (version, partitions) being served.
+
+        Returns:
+            pd.DataFrame: The indicators, indexed like the rows of the partitioned frame.
+        """
+        version, partitions = snapshot
+        cached = self._indicators
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        if self.cache_dir is not None and os.path.exists(self._cache_path(version, "indicators")):
+            indicators = pd.read_parquet(self._cache_path(version, "indicators"))
+        else:
+            indicators = self.indicator_engine.fit(partitions)
+            if self.cache_dir is not None:
+                self._write_cache(indicators, version, "indicators")
+        self._indicators = (version, indicators)
+        return indicators
+
+    def analytics(self, snapshot) -> CrossTickerAnalytics:
+        """
+        Return the cross-ticker analytics of a snapshot, pivoted once per data version.
+
+        The returned object memoises every statistic computed from it, so
+        charts of the same version share one computation.
+
+        Args:
+            snapshot (tuple): The (version, partitions) being served.
+
+        Returns:
+            CrossTickerAnalytics: The analytics of the snapshot's data.
+        """
+        version, partitions = snapshot
+        cached = self._analytics
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        analytics = CrossTickerAnalytics(partitions)
+        self._analytics = (version, analytics)
+        return analytics
+
+    def forecast(self, snapshot, ticker: str, days: int) -> list:
+        """Return the predicted closing prices for a ticker of a snapshot, empty for a zero horizon"""
+        version, partitions = snapshot
+        return self.registry.forecast(
+            ticker, partitions[ticker], days, lag=PREDICTOR_LAG, version=version
+        )
+
+    def partitions_for_range(self, snapshot, x_range):
+        """
+        Return the cleaned partitions of the coarsest rollup tier that fills the chart width.
+
+        Args:
+            snapshot (tuple): The (version, partitions) being served.
+            x_range (tuple or None): The visible (start, end) dates, or None for the full history.
+
+        Returns:
+            TickerPartitions: The cleaned data of the chosen tier.
+        """
+        partitions = snapshot[1]
+        if x_range is None:
+            dates = partitions.frame["date"]
+            x_range = (dates.min(), dates.max())
+        name = pick_tier(pd.Timestamp(x_range[0]).tz_localize(None), pd.Timestamp(x_range[1]).tz_localize(None))
+        if name == self.dataset:
+            return partitions
+        key = (name, get_data_version(name))
+        if key not in self.tier_partitions:
+            for stale in [k for k in self.tier_partitions if k[0] == name]:
+                del self.tier_partitions[stale]
+            self.tier_partitions[key] = TickerPartitions(compact_frame(process_data(get_data(name), group_by="ticker")))
+        return self.tier_partitions[key]
+
+    def intraday_window(self, ticker: str, x_range=None):
+        """
+        Return the intraday window to show for a ticker.
+
+        Args:
+            ticker (str): The ticker symbol.
+            x_range (tuple or None): The visible (start, end) times, or None for the last
+                INTRADAY_WINDOW_DAYS days of stored bars.
+
+        Returns:
+            tuple[pd.Timestamp, pd.Timestamp] or None: The window, None when the ticker has no intraday bars.
+        """
+        if x_range is not None:
+            return pd.Timestamp(x_range[0]), pd.Timestamp(x_range[1])
+        last = self.intraday_store.last_date(ticker)
+        if last is None:
+            return None
+        return last - pd.Timedelta(days=INTRADAY_WINDOW_DAYS), last
@@ -0,0 +1,30 @@
+import pandas as pd
+import pytest
+
+
+class FakePriceSource:
+    """Deterministic local price source standing in for Yahoo Finance, whose history grows when `end` is moved"""
+    def __init__(self, end="2024-01-10", fail_times=0):
+        self.end = end
+        self.fail_times = fail_times
+        self.calls = []
+
+    def history(self, ticker, period=None, start=None, interval="1d"):
+        self.calls.append((ticker, start))
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("network down")
+        dates = pd.date_range("2024-01-01", self.end, freq="D", tz="America/New_York", name="Date")
+        if start is not None:
+            dates = dates[dates >= start]
+        close = [100.0 + i for i in range(len(dates))]
+        return pd.DataFrame({
+            "Open": close, "High": close, "Low": close, "Close": close,
+            "Volume": 100, "Dividends": 0.0, "Stock Splits": 0.0
+        }, index=dates)
+
+
+@pytest.fixture
+def price_source():
+    """Factory of FakePriceSource objects"""
+    return FakePriceSource
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.data.partition import TickerPartitions
+from src.models import analytics as analytics_module
+from src.models.analytics import CrossTickerAnalytics, forward_fill, price_matrix
+from src.viz.charts import plot_correlation_heatmap, plot_drawdowns
+
+
+@pytest.fixture
+def clean():
+    # A crypto ticker trading every day next to stocks that skip weekends
+    rng = np.random.default_rng(7)
+    dates = pd.date_range("2023-01-01", periods=200, freq="D", tz="UTC")
+    frames = []
+    for ticker, weekdays_only in [("AAA", True), ("BBB", True), ("CCC", False)]:
+        d = dates[dates.dayofweek < 5] if weekdays_only else dates
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(d))))
+        frames.append(pd.DataFrame({"date": d, "close": close, "ticker": ticker}))
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.fixture
+def wide(clean):
+    return clean.pivot(index="date", columns="ticker", values="close")
+
+
+@pytest.fixture
+def returns(wide):
+    return pd.DataFrame({t: wide[t].dropna().pct_change() for t in wide}).reindex(wide.index)
+
+
+def test_price_matrix_aligns_dates(clean, wide):
+    dates, tickers, matrix = price_matrix(TickerPartitions(clean))
+    assert tickers == ["AAA", "BBB", "CCC"]
+    assert dates.equals(wide.index)
+    np.testing.assert_array_equal(matrix, wide.to_numpy())
+
+
+def test_price_matrix_aligns_bars_by_trading_date(clean, wide):
+    # Stocks stamped at New York midnight (04:00/05:00 UTC), crypto at 00:00 UTC
+    offset = pd.to_timedelta(np.where(clean["ticker"] == "CCC", 0, 4), unit="h")
+    offset += pd.to_timedelta(np.where(clean["date"].dt.month < 3, 1, 0), unit="h")
+    shifted = clean.assign(date=clean["date"] + offset)
+    dates, _, matrix = price_matrix(shifted)
+    assert dates.equals(wide.index)
+    np.testing.assert_array_equal(matrix, wide.to_numpy())
+
+    analytics = CrossTickerAnalytics(shifted)
+    assert not np.isnan(analytics.correlation()[1][0]).any()
+    drawdowns = analytics.max_drawdowns()
+    # Stock peaks and troughs fall on their own trading days, not on crypto-only weekend rows
+    assert (drawdowns.loc[["AAA", "BBB"], ["peak", "trough"]].apply(lambda d: d.dt.dayofweek) < 5).all().all()
+
+
+def test_forward_fill():
+    m = np.array([[np.nan, 1.0], [2.0, np.nan], [np.nan, 3.0]])
+    np.testing.assert_array_equal(forward_fill(m), [[np.nan, 1.0], [2.0, 1.0], [2.0, 3.0]])
+
+
+def test_returns_and_correlation_match_pandas(clean, returns):
+    analytics = CrossTickerAnalytics(clean)
+    np.testing.assert_allclose(analytics.returns(), returns.to_numpy())
+
+    ends, corr = analytics.correlation()
+    assert ends[-1] == returns.index[-1]
+    np.testing.assert_allclose(corr[0], returns.corr(min_periods=20).to_numpy())
+    assert analytics.correlation() is analytics.correlation() # memoised
+
+
+def test_rolling_covariance_and_correlation(clean, returns, monkeypatch):
+    analytics = CrossTickerAnalytics(clean)
+    ends, cov = analytics.covariance(window=30, step=10)
+    assert ends[-1] == returns.index[-1] and len(ends) == len(cov)
+    for i in [0, -1]:
+        expected = returns.loc[:ends[i]].iloc[-30:].cov(min_periods=20).to_numpy()
+        np.testing.assert_allclose(cov[i], expected)
+
+    # A window longer than the history spans all of it
+    ends, cov = analytics.covariance(window=1000)
+    assert len(ends) == 1
+    np.testing.assert_allclose(cov[0], returns.cov(min_periods=20).to_numpy())
+
+    # Windows gathered a few at a time give the same matrices
+    ends, cov = analytics.covariance(window=30, step=3)
+    monkeypatch.setattr(analytics_module, "ANALYTICS_CHUNK_BYTES", 3 * 30 * len(analytics.tickers) * 8 * 4)
+    chunked_ends, chunked = CrossTickerAnalytics(clean).covariance(window=30, step=3)
+    assert len(ends) > 4 and chunked_ends.equals(ends)
+    np.testing.assert_allclose(chunked, cov)
+
+    _, corr = analytics.correlation(window=30, step=10, min_periods=25)
+    # The stocks have 21 or 22 common returns in any 30 calendar days, fewer than min_periods
+    assert np.isnan(corr[-1][0, 1]) and corr[-1][2, 2] == pytest.approx(1.0)
+
+
+def test_max_drawdowns(clean, wide):
+    drawdowns = CrossTickerAnalytics(clean).max_drawdowns()
+    for ticker in wide:
+        close = wide[ticker].dropna()
+        drawdown = close / close.cummax() - 1
+        row = drawdowns.loc[ticker]
+        assert row["max_drawdown"] == pytest.approx(drawdown.min())
+        assert row["trough"] == drawdown.idxmin()
+        assert row["peak"] == close.loc[:row["trough"]].idxmax()
+
+
+def test_analytics_charts(clean):
+    analytics = CrossTickerAnalytics(clean)
+    heatmap = plot_correlation_heatmap(analytics, window=63)
+    assert np.asarray(heatmap.data[0].z).shape == (3, 3)
+    fig = plot_drawdowns(analytics, max_points=50)
+    assert len(fig.data) == 3 and len(fig.data[0].x) <= 50
+    # Decimation keeps the deepest drawdown of each block
+    assert np.nanmin(fig.data[0].y) == pytest.approx(analytics.max_drawdowns()["max_drawdown"].iloc[0])
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.models.backtest import backtest, walk_forward
+from src.models.predictive_model import StockPredictor
+
+
+def make_close(n=200, seed=1):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+
+
+@pytest.mark.parametrize("window", [None, 40])
+def test_walk_forward_matches_refitting(window):
+    close = make_close()
+    origins, predicted, actual = walk_forward(close, lag=3, days=4, min_train=30, window=window, step=25,
+                                              integer=False)
+    assert origins[0] == 33
+    for origin, row in zip(origins, predicted):
+        history = close[:origin]
+        train = history if window is None else history[-(window + 3):]
+        predictor = StockPredictor(lag=3)
+        predictor.train_array(train)
+        expected = predictor.predict_next(pd.DataFrame({
+            "date": pd.date_range("2024-01-01", periods=len(history)), "close": history
+        }))
+        assert row[0] == pytest.approx(expected, rel=1e-6)
+    assert np.isnan(actual[-1, -1]) == (origins[-1] + 3 >= len(close))
+
+
+def test_walk_forward_integer_matches_predict_array():
+    close = make_close()
+    origins, predicted, _ = walk_forward(close, lag=3, days=5, min_train=30, step=50)
+    predictor = StockPredictor(lag=3)
+    predictor.train_array(close[:origins[1]])
+    assert predicted[1].tolist() == predictor.predict_array(close[:origins[1]], 5)
+
+
+def test_backtest_metrics_per_ticker_and_horizon():
+    df = pd.DataFrame({
+        "date": np.tile(pd.date_range("2024-01-01", periods=200, tz="UTC"), 2),
+        "close": np.concatenate([make_close(seed=1), make_close(seed=2)]),
+        "ticker": ["AAPL"] * 200 + ["MSFT"] * 200
+    })
+    metrics = backtest(df, lag=3, days=3, min_train=50, max_workers=1)
+    assert metrics.shape == (6, 6)
+    assert metrics["n"].tolist() == [147, 146, 145] * 2
+    assert (metrics["rmse"] >= metrics["mae"]).all()
+    parallel = backtest(df, lag=3, days=3, min_train=50, max_workers=2)
+    pd.testing.assert_frame_equal(metrics, parallel)
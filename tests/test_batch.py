@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.data.partition import TickerPartitions
+from src.models.batch import forecast_all
+from src.models.predictive_model import StockPredictor
+from src.models.registry import ModelRegistry
+
+
+@pytest.fixture
+def partitions():
+    rng = np.random.default_rng(1)
+    frames = []
+    for ticker in ["AAPL", "MSFT", "TSLA"]:
+        frames.append(pd.DataFrame({
+            "date": pd.date_range("2024-01-01", periods=50, tz="UTC"),
+            "close": 100 + rng.normal(0, 1, 50).cumsum(),
+            "ticker": ticker
+        }))
+    return TickerPartitions(pd.concat(frames, ignore_index=True))
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_forecast_all_matches_single_ticker(partitions, max_workers):
+    forecasts = forecast_all(partitions, lag=3, days=5, max_workers=max_workers, version="v1")
+    assert forecasts.shape[0] == 15
+    assert set(forecasts["ticker"]) == {"AAPL", "MSFT", "TSLA"}
+
+    predictor = StockPredictor(lag=3)
+    predictor.train(partitions["MSFT"])
+    expected = predictor.predict_next_days(partitions["MSFT"], 5)
+    assert forecasts[forecasts["ticker"] == "MSFT"]["predicted_close"].tolist() == expected
+
+
+def test_registry_serves_precomputed_forecasts(partitions):
+    forecasts = forecast_all(partitions, lag=3, days=5, max_workers=1, version="v1")
+    registry = ModelRegistry(max_horizon=5)
+    assert registry.load_forecasts(forecasts, "v1") == 3
+    # df=None: served from the table without training
+    assert len(registry.forecast("AAPL", None, 5, lag=3, version="v1")) == 5
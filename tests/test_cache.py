@@ -0,0 +1,56 @@
+import os
+import pandas as pd
+import pytest
+from src.data.cache import DatasetCache
+from src.data.data_loader import get_data
+from src.config import DATASETS
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "data.csv"
+    pd.DataFrame({"a": [1, 2, 3]}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_cache_hit_and_miss(csv_path):
+    cache = DatasetCache()
+    calls = []
+    load = lambda: calls.append(1) or pd.read_csv(csv_path)
+    key = cache.make_key("data")
+    cache.get(key, csv_path, load)
+    cache.get(key, csv_path, load)
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["bytes"] > 0
+
+
+def test_cache_invalidates_on_file_change(csv_path):
+    cache = DatasetCache()
+    key = cache.make_key("data")
+    df1 = cache.get(key, csv_path, lambda: pd.read_csv(csv_path))
+    pd.DataFrame({"a": [1, 2, 3, 4]}).to_csv(csv_path, index=False)
+    os.utime(csv_path, ns=(0, os.stat(csv_path).st_mtime_ns + 10**9))
+    df2 = cache.get(key, csv_path, lambda: pd.read_csv(csv_path))
+    assert len(df1) == 3 and len(df2) == 4
+
+
+def test_cache_lru_eviction(csv_path):
+    frame = pd.DataFrame({"a": range(100)})
+    size = int(frame.memory_usage(deep=True).sum())
+    cache = DatasetCache(max_bytes=2 * size)
+    for name in ["x", "y", "z"]:
+        cache.get(cache.make_key(name), csv_path, lambda: frame.copy())
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= cache.max_bytes
+
+
+def test_get_data_returns_independent_copies(monkeypatch, csv_path):
+    monkeypatch.setitem(DATASETS, "TEST_CACHE", csv_path)
+    df1 = get_data("TEST_CACHE")
+    df1["a"] = 0
+    df2 = get_data("TEST_CACHE")
+    assert df2["a"].tolist() == [1, 2, 3]
@@ -1,7 +1,9 @@
 import os
 import pandas as pd
 import pytest
-from src.data.data_loader import CSVDataLoader, get_data
+from src.data.data_loader import CSVDataLoader, ParquetDataLoader, SQLDataLoader, get_data
+from src.data.processor import process_data, remove_outliers
+from src.data.sql_store import write_frame
 from src.config import DATASETS
 
 # --- Setup a temporary CSV for testing ---
@@ -38,6 +40,56 @@ def test_csv_loader_refresh(sample_csv):
     df2 = loader.load_data(refresh=True)  # Forces reload
     assert df1.equals(df2)
 
+@pytest.fixture
+def stock_csv(tmp_path):
+    df = pd.DataFrame({
+        "Date": ["2024-01-01 00:00:00-05:00", "2024-01-02 00:00:00-05:00", "2024-01-02 00:00:00-05:00",
+                 "2024-01-01 00:00:00-05:00", "2024-01-02 00:00:00-05:00"],
+        "Close": [1.0, 2.0, 2.0, None, 4.0],
+        "Volume": [100, 200, 200, 300, 400],
+        "Stock Splits": [0.0, 0.0, 0.0, 0.0, 0.0],
+        "Ticker": ["AAPL", "AAPL", "AAPL", "MSFT", "MSFT"]
+    })
+    path = tmp_path / "stock.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+def test_csv_loader_chunks_are_typed(stock_csv):
+    chunks = list(CSVDataLoader(stock_csv, chunksize=2).iter_chunks())
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert str(chunks[0]["Date"].dt.tz) == "UTC"
+    assert chunks[0]["Volume"].dtype == "int64"
+    assert chunks[0]["Ticker"].dtype == object
+
+def test_csv_loader_chunked_process(stock_csv):
+    df = CSVDataLoader(stock_csv, chunksize=2, process=True).load_data()
+    # The duplicate spans two chunks, the missing close is filled per chunk
+    assert df["close"].tolist() == [1.0, 2.0, 0.0, 4.0]
+    assert df["ticker"].tolist() == ["AAPL", "AAPL", "MSFT", "MSFT"]
+    assert list(df.columns) == ["date", "close", "volume", "stock_splits", "ticker"]
+
+def test_csv_loader_chunked_process_matches_process_data(stock_csv):
+    chunked = CSVDataLoader(stock_csv, chunksize=2, process=True).load_data()
+    expected = process_data(pd.read_csv(stock_csv)).reset_index(drop=True)
+    pd.testing.assert_frame_equal(remove_outliers(chunked), expected)
+
+@pytest.mark.parametrize("chunksize", [None, 2])
+def test_csv_loader_projection_and_filters(stock_csv, chunksize):
+    loader = CSVDataLoader(stock_csv, chunksize=chunksize, columns=["Close"], tickers="MSFT", start="2024-01-02")
+    df = loader.load_data()
+    assert list(df.columns) == ["Close"]
+    assert df["Close"].tolist() == [4.0]
+
+def test_get_data_filters_csv(monkeypatch, stock_csv):
+    monkeypatch.setitem(DATASETS, "TEST_STOCKS", stock_csv)
+    df = get_data("TEST_STOCKS", refresh=True, columns=["Date", "Ticker"], tickers=["AAPL"])
+    assert list(df.columns) == ["Date", "Ticker"]
+    assert df["Ticker"].tolist() == ["AAPL"] * 3
+
+def test_csv_loader_memory_cap(stock_csv):
+    with pytest.raises(MemoryError):
+        CSVDataLoader(stock_csv, chunksize=2, max_bytes=100).load_data()
+
 # --- Tests for get_data function ---
 
 def test_get_data_with_valid_name(monkeypatch, sample_csv):
@@ -51,3 +103,68 @@ def test_get_data_invalid_name():
     with pytest.raises(ValueError) as exc:
         get_data("NON_EXISTENT")
     assert "Dataset NON_EXISTENT not found" in str(exc.value)
+
+# --- Tests for ParquetDataLoader ---
+
+@pytest.fixture
+def sample_parquet(tmp_path):
+    df = pd.DataFrame({
+        "Date": pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-01", "2024-01-02"], utc=True),
+        "Close": [1.0, 2.0, 3.0, 4.0],
+        "Ticker": ["AAPL", "AAPL", "MSFT", "MSFT"]
+    })
+    path = tmp_path / "sample.parquet"
+    df.to_parquet(path, index=False)
+    return str(path)
+
+def test_parquet_loader_loads_typed_file(sample_parquet):
+    df = ParquetDataLoader(sample_parquet).load_data()
+    assert df.shape == (4, 3)
+    assert pd.api.types.is_datetime64_any_dtype(df["Date"])
+
+def test_parquet_loader_projection_and_filters(sample_parquet):
+    loader = ParquetDataLoader(
+        sample_parquet, columns=["Date", "Close"], tickers="MSFT", start="2024-01-02"
+    )
+    df = loader.load_data()
+    assert list(df.columns) == ["Date", "Close"]
+    assert df["Close"].tolist() == [4.0]
+
+def test_get_data_picks_loader_by_extension(monkeypatch, sample_parquet):
+    monkeypatch.setitem(DATASETS, "TEST_PARQUET", sample_parquet)
+    df = get_data("TEST_PARQUET", refresh=True, tickers=["AAPL"])
+    assert df["Ticker"].unique().tolist() == ["AAPL"]
+
+# --- Tests for SQLDataLoader ---
+
+@pytest.fixture
+def sample_sqlite(tmp_path):
+    df = pd.DataFrame({
+        "Date": ["2024-01-01 00:00:00-05:00", "2024-01-02 00:00:00-05:00",
+                 "2024-01-01 00:00:00-05:00", "2024-01-02 00:00:00-05:00"],
+        "Close": [1.0, 2.0, 3.0, None],
+        "Ticker": ["AAPL", "AAPL", "MSFT", "MSFT"]
+    })
+    path = tmp_path / "sample.sqlite"
+    write_frame(df, path)
+    return str(path)
+
+def test_sql_loader_loads_typed_rows(sample_sqlite):
+    df = SQLDataLoader(sample_sqlite).load_data()
+    assert df.shape == (4, 3)
+    assert df["Date"].iloc[0] == pd.Timestamp("2024-01-01 05:00", tz="UTC")
+    assert df["Close"].isna().sum() == 1
+
+def test_sql_loader_filters_run_in_the_engine(sample_sqlite):
+    loader = SQLDataLoader(sample_sqlite, columns=["Date", "Close"], tickers="AAPL", start="2024-01-02")
+    df = loader.load_data()
+    assert list(df.columns) == ["Date", "Close"]
+    assert df["Close"].tolist() == [2.0]
+    plan = loader.query('EXPLAIN QUERY PLAN SELECT * FROM stocks WHERE "Ticker" IN (?) AND "Date" >= ?',
+                        ["AAPL", "2024-01-02"])
+    assert "USING INDEX stocks_ticker_date" in plan["detail"].iloc[0]
+
+def test_get_data_sqlite(monkeypatch, sample_sqlite):
+    monkeypatch.setitem(DATASETS, "TEST_SQLITE", sample_sqlite)
+    df = get_data("TEST_SQLITE", refresh=True, tickers=["MSFT"])
+    assert df["Ticker"].unique().tolist() == ["MSFT"]
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+from src.data.partition import TickerPartitions
+from src.viz.charts import plot_stock_line
+from src.viz.downsample import downsample, lttb, minmax
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    x = np.arange(1000, dtype=float)
+    y = np.zeros(1000)
+    y[500] = 100.0
+    idx = lttb(x, y, 50)
+    assert len(idx) == 50
+    assert idx[0] == 0 and idx[-1] == 999
+    assert 500 in idx
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_minmax_keeps_bucket_extremes():
+    y = np.sin(np.arange(1000) / 10)
+    idx = minmax(y, 100)
+    assert len(idx) <= 100
+    assert y[idx].max() == y.max() and y[idx].min() == y.min()
+
+
+def test_downsample_leaves_small_series_untouched():
+    df = pd.DataFrame({"date": pd.date_range("2024-01-01", periods=10, tz="UTC"), "close": range(10)})
+    assert downsample(df, 100) is df
+    assert len(downsample(df, 5)) == 5
+
+
+def test_chart_refetches_visible_range_at_full_budget():
+    df = pd.DataFrame({
+        "date": pd.date_range("2000-01-01", periods=5000, tz="UTC"),
+        "close": np.random.default_rng(0).normal(size=5000).cumsum(),
+        "ticker": "AAPL"
+    })
+    partitions = TickerPartitions(df)
+    assert len(plot_stock_line(partitions, "AAPL", max_points=100).data[0].x) == 100
+    zoomed = plot_stock_line(partitions, "AAPL", x_range=("2001-01-01", "2001-01-31"), max_points=100)
+    assert len(zoomed.data[0].x) == 31
@@ -0,0 +1,29 @@
+from flask import Flask, jsonify
+from src.webapp.figure_cache import FigureCache, add_etag_support
+
+
+def test_figure_cache_lru():
+    cache = FigureCache(max_entries=2)
+    builds = []
+    build = lambda key: lambda: builds.append(key) or {"key": key}
+    cache.get_or_build("a", build("a"))
+    cache.get_or_build("b", build("b"))
+    cache.get_or_build("a", build("a"))  # hit, "b" is now least recently used
+    cache.get_or_build("c", build("c"))
+    cache.get_or_build("a", build("a"))
+    cache.get_or_build("b", build("b"))
+    assert builds == ["a", "b", "c", "b"]
+    assert cache.hits == 2
+
+
+def test_etag_not_modified():
+    server = Flask(__name__)
+    server.add_url_rule("/data", "data", lambda: jsonify(value=1), methods=["GET", "POST"])
+    add_etag_support(server)
+    client = server.test_client()
+
+    response = client.post("/data")
+    etag = response.headers["ETag"]
+    assert response.status_code == 200
+    cached = client.post("/data", headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.data == b""
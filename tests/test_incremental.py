@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.config import DATASETS
+from src.data.data_loader import get_data_version
+from src.data.incremental import IncrementalProcessor
+from src.data.processor import process_data
+from src.webapp.state import DashboardState
+
+
+@pytest.fixture
+def raw():
+    rng = np.random.default_rng(0)
+    n = 200
+    return pd.DataFrame({
+        "Date": np.tile(pd.date_range("2024-01-01", periods=n // 2, tz="UTC").astype(str), 2),
+        "Close": np.concatenate([rng.normal(100, 5, n // 2), rng.normal(1000, 50, n // 2)]),
+        "Ticker": ["AAPL"] * (n // 2) + ["BTC"] * (n // 2),
+    })
+
+
+def full(df):
+    return process_data(df.copy(), group_by="ticker").reset_index(drop=True)
+
+
+def test_fit_matches_process_data(raw):
+    cleaned = IncrementalProcessor(group_by="ticker").fit(raw.copy())
+    pd.testing.assert_frame_equal(cleaned.reset_index(drop=True), full(raw))
+
+
+def test_update_cleans_only_delta(raw):
+    processor = IncrementalProcessor(group_by="ticker", drift_threshold=0.5)
+    processor.fit(raw.iloc[:190].copy())
+    cleaned = processor.update(raw.iloc[190:].copy())
+    assert not processor.is_stale()
+    # Within the drift threshold the result only differs from a full rerun
+    # through the outlier bounds, which were fitted on 95% of the rows
+    expected = full(raw)
+    assert abs(len(cleaned) - len(expected)) <= 0.05 * len(expected)
+
+
+def test_update_skips_seen_rows(raw):
+    processor = IncrementalProcessor(group_by="ticker")
+    before = len(processor.fit(raw.copy()))
+    assert len(processor.update(raw.iloc[:10].copy())) == before
+
+
+def test_stale_bounds_trigger_full_recompute(raw):
+    processor = IncrementalProcessor(group_by="ticker", drift_threshold=0.0)
+    processor.fit(raw.iloc[:150].copy())
+    cleaned = processor.update(raw.iloc[150:].copy())
+    pd.testing.assert_frame_equal(cleaned.reset_index(drop=True), full(raw))
+
+
+def test_new_group_triggers_full_recompute(raw):
+    processor = IncrementalProcessor(group_by="ticker", drift_threshold=1.0)
+    processor.fit(raw.iloc[:100].copy())
+    cleaned = processor.update(raw.iloc[100:].copy())
+    pd.testing.assert_frame_equal(cleaned.reset_index(drop=True), full(raw))
+
+
+def test_dashboard_state_cleans_only_appended_rows(raw, tmp_path, monkeypatch):
+    path = tmp_path / "stocks.csv"
+    raw.iloc[:190].to_csv(path, index=False)
+    monkeypatch.setitem(DATASETS, "TEST_STOCKS", str(path))
+    state = DashboardState("TEST_STOCKS", cache_dir=None, incremental=True)
+    since = get_data_version("TEST_STOCKS")
+    before = len(state.prepare(since).frame)
+
+    raw.iloc[190:].to_csv(path, mode="a", header=False, index=False)
+    version = get_data_version("TEST_STOCKS")
+    monkeypatch.setattr(state, "_load_clean", lambda version: pytest.fail("reloaded the whole dataset"))
+    partitions = state.prepare(version, delta=raw.iloc[190:].copy(), since=since)
+    assert before < len(partitions.frame) <= before + 10
+    # A delta that doesn't follow the fitted version falls back to a full load
+    with pytest.raises(pytest.fail.Exception):
+        state.prepare("other", delta=raw.iloc[190:].copy(), since=since)
+
+
+def test_warm_cache_restores_the_processor(raw, tmp_path, monkeypatch):
+    path = tmp_path / "stocks.csv"
+    raw.iloc[:190].to_csv(path, index=False)
+    monkeypatch.setitem(DATASETS, "TEST_STOCKS", str(path))
+    since = get_data_version("TEST_STOCKS")
+    DashboardState("TEST_STOCKS", cache_dir=str(tmp_path / "cache"), incremental=True).prepare(since)
+    fitted = IncrementalProcessor(group_by="ticker")
+    fitted.fit(raw.iloc[:190].copy())
+
+    # A restarted state loads from the warm cache, and still cleans only the appended rows
+    state = DashboardState("TEST_STOCKS", cache_dir=str(tmp_path / "cache"), incremental=True)
+    state.prepare(since)
+    pd.testing.assert_frame_equal(state.processor.raw, fitted.raw)
+    raw.iloc[190:].to_csv(path, mode="a", header=False, index=False)
+    monkeypatch.setattr(state, "_load_clean", lambda version: pytest.fail("reloaded the whole dataset"))
+    partitions = state.prepare(get_data_version("TEST_STOCKS"), delta=raw.iloc[190:].copy(), since=since)
+    expected = fitted.update(raw.iloc[190:].copy())
+    assert len(partitions.frame) == len(expected)
+    pd.testing.assert_frame_equal(state.processor.cleaned, expected)
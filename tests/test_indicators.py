@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.data.partition import TickerPartitions
+from src.models.indicators import IndicatorEngine
+
+
+def make_prices(n=120, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for ticker, start in [("AAPL", 100.0), ("MSFT", 300.0)]:
+        close = start * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+        frames.append(pd.DataFrame({
+            "date": pd.date_range("2024-01-01", periods=n, tz="UTC"),
+            "close": close,
+            "ticker": ticker
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_fit_matches_per_ticker_pandas():
+    df = make_prices()
+    indicators = IndicatorEngine().fit(df)
+    partitions = TickerPartitions(df)
+    msft = partitions["MSFT"]
+    close = msft["close"]
+    expected_sma = close.rolling(20).mean()
+    expected_ema = close.ewm(span=12, adjust=False).mean()
+    np.testing.assert_allclose(indicators.loc[msft.index, "sma_20"], expected_sma)
+    np.testing.assert_allclose(indicators.loc[msft.index, "ema_12"], expected_ema)
+    rsi = indicators.loc[msft.index, "rsi_14"]
+    assert rsi.iloc[:14].isna().all() and rsi.iloc[14:].between(0, 100).all()
+    assert (indicators["bb_upper"].dropna() >= indicators["bb_lower"].dropna()).all()
+
+
+def test_update_matches_full_fit():
+    df = make_prices()
+    full = IndicatorEngine().fit(df)
+    head = df[df.groupby("ticker").cumcount(ascending=False) >= 5]
+    engine = IndicatorEngine()
+    engine.fit(head)
+
+    partitions = TickerPartitions(df)
+    for ticker in partitions.tickers:
+        rows = partitions[ticker].iloc[-5:]
+        for idx, close in rows["close"].items():
+            result = engine.update(ticker, close)
+            for col in engine.columns:
+                assert result[col] == pytest.approx(full.at[idx, col], rel=1e-9)
+
+
+def test_update_new_ticker_fills_windows():
+    engine = IndicatorEngine(sma_windows=(3,), ema_spans=(3,), rsi_period=2, bollinger_window=3, volatility_window=2)
+    results = [engine.update("NEW", c) for c in [1.0, 2.0, 3.0, 4.0]]
+    assert np.isnan(results[1]["sma_3"]) and results[2]["sma_3"] == pytest.approx(2.0)
+    assert results[3]["sma_3"] == pytest.approx(3.0)
+    assert results[3]["rsi_2"] == 100.0
+
+
+def test_chart_overlays_follow_fixed_traces():
+    from src.viz.charts import plot_stock_with_prediction
+
+    partitions = TickerPartitions(make_prices())
+    indicators = IndicatorEngine().fit(partitions)
+    fig = plot_stock_with_prediction(partitions, "AAPL", [1, 2], indicators=indicators,
+                                     overlays=["sma_20", "bollinger"], max_points=50)
+    assert [t.name for t in fig.data] == ["Historical", "Predicted", "SMA 20", "Bollinger bands", "Bollinger bands"]
+    assert list(fig.data[2].x) == list(fig.data[0].x)
+    assert len(fig.data[2].y) == 50
+    # LTTB keeps the last bar, whose overlay value must be that bar's indicator
+    assert fig.data[2].y[-1] == pytest.approx(indicators.at[partitions["AAPL"].index[-1], "sma_20"])
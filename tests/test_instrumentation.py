@@ -0,0 +1,70 @@
+import sys
+import time
+
+import pandas as pd
+import pytest
+from flask import Flask
+from src.instrumentation import Metrics, process_uptime, register_endpoints, timed
+
+
+def test_timed_decorator_records_rows_and_bytes():
+    registry = Metrics()
+
+    @timed("data.make", registry=registry)
+    def make(n):
+        return pd.DataFrame({"x": range(n)})
+
+    make(10)
+    make(5)
+    series = registry.snapshot()["data.make"]
+    assert series["count"] == 2 and series["rows"] == 15
+    assert series["bytes"] == 15 * 8
+    assert series["buckets"]["+Inf"] == 2
+
+
+def test_timed_decorator_ignores_size_of_non_array_results():
+    from dash import Patch
+    registry = Metrics()
+    timed("chart.patch", registry=registry)(Patch)()
+    series = registry.snapshot()["chart.patch"]
+    assert (series["count"], series["rows"], series["bytes"]) == (1, 0, 0)
+
+
+def test_timed_context_manager_and_errors():
+    registry = Metrics()
+    with timed("block", registry=registry) as t:
+        t.record(rows=3, nbytes=24)
+    with pytest.raises(KeyError):
+        with timed("block", registry=registry, expected=(KeyError,)):
+            raise KeyError("control flow")
+    with pytest.raises(ValueError):
+        with timed("block", registry=registry):
+            raise ValueError("boom")
+    series = registry.snapshot()["block"]
+    assert (series["count"], series["rows"], series["bytes"], series["errors"]) == (3, 3, 24, 1)
+
+
+def test_metrics_endpoint_and_profiling(tmp_path):
+    registry = Metrics()
+    server = Flask(__name__)
+
+    @server.route("/work")
+    def work():
+        return "done"
+
+    register_endpoints(server, registry=registry, profile_requests=True, profile_dir=str(tmp_path))
+    client = server.test_client()
+    assert "X-Profile-File" not in client.get("/work").headers
+    response = client.get("/work?profile=1")
+    assert (tmp_path / response.headers["X-Profile-File"].split("/")[-1]).exists()
+
+    text = client.get("/metrics").get_data(as_text=True)
+    assert "dashboard_http_work_seconds_count 2" in text
+    assert client.get("/metrics?format=json").json["http.work"]["bytes"] == 8
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="read from /proc")
+def test_process_uptime_is_wall_clock():
+    before = process_uptime()
+    time.sleep(0.05) # wall-clock time that takes no CPU time
+    assert before > 0 and process_uptime() - before >= 0.04
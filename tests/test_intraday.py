@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.data.intraday import PartitionedStore, partition_bounds, update_intraday
+from src.data.stock_downloader import StockDownloader
+
+
+@pytest.fixture
+def bars():
+    # Two tickers, 3 sessions of minute bars (2015-01-01, -02 and -05), 14:30-21:00 UTC
+    sessions = pd.bdate_range("2015-01-01", periods=3) + pd.Timedelta(hours=14, minutes=30)
+    dates = pd.DatetimeIndex([d + pd.Timedelta(minutes=m) for d in sessions for m in range(390)], tz="UTC")
+    frames = []
+    for ticker, base in [("T0000", 100.0), ("T0001", 50.0)]:
+        close = base + pd.Series(range(len(dates)), dtype=float) / 100
+        frames.append(pd.DataFrame({
+            "Date": dates.astype(str), "Open": close, "High": close + 0.05, "Low": close - 0.05, "Close": close,
+            "Volume": 1000, "Dividends": 0.0, "Stock Splits": 0.0, "Ticker": ticker
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.fixture(params=["csv", "parquet"])
+def store(tmp_path, request):
+    return PartitionedStore(tmp_path / "intraday", fmt=request.param)
+
+
+def test_partition_bounds():
+    assert partition_bounds("2024-02-03") == (pd.Timestamp("2024-02-03", tz="UTC"), pd.Timestamp("2024-02-04", tz="UTC"))
+    assert partition_bounds("2024-02")[1] == pd.Timestamp("2024-03-01", tz="UTC")
+
+
+def test_write_partitions_by_ticker_and_day(store, bars):
+    store.write(bars)
+    assert store.tickers() == ["T0000", "T0001"]
+    assert [p.stem for _, _, p in store.partitions("T0000")] == ["2015-01-01", "2015-01-02", "2015-01-05"]
+
+    # Re-writing overlapping bars replaces them instead of duplicating
+    store.write(bars[bars["Ticker"] == "T0000"].tail(10))
+    assert len(store.load("T0000")) == 390 * 3
+
+
+def test_load_reads_only_overlapping_partitions(store, bars):
+    store.write(bars)
+    start, end = "2015-01-02 15:00", "2015-01-02 16:00"
+    assert [p.stem for _, _, p in store.partitions("T0001", start, end)] == ["2015-01-02"]
+    df = store.load("T0001", start, end)
+    assert len(df) == 61
+    assert df["Date"].is_monotonic_increasing and set(df["Ticker"]) == {"T0001"}
+
+    clean = store.load("T0001", start, end, clean=True)
+    assert {"date", "close", "ticker"} <= set(clean.columns)
+    assert clean["date"].between(pd.Timestamp(start, tz="UTC"), pd.Timestamp(end, tz="UTC")).all()
+
+
+def test_compact_merges_old_days_into_months(store, bars):
+    store.write(bars)
+    before = store.load()
+    version = store.version("T0000")
+
+    assert store.compact(now="2015-01-20") == [] # January is not over yet
+    written = store.compact(now="2015-02-10")
+    assert sorted(p.stem for p in written) == ["2015-01", "2015-01"]
+    assert [p.stem for _, _, p in store.partitions("T0000")] == ["2015-01"]
+    assert store.version("T0000") != version
+    pd.testing.assert_frame_equal(store.load(), before)
+
+    # Late bars of a compacted month are merged into the month file
+    late = bars[bars["Ticker"] == "T0000"].head(5).assign(Close=1.0)
+    store.write(late)
+    assert [p.stem for _, _, p in store.partitions("T0000")] == ["2015-01"]
+    assert store.load("T0000", end=late["Date"].iloc[-1])["Close"].tolist() == [1.0] * 5
+
+
+def test_clean_load_is_independent_of_compaction(store):
+    # A month of noisy minute bars with spikes, whose outlier bounds differ per day
+    rng = np.random.default_rng(3)
+    sessions = pd.bdate_range("2015-01-01", "2015-01-31") + pd.Timedelta(hours=14, minutes=30)
+    dates = pd.DatetimeIndex([d + pd.Timedelta(minutes=m) for d in sessions for m in range(390)], tz="UTC")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, len(dates))))
+    close[rng.choice(len(dates), 50, replace=False)] *= 1.05
+    bars = pd.DataFrame({
+        "Date": dates, "Open": close, "High": close * 1.001, "Low": close * 0.999, "Close": close,
+        "Volume": rng.integers(100, 10000, len(dates)), "Dividends": 0.0, "Stock Splits": 0.0
+    })
+    store.write(bars, ticker="T0000")
+    before = store.load("T0000", clean=True)
+    assert 0 < len(before) < len(bars)
+
+    store.compact(now="2015-03-01")
+    assert [p.stem for _, _, p in store.partitions("T0000")] == ["2015-01"]
+    pd.testing.assert_frame_equal(store.load("T0000", clean=True), before)
+
+
+class FakeIntradaySource:
+    def __init__(self, bars):
+        self.bars = bars
+        self.starts = []
+
+    def history(self, ticker, period=None, start=None, interval="1m"):
+        self.starts.append(start)
+        rows = self.bars[self.bars["Ticker"] == ticker].drop(columns="Ticker")
+        rows = rows.assign(Date=pd.to_datetime(rows["Date"], utc=True)).set_index("Date")
+        return rows if start is None else rows[rows.index >= start]
+
+
+def test_update_intraday_fetches_since_last_bar(store, bars):
+    source = FakeIntradaySource(bars[pd.to_datetime(bars["Date"], utc=True) < "2015-01-05"])
+    downloader = StockDownloader(["T0000"], interval="1m", out_dir=store.root, fmt=store.fmt, source=source)
+    update_intraday(store, downloader)
+    source.bars = bars
+    update_intraday(store, downloader)
+    assert source.starts[1] == pd.Timestamp("2015-01-02 20:59", tz="UTC")
+    assert len(store.load("T0000")) == 390 * 3
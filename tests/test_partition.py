@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+from src.data.partition import TickerPartitions
+
+
+@pytest.fixture
+def partitions():
+    df = pd.DataFrame({
+        "date": pd.to_datetime(["2024-01-03", "2024-01-01", "2024-01-02", "2024-01-02", "2024-01-01"], utc=True),
+        "close": [3.0, 1.0, 2.0, 20.0, 10.0],
+        "ticker": ["MSFT", "MSFT", "MSFT", "AAPL", "AAPL"]
+    })
+    return TickerPartitions(df)
+
+
+def test_partitions_keep_first_appearance_order(partitions):
+    assert partitions.tickers == ["MSFT", "AAPL"]
+    assert "AAPL" in partitions and "TSLA" not in partitions
+
+
+def test_partition_slice_is_date_sorted(partitions):
+    df = partitions["MSFT"]
+    assert df["close"].tolist() == [1.0, 2.0, 3.0]
+    assert partitions.get("TSLA") is None
+
+
+def test_partition_date_range(partitions):
+    assert partitions.range("MSFT", start="2024-01-02")["close"].tolist() == [2.0, 3.0]
+    assert partitions.range("MSFT", end="2024-01-02")["close"].tolist() == [1.0, 2.0]
+    assert partitions.range("AAPL", "2024-01-02", "2024-01-02")["close"].tolist() == [20.0]
+
+
+def test_categorical_tickers(partitions):
+    df = partitions.frame.assign(ticker=partitions.frame["ticker"].astype("category"))
+    compact = TickerPartitions(df)
+    assert compact.offsets == partitions.offsets
+    assert compact["MSFT"]["close"].tolist() == [1.0, 2.0, 3.0]
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+from src.models.predictive_model import StockPredictor, lag_matrix
+
+
+@pytest.fixture
+def df_ticker():
+    close = 100 + np.sin(np.arange(80) / 4) * 10 + np.arange(80) * 0.5
+    df = pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=80, tz="UTC"),
+        "close": close,
+    })
+    return df.sample(frac=1, random_state=0)  # unsorted on purpose
+
+
+def test_lag_matrix_matches_shift():
+    close = np.arange(10, dtype=float)
+    X, y = lag_matrix(close, 3)
+    expected = pd.DataFrame({f"lag_{i}": pd.Series(close).shift(i) for i in range(1, 4)}).dropna()
+    np.testing.assert_array_equal(X, expected.to_numpy())
+    np.testing.assert_array_equal(y, close[3:])
+
+
+def test_train_matches_sklearn_on_shifted_features(df_ticker):
+    predictor = StockPredictor(lag=4)
+    predictor.train(df_ticker)
+    ordered = df_ticker.sort_values("date")["close"]
+    X = pd.concat({f"lag_{i}": ordered.shift(i) for i in range(1, 5)}, axis=1).dropna()
+    reference = LinearRegression().fit(X.to_numpy(), ordered.loc[X.index].to_numpy())
+    np.testing.assert_allclose(predictor.model.coef_, reference.coef_)
+
+
+def test_predict_next_days_is_recursive(df_ticker):
+    predictor = StockPredictor(lag=4)
+    predictor.train(df_ticker)
+    predictions = predictor.predict_next_days(df_ticker, 3)
+    assert len(predictions) == 3 and all(isinstance(p, int) for p in predictions)
+
+    # Step by step with the fitted model, most recent close as lag_1
+    window = list(df_ticker.sort_values("date")["close"].values[-4:])
+    expected = []
+    for _ in range(3):
+        value = int(predictor.model.predict([window[::-1]])[0])
+        expected.append(value)
+        window = window[1:] + [value]
+    assert predictions == expected
+
+
+def test_predict_next_uses_latest_closes(df_ticker):
+    predictor = StockPredictor(lag=4)
+    predictor.train(df_ticker)
+    latest = df_ticker.sort_values("date")["close"].values[-4:][::-1]
+    assert predictor.predict_next(df_ticker) == pytest.approx(predictor.model.predict([latest])[0])
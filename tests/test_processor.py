@@ -7,7 +7,9 @@ from src.data.processor import (
     fill_missing,
     convert_types,
     remove_outliers,
-    process_data
+    process_data,
+    compact_frame,
+    densify
 )
 
 # Sample DataFrame fixture
@@ -64,3 +66,54 @@ def test_process_data(sample_df):
     assert pd.api.types.is_datetime64_any_dtype(df_clean["date"])
     # After cleaning, row count matches updated fixture
     assert df_clean.shape[0] == 3
+
+
+def test_remove_outliers_grouped():
+    df = pd.DataFrame({
+        "value": [1, 2, 3, 50, 100, 101, 102, 99],
+        "ticker": ["A"] * 4 + ["B"] * 4
+    })
+    # A single IQR over both tickers is too wide to flag the 50 in ticker A
+    assert remove_outliers(df).shape[0] == 8
+    df_clean = remove_outliers(df, by="ticker")
+    assert df_clean["value"].tolist() == [1, 2, 3, 100, 101, 102, 99]
+
+
+def test_process_data_grouped(sample_df):
+    df_clean = process_data(sample_df, group_by="ticker")
+    assert df_clean.shape[0] == 3
+
+
+def make_clean_frame(n=100):
+    return pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=n, tz="UTC"),
+        "close": np.linspace(100.0, 200.0, n),
+        "volume": np.arange(n, dtype=float) * 1000,
+        "dividends": [0.5 if i == 10 else 0.0 for i in range(n)],
+        "ticker": ["AAPL"] * (n // 2) + ["MSFT"] * (n - n // 2)
+    })
+
+
+def test_compact_frame_dtypes():
+    df = make_clean_frame()
+    compact = compact_frame(df)
+    assert isinstance(compact["ticker"].dtype, pd.CategoricalDtype)
+    assert compact["close"].dtype == np.float32
+    assert pd.api.types.is_integer_dtype(compact["volume"])
+    assert isinstance(compact["dividends"].dtype, pd.SparseDtype)
+    assert compact.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum()
+    assert np.allclose(compact["close"], df["close"], atol=0.005)
+    assert compact["ticker"].tolist() == df["ticker"].tolist()
+
+
+def test_compact_frame_keeps_float64_when_precision_is_lost():
+    df = make_clean_frame()
+    df["close"] = 600_000.01 + np.arange(len(df))
+    assert compact_frame(df)["close"].dtype == np.float64
+
+
+def test_densify_round_trip():
+    df = make_clean_frame()
+    dense = densify(compact_frame(df))
+    assert dense["dividends"].dtype == np.float64
+    assert dense["dividends"].tolist() == df["dividends"].tolist()
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.models.registry import ModelRegistry
+
+
+@pytest.fixture
+def df_ticker():
+    return pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=60, tz="UTC"),
+        "close": 100 + np.sin(np.arange(60) / 3) * 10,
+        "ticker": "AAPL"
+    })
+
+
+def test_registry_reuses_trained_model(df_ticker):
+    registry = ModelRegistry(max_horizon=10)
+    model = registry.get_model("AAPL", df_ticker, lag=3, version="v1")
+    assert registry.get_model("AAPL", df_ticker, lag=3, version="v1") is model
+    assert registry.get_model("AAPL", df_ticker, lag=3, version="v2") is not model
+
+
+def test_forecasts_served_as_prefixes(df_ticker):
+    registry = ModelRegistry(max_horizon=10)
+    five = registry.forecast("AAPL", df_ticker, 5, lag=3, version="v1")
+    ten = registry.forecast("AAPL", df_ticker, 10, lag=3, version="v1")
+    assert five == ten[:5]
+    model = registry.get_model("AAPL", df_ticker, lag=3, version="v1")
+    assert model.predict_next_days(df_ticker, 5) == five
+
+
+def test_registry_persists_and_invalidates(df_ticker, tmp_path):
+    ModelRegistry(persist_dir=tmp_path).get_model("AAPL", df_ticker, lag=3, version="v1")
+    assert len(list(tmp_path.glob("*.pkl"))) == 1
+
+    registry = ModelRegistry(persist_dir=tmp_path)
+    model = registry.get_model("AAPL", None, lag=3, version="v1")  # loaded, not retrained
+    assert model.model.coef_.shape == (3,)
+
+    registry.invalidate("v2")
+    assert list(tmp_path.glob("*.pkl")) == []
@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+from src.config import DATASETS
+from src.data.data_loader import SQLDataLoader
+from src.data.rollup import aggregate_bars, build_rollups, pick_tier, update_rollup, update_rollup_files
+from src.data.sql_store import write_frame
+
+
+@pytest.fixture
+def bars():
+    dates = pd.date_range("2024-01-01", periods=60, freq="D", tz="UTC")
+    frames = []
+    for ticker, base in [("AAPL", 100.0), ("MSFT", 300.0)]:
+        close = base + pd.Series(range(60), dtype=float)
+        frames.append(pd.DataFrame({
+            "Date": dates.astype(str), "Open": close - 1, "High": close + 2, "Low": close - 2,
+            "Close": close, "Volume": 10, "Dividends": 0.0, "Stock Splits": 0.0, "Ticker": ticker
+        }))
+    df = pd.concat(frames, ignore_index=True)
+    df.loc[10, "Stock Splits"] = 4.0
+    return df
+
+
+def test_aggregate_bars_ohlcv_rules(bars):
+    monthly = aggregate_bars(bars, "M")
+    jan = monthly[(monthly["Ticker"] == "AAPL")].iloc[0]
+    assert jan["Date"] == pd.Timestamp("2024-01-01", tz="UTC")
+    assert jan["Open"] == 99.0  # first open
+    assert jan["High"] == 132.0  # max high
+    assert jan["Low"] == 98.0  # min low
+    assert jan["Close"] == 130.0  # last close
+    assert jan["Volume"] == 310  # summed volume
+    assert jan["Stock Splits"] == 4.0
+    assert list(monthly.columns) == list(bars.columns)
+
+
+def test_update_rollup_matches_full_build(bars):
+    dates = pd.to_datetime(bars["Date"], utc=True)
+    old = build_rollups(bars[dates < "2024-02-10"])
+    new = build_rollups(bars)
+    for tier, period in [("weekly", "W"), ("monthly", "M"), ("quarterly", "Q")]:
+        updated = update_rollup(old[tier], bars, period)
+        pd.testing.assert_frame_equal(updated.reset_index(drop=True), new[tier].reset_index(drop=True))
+        # Merging only the appended bars into the last period gives the same tier
+        merged = update_rollup(old[tier], bars[dates >= "2024-02-10"], period, appended=True)
+        pd.testing.assert_frame_equal(merged, new[tier].reset_index(drop=True))
+
+
+def test_sql_aggregate_matches_pandas(bars, tmp_path):
+    path = write_frame(bars, tmp_path / "combined.sqlite")
+    for period in ["W", "M", "Q"]:
+        expected = aggregate_bars(bars, period)
+        pd.testing.assert_frame_equal(SQLDataLoader(path).aggregate(period), expected, check_dtype=False)
+
+
+def test_update_rollup_files_from_sqlite(bars, monkeypatch, tmp_path):
+    for tier in ["WEEKLY", "MONTHLY", "QUARTERLY"]:
+        monkeypatch.setitem(DATASETS, f"COMBINED_{tier}", str(tmp_path / f"{tier.lower()}.sqlite"))
+    paths = update_rollup_files(write_frame(bars, tmp_path / "combined.sqlite"))
+    monthly = SQLDataLoader(paths["monthly"]).load_data()
+    pd.testing.assert_frame_equal(monthly, aggregate_bars(bars, "M"), check_dtype=False)
+
+
+def test_update_rollup_files_merges_appended_rows(bars, monkeypatch, tmp_path):
+    for tier in ["WEEKLY", "MONTHLY", "QUARTERLY"]:
+        monkeypatch.setitem(DATASETS, f"COMBINED_{tier}", str(tmp_path / f"{tier.lower()}.parquet"))
+    dates = pd.to_datetime(bars["Date"], utc=True)
+    update_rollup_files(write_frame(bars[dates < "2024-02-10"], tmp_path / "combined.sqlite"))
+
+    # Only the appended rows are read, not the combined file
+    missing = tmp_path / "missing.csv"
+    paths = update_rollup_files(missing, appended=bars[dates >= "2024-02-10"])
+    for tier, period in [("weekly", "W"), ("monthly", "M"), ("quarterly", "Q")]:
+        pd.testing.assert_frame_equal(pd.read_parquet(paths[tier]), aggregate_bars(bars, period), check_dtype=False)
+
+
+def test_pick_tier(monkeypatch, tmp_path):
+    for tier in ["WEEKLY", "MONTHLY", "QUARTERLY"]:
+        path = tmp_path / f"{tier}.csv"
+        path.touch()
+        monkeypatch.setitem(DATASETS, f"COMBINED_{tier}", str(path))
+    assert pick_tier("2000-01-01", "2020-01-01", pixels=50) == "COMBINED_QUARTERLY"
+    assert pick_tier("2000-01-01", "2020-01-01", pixels=200) == "COMBINED_MONTHLY"
+    assert pick_tier("2019-01-01", "2020-01-01", pixels=50) == "COMBINED_WEEKLY"
+    assert pick_tier("2019-12-01", "2020-01-01", pixels=50) == "COMBINED"
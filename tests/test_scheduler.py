@@ -0,0 +1,74 @@
+import threading
+
+import pandas as pd
+import pytest
+from src.config import DATASETS, ROLLUP_TIERS
+from src.data.data_loader import get_data
+from src.data.partition import TickerPartitions
+from src.data.processor import compact_frame, process_data
+from src.data.stock_downloader import StockDownloader
+from src.scheduler import RefreshScheduler
+from src.webapp.state import DashboardState
+
+
+@pytest.fixture
+def scheduler(tmp_path, monkeypatch, price_source):
+    monkeypatch.setitem(DATASETS, "COMBINED", str(tmp_path / "combined_stock.csv"))
+    monkeypatch.setitem(DATASETS, "FORECASTS", str(tmp_path / "forecasts.csv"))
+    for tier in ROLLUP_TIERS:
+        monkeypatch.setitem(DATASETS, f"COMBINED_{tier.upper()}", str(tmp_path / f"combined_{tier}.csv"))
+    source = price_source(end="2024-03-01")
+    downloader = StockDownloader(["AAPL", "MSFT"], out_dir=tmp_path, source=source)
+    state = DashboardState(cache_dir=None, incremental=True)
+    state.registry.persist_dir = None
+    return RefreshScheduler(state, downloader=downloader, tickers=["AAPL", "MSFT"], forecast_workers=1)
+
+
+def statuses(report):
+    return {name: r["status"] for name, r in report.items()}
+
+
+def test_first_run_runs_every_stage(scheduler):
+    report = scheduler.run_once()
+    assert statuses(report) == {"download": "ran", "combine": "ran", "process": "ran",
+                                "retrain": "ran", "swap": "ran"}
+    assert scheduler.state.partitions.tickers == ["AAPL", "MSFT"]
+    assert scheduler.forecast_version() == scheduler.state.version
+
+
+def test_unchanged_inputs_skip_stages(scheduler):
+    scheduler.run_once()
+    report = scheduler.run_once()
+    assert statuses(report) == {"download": "skipped", "combine": "skipped", "process": "skipped",
+                                "retrain": "skipped", "swap": "skipped"}
+
+
+def test_new_bars_are_swapped_in(scheduler, monkeypatch):
+    scheduler.run_once()
+    cleared = []
+    scheduler.state.add_swap_listener(lambda: cleared.append(True))
+    old_version, old_partitions = scheduler.state.snapshot()
+
+    scheduler.downloader.source.end = "2024-03-05"
+    # Only the appended bars are cleaned, the combined file is not reloaded
+    monkeypatch.setattr(scheduler.state, "_load_clean", lambda version: pytest.fail("reloaded the whole dataset"))
+    report = scheduler.run_once()
+    assert set(statuses(report).values()) == {"ran"}
+    version, partitions = scheduler.state.snapshot()
+    assert version != old_version and cleared
+    assert len(partitions["AAPL"]) == len(old_partitions["AAPL"]) + 4
+    assert scheduler.state.forecast(scheduler.state.snapshot(), "AAPL", 3) != []
+    full = TickerPartitions(compact_frame(process_data(get_data("COMBINED"), group_by="ticker")))
+    pd.testing.assert_frame_equal(partitions.frame.reset_index(drop=True), full.frame.reset_index(drop=True))
+
+
+def test_run_once_from_a_thread_with_worker_processes(scheduler):
+    # As inside the dashboard: the refresh thread retrains in a process pool
+    scheduler.forecast_workers = 2
+    reports = []
+    thread = threading.Thread(target=lambda: reports.append(scheduler.run_once()), daemon=True)
+    thread.start()
+    thread.join(timeout=120)
+    assert not thread.is_alive()
+    assert statuses(reports[0])["retrain"] == "ran"
+    assert scheduler.forecast_version() == scheduler.state.version
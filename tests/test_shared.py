@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from src.data.partition import TickerPartitions
+from src.data.shared import SharedDataset
+
+
+def make_partitions(scale=1.0):
+    df = pd.DataFrame({
+        "date": pd.to_datetime(["2024-01-02", "2024-01-01", "2024-01-01"], utc=True),
+        "close": [2.0 * scale, 1.0 * scale, 10.0 * scale],
+        "ticker": ["MSFT", "MSFT", "AAPL"]
+    })
+    return TickerPartitions(df)
+
+
+def test_attach_returns_published_partitions(tmp_path):
+    shared = SharedDataset(root=str(tmp_path))
+    assert shared.attach() is None
+    shared.publish(make_partitions(), "v1")
+    version, partitions = SharedDataset(root=str(tmp_path)).attach()
+    assert version == "v1"
+    assert partitions.tickers == ["MSFT", "AAPL"]
+    assert partitions["MSFT"]["close"].tolist() == [1.0, 2.0]
+    assert not partitions.frame["close"].to_numpy().flags.writeable
+
+
+def test_refresh_picks_up_new_version(tmp_path):
+    writer, reader = SharedDataset(root=str(tmp_path)), SharedDataset(root=str(tmp_path))
+    writer.publish(make_partitions(), "v1")
+    reader.attach()
+    assert reader.refresh()[0] == "v1"
+    writer.publish(make_partitions(scale=2.0), "v2")
+    version, partitions = reader.refresh()
+    assert version == "v2" and writer.published_version() == "v2"
+    assert partitions["AAPL"]["close"].tolist() == [20.0]
+    assert len(list(tmp_path.glob("clean-*.arrow"))) == 1
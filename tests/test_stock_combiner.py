@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+from src.data.data_loader import SQLDataLoader
+from src.data.stock_combiner import StockCombiner
+
+
+def write_stock(path, start, periods, mode="w"):
+    dates = pd.date_range(start, periods=periods, freq="D", tz="America/New_York", name="Date")
+    df = pd.DataFrame({"Close": range(periods), "Volume": 100}, index=dates)
+    df.to_csv(path, mode=mode, header=mode == "w")
+
+
+@pytest.fixture
+def sources(tmp_path):
+    files = [tmp_path / "AAPL_stock.csv", tmp_path / "MSFT_stock.csv"]
+    for f in files:
+        write_stock(f, "2024-01-01", 5)
+    return files
+
+
+def test_combine_streams_in_chunks(sources, tmp_path):
+    path = StockCombiner(sources, out_dir=tmp_path / "out", chunksize=2).combine()
+    df = pd.read_csv(path)
+    assert df.shape == (10, 4)
+    assert df["Ticker"].value_counts().to_dict() == {"AAPL": 5, "MSFT": 5}
+
+
+def test_combine_parquet(sources, tmp_path):
+    path = StockCombiner(sources, out_dir=tmp_path / "out", fmt="parquet", chunksize=2).combine()
+    df = pd.read_parquet(path)
+    assert df.shape == (10, 4)
+    assert pd.api.types.is_datetime64_any_dtype(df["Date"])
+
+
+def test_combine_sqlite_bulk_inserts(sources, tmp_path):
+    combiner = StockCombiner(sources, out_dir=tmp_path / "out", fmt="sqlite", chunksize=2)
+    df = SQLDataLoader(combiner.combine()).load_data()
+    assert df.shape == (10, 4)
+    assert df["Date"].iloc[0] == pd.Timestamp("2024-01-01 05:00", tz="UTC")
+
+    write_stock(sources[0], "2024-01-06", 3, mode="a")
+    df = SQLDataLoader(combiner.combine(incremental=True)).load_data()
+    assert df["Ticker"].value_counts().to_dict() == {"AAPL": 8, "MSFT": 5}
+
+
+def test_combine_incremental_appends_new_rows(sources, tmp_path):
+    combiner = StockCombiner(sources, out_dir=tmp_path / "out")
+    combiner.combine()
+    write_stock(sources[0], "2024-01-06", 3, mode="a")
+
+    path = combiner.combine(incremental=True)
+    df = pd.read_csv(path)
+    assert df["Ticker"].value_counts().to_dict() == {"AAPL": 8, "MSFT": 5}
+    assert combiner.load_manifest()[str(sources[0])]["rows"] == 8
+    pd.testing.assert_frame_equal(combiner.appended.astype(str), df.tail(3).reset_index(drop=True).astype(str))
+
+    full = pd.read_csv(StockCombiner(sources, out_dir=tmp_path / "full").combine())
+    key = ["Ticker", "Date"]
+    pd.testing.assert_frame_equal(
+        df.sort_values(key).reset_index(drop=True), full.sort_values(key).reset_index(drop=True)
+    )
+
+
+def test_combine_incremental_rebuilds_rewritten_file(sources, tmp_path):
+    combiner = StockCombiner(sources, out_dir=tmp_path / "out")
+    combiner.combine()
+    write_stock(sources[1], "2023-01-01", 2)
+
+    df = pd.read_csv(combiner.combine(incremental=True))
+    assert df["Ticker"].value_counts().to_dict() == {"AAPL": 5, "MSFT": 2}
+    assert combiner.appended is None
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet", "sqlite"])
+def test_save_writes_the_output_format(sources, tmp_path, fmt):
+    combined = pd.read_csv(StockCombiner(sources, out_dir=tmp_path / "csv").combine())
+    path = StockCombiner(sources, out_dir=tmp_path / fmt, fmt=fmt).save(combined)
+    assert path.suffix == f".{fmt}"
+    read = {"csv": pd.read_csv, "parquet": pd.read_parquet, "sqlite": lambda p: SQLDataLoader(p).load_data()}[fmt]
+    df = read(path)
+    assert df.shape == combined.shape
+    assert df["Ticker"].tolist() == combined["Ticker"].tolist()
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+from src.data.stock_downloader import StockDownloader
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_download_concurrent(tmp_path, fmt, price_source):
+    source = price_source()
+    downloader = StockDownloader(["AAPL", "MSFT"], out_dir=tmp_path, fmt=fmt, source=source, max_workers=2)
+    files = downloader.download()
+    assert [f.name for f in files] == [f"AAPL_stock.{fmt}", f"MSFT_stock.{fmt}"]
+    assert all(f.exists() for f in files)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_download_incremental_appends_missing_bars(tmp_path, fmt, price_source):
+    StockDownloader("AAPL", out_dir=tmp_path, fmt=fmt, source=price_source(end="2024-01-05")).download()
+    source = price_source(end="2024-01-10")
+    downloader = StockDownloader("AAPL", out_dir=tmp_path, fmt=fmt, source=source)
+    path = downloader.download(incremental=True)[0]
+
+    assert source.calls[0][1] == pd.Timestamp("2024-01-05", tz="America/New_York")
+    df = pd.read_parquet(path) if fmt == "parquet" else pd.read_csv(path)
+    dates = pd.to_datetime(df["Date"], utc=True)
+    assert len(df) == 10
+    assert dates.is_monotonic_increasing and dates.is_unique
+
+
+def test_download_retries_with_backoff(tmp_path, price_source):
+    source = price_source(fail_times=2)
+    downloader = StockDownloader("AAPL", out_dir=tmp_path, source=source, retries=2, backoff=0)
+    downloader.download()
+    assert len(source.calls) == 3
+
+    source = price_source(fail_times=5)
+    downloader = StockDownloader("AAPL", out_dir=tmp_path, source=source, retries=1, backoff=0)
+    with pytest.raises(ConnectionError):
+        downloader.download()
@@ -0,0 +1,111 @@
+import base64
+import importlib
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import dash
+import numpy as np
+import pandas as pd
+import pytest
+from plotly.utils import PlotlyJSONEncoder
+from src.viz.charts import plot_stock_with_prediction
+from src.config import DATASETS
+from src.data.cache import dataset_cache
+from src.data.partition import TickerPartitions
+from src.data.processor import compact_frame, process_data
+from src.data.sql_store import write_frame
+from src.webapp.state import DashboardState
+
+
+def test_write_cache_tolerates_concurrent_workers(tmp_path, monkeypatch):
+    state = DashboardState(cache_dir=str(tmp_path))
+    df = pd.DataFrame({"close": [1.0, 2.0]})
+    state._write_cache(df, "v1")
+
+    # Another worker removes the stale file between the glob and our removal
+    remove = os.remove
+    monkeypatch.setattr(os, "remove", lambda path: (remove(path), remove(path)))
+    state._write_cache(df, "v2")
+    assert os.listdir(tmp_path) == ["combined_clean_v2.parquet"]
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "combined_clean_v2.parquet"), df)
+
+
+def test_app_module_builds_nothing_at_import(monkeypatch):
+    import src.webapp
+
+    # Import a fresh copy, put back in place of the loaded one afterwards
+    monkeypatch.setattr(src.webapp, "app", sys.modules.get("src.webapp.app"), raising=False)
+    monkeypatch.delitem(sys.modules, "src.webapp.app", raising=False)
+    monkeypatch.setattr(DashboardState, "__init__", lambda *args, **kwargs: pytest.fail("created a state at import"))
+    monkeypatch.setattr(dash, "Dash", lambda *args, **kwargs: pytest.fail("built an app at import"))
+    module = importlib.import_module("src.webapp.app")
+    assert module._default_app is None
+
+    # The default app is built on first access of `app` or `server`, once
+    built = []
+    monkeypatch.setattr(module, "create_app", lambda: built.append(SimpleNamespace(server="wsgi")) or built[0])
+    assert module.server == "wsgi" and module.app is built[0]
+    assert len(built) == 1
+
+
+def apply_patch(figure, patch) -> dict:
+    """Apply the Assign operations of a Dash Patch, as sent to the browser, to a figure"""
+    figure = figure.to_plotly_json()
+    for operation in json.loads(json.dumps(patch, cls=PlotlyJSONEncoder))["operations"]:
+        assert operation["operation"] == "Assign"
+        *path, key = operation["location"]
+        target = figure
+        for step in path:
+            target = target[step]
+        target[key] = operation["params"]["value"]
+    return figure
+
+
+def values(array) -> np.ndarray:
+    """Decode a trace's data array, which plotly may send base64-encoded"""
+    if isinstance(array, dict):
+        return np.frombuffer(base64.b64decode(array["bdata"]), dtype=array["dtype"]).astype(float)
+    return np.asarray(array, dtype=float)
+
+
+def assert_same_figure(patched: dict, expected):
+    assert patched["layout"]["title"]["text"] == expected.layout.title.text
+    assert len(patched["data"]) == len(expected.data)
+    for trace, want in zip(patched["data"], expected.data):
+        assert (trace["name"], trace.get("showlegend")) == (want.name, want.showlegend)
+        pd.testing.assert_index_equal(pd.DatetimeIndex(pd.to_datetime(list(trace["x"]), utc=True)),
+                                      pd.DatetimeIndex(pd.to_datetime(list(want.x), utc=True)))
+        np.testing.assert_array_equal(values(trace["y"]), values(want.y))
+
+
+def test_prediction_patch_updates_the_predicted_trace():
+    from src.webapp.app import prediction_patch
+
+    dates = pd.date_range("2024-01-01", periods=30, freq="D", tz="UTC")
+    df = pd.DataFrame({"date": dates, "close": np.arange(30.0), "ticker": "AAPL"})
+    indicators = pd.DataFrame({"sma_20": np.arange(30.0)}, index=df.index)
+    full = plot_stock_with_prediction(df, "AAPL", [31.0, 32.0], indicators=indicators, overlays=["sma_20"])
+    assert [trace.name for trace in full.data] == ["Historical", "Predicted", "SMA 20"]
+
+    # The slider's patch turns the full figure into the one built for the new horizon
+    for predicted in [[31.0, 32.0, 33.0, 34.0], []]:
+        patched = apply_patch(full, prediction_patch("AAPL", dates[-1], predicted))
+        expected = plot_stock_with_prediction(df, "AAPL", predicted, indicators=indicators, overlays=["sma_20"])
+        assert_same_figure(patched, expected)
+
+
+def test_sqlite_dataset_is_not_kept_in_the_dataset_cache(tmp_path, monkeypatch):
+    dates = pd.date_range("2024-01-01", periods=40, freq="D", tz="UTC").astype(str)
+    raw = pd.concat([pd.DataFrame({
+        "Date": dates, "Open": base, "High": base + 1.0, "Low": base - 1.0, "Close": base + np.arange(40.0),
+        "Volume": 100, "Dividends": 0.0, "Stock Splits": 0.0, "Ticker": ticker,
+    }) for ticker, base in [("AAPL", 100.0), ("MSFT", 300.0)]], ignore_index=True)
+    monkeypatch.setitem(DATASETS, "TEST_SQL", str(write_frame(raw, tmp_path / "combined.sqlite")))
+    monkeypatch.setattr(dataset_cache, "put", lambda *args: pytest.fail("cached the raw dataset"))
+
+    partitions = DashboardState("TEST_SQL", cache_dir=None).ensure_loaded().partitions
+    expected = TickerPartitions(compact_frame(process_data(raw, group_by="ticker")))
+    assert partitions.tickers == expected.tickers
+    pd.testing.assert_frame_equal(partitions["MSFT"], expected["MSFT"])